@@ -4,6 +4,7 @@ import sys
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy import text
 
 from alembic import context
 
@@ -11,7 +12,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "s
 
 from core.config import settings
 from database import Base
-from models import user, file
+from models import user, file, directory, upload_session, blob, usage, directory_move, job, revoked_link, change
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -22,7 +23,8 @@ config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# При запуске из приложения (database.upgrade_schema) логирование уже настроено
+if config.config_file_name is not None and "connection" not in config.attributes:
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -53,6 +55,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -61,6 +64,34 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # поисковые индексы ведёт crud.search.ensure_search_index, не миграции:
+    # таблицы FTS5 в SQLite и триграммные индексы в PostgreSQL
+    if type_ == "table":
+        return not name.startswith(("files_search", "directories_search"))
+    if type_ == "index":
+        return not name.endswith("_trgm")
+    return True
+
+
+def do_run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # SQLite не умеет большую часть ALTER TABLE — batch-операции
+        # пересоздают таблицу
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        if connection.dialect.name == "postgresql":
+            # воркеры стартуют одновременно — мигрирует один, остальные ждут
+            # и видят уже актуальную версию
+            connection.execute(text("SELECT pg_advisory_xact_lock(hashtext('alembic_upgrade'))"))
+        context.run_migrations()
+
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
 
@@ -68,6 +99,11 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -75,12 +111,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        do_run_migrations(connection)
 
 
 if context.is_offline_mode():
@@ -0,0 +1,34 @@
+"""deferred collection of unreferenced blobs (user-003)
+
+Revision ID: 3b2a19967265
+Revises: d784e30a1bf2
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b2a19967265'
+down_revision: Union[str, None] = 'd784e30a1bf2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("blobs") as batch_op:
+        batch_op.add_column(sa.Column("orphaned_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index("ix_blobs_orphaned_at", "blobs", ["orphaned_at"])
+    # раньше такие записи удалялись сразу — если остались, пусть их соберёт сборщик
+    op.execute("UPDATE blobs SET orphaned_at = CURRENT_TIMESTAMP WHERE refcount <= 0")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_blobs_orphaned_at", table_name="blobs")
+    with op.batch_alter_table("blobs") as batch_op:
+        batch_op.drop_column("orphaned_at")
@@ -0,0 +1,52 @@
+"""upload sessions and their chunks (user-001)
+
+Revision ID: 4f709703ac50
+Revises: 60a45940ef52
+Create Date: 2026-10-18 09:01:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f709703ac50'
+down_revision: Union[str, None] = '60a45940ef52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "upload_sessions",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("total_size", sa.BigInteger(), nullable=False),
+        sa.Column("chunk_size", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_upload_sessions_owner_id", "upload_sessions", ["owner_id"])
+    op.create_index("ix_upload_sessions_expires_at", "upload_sessions", ["expires_at"])
+    op.create_table(
+        "upload_chunks",
+        sa.Column("session_id", sa.String(), nullable=False),
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["session_id"], ["upload_sessions.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("session_id", "number"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("upload_chunks")
+    op.drop_table("upload_sessions")
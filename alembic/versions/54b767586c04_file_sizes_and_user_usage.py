@@ -0,0 +1,116 @@
+"""file size and type, per-user usage aggregate (user-004)
+
+Revision ID: 54b767586c04
+Revises: d86fd9fc1f60
+Create Date: 2026-10-18 09:04:00.000000
+
+"""
+import mimetypes
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '54b767586c04'
+down_revision: Union[str, None] = 'd86fd9fc1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+files = sa.table(
+    "files",
+    sa.column("id", sa.Integer),
+    sa.column("filename", sa.String),
+    sa.column("owner_id", sa.Integer),
+    sa.column("checksum", sa.String),
+    sa.column("size", sa.BigInteger),
+    sa.column("mime_type", sa.String),
+)
+blobs = sa.table("blobs", sa.column("sha256", sa.String), sa.column("size", sa.BigInteger))
+user_usage = sa.table(
+    "user_usage",
+    sa.column("user_id", sa.Integer),
+    sa.column("file_count", sa.BigInteger),
+    sa.column("total_bytes", sa.BigInteger),
+)
+
+
+def _legacy_size(filename: str) -> int:
+    # env.py уже добавил src в sys.path
+    from core.config import settings
+
+    # до blob-хранилища данные лежали на диске под своим именем
+    try:
+        return os.path.getsize(os.path.join(settings.UPLOAD_ROOT, filename))
+    except OSError:
+        return 0
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("files") as batch_op:
+        batch_op.add_column(sa.Column("size", sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column("mime_type", sa.String(), nullable=True))
+    op.create_table(
+        "user_usage",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("file_count", sa.BigInteger(), nullable=False),
+        sa.Column("total_bytes", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    # размеры и типы существующих файлов: иначе агрегат и сортировка
+    # по размеру ждали бы ручного запуска python -m services.usage
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(files.c.id, files.c.filename, blobs.c.size)
+            .select_from(files.outerjoin(blobs, blobs.c.sha256 == files.c.checksum))
+            .where(files.c.id > last_id)
+            .order_by(files.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            files.update()
+            .where(files.c.id == sa.bindparam("b_id"))
+            .values(size=sa.bindparam("b_size"), mime_type=sa.bindparam("b_mime_type")),
+            [
+                {
+                    "b_id": file_id,
+                    "b_size": blob_size if blob_size is not None else _legacy_size(filename),
+                    "b_mime_type": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                }
+                for file_id, filename, blob_size in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+    bind.execute(
+        user_usage.insert().from_select(
+            ["user_id", "file_count", "total_bytes"],
+            sa.select(
+                files.c.owner_id,
+                sa.func.count(files.c.id),
+                sa.func.coalesce(sa.func.sum(files.c.size), 0),
+            ).group_by(files.c.owner_id),
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_usage")
+    with op.batch_alter_table("files") as batch_op:
+        batch_op.drop_column("mime_type")
+        batch_op.drop_column("size")
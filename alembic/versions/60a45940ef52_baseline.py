@@ -0,0 +1,78 @@
+"""baseline: users, files, directories
+
+Revision ID: 60a45940ef52
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '60a45940ef52'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Базы, развёрнутые до миграций, создавались Base.metadata.create_all
+    # и уже содержат эти таблицы, но не alembic_version — их не трогаем
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+    if "files" not in existing:
+        op.create_table(
+            "files",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("filename", sa.String(), nullable=False),
+            sa.Column("owner_id", sa.Integer(), nullable=False),
+            sa.Column(
+                "uploaded_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=True,
+            ),
+            sa.Column("public_token", sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_files_id", "files", ["id"])
+        op.create_index("ix_files_filename", "files", ["filename"], unique=True)
+        op.create_index("ix_files_public_token", "files", ["public_token"], unique=True)
+    if "directories" not in existing:
+        op.create_table(
+            "directories",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("path", sa.String(), nullable=False),
+            sa.Column("owner_id", sa.Integer(), nullable=False),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=True,
+            ),
+            sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_directories_id", "directories", ["id"])
+        op.create_index("ix_directories_path", "directories", ["path"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("directories")
+    op.drop_table("files")
+    op.drop_table("users")
@@ -0,0 +1,42 @@
+"""compression at rest (user-015)
+
+Revision ID: 66c19e541c63
+Revises: d105526314d5
+Create Date: 2026-10-18 09:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66c19e541c63'
+down_revision: Union[str, None] = 'd105526314d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("blobs") as batch_op:
+        batch_op.add_column(sa.Column("encoding", sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column("stored_size", sa.BigInteger(), nullable=True))
+    with op.batch_alter_table("user_usage") as batch_op:
+        batch_op.add_column(
+            sa.Column("stored_bytes", sa.BigInteger(), nullable=False, server_default="0")
+        )
+    # всё, что загружено до сжатия, лежит в хранилище как есть
+    op.execute("UPDATE user_usage SET stored_bytes = total_bytes")
+    with op.batch_alter_table("user_usage") as batch_op:
+        batch_op.alter_column("stored_bytes", server_default=None)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("user_usage") as batch_op:
+        batch_op.drop_column("stored_bytes")
+    with op.batch_alter_table("blobs") as batch_op:
+        batch_op.drop_column("stored_size")
+        batch_op.drop_column("encoding")
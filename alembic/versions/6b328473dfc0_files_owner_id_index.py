@@ -0,0 +1,28 @@
+"""index files by owner and id (user-009)
+
+Revision ID: 6b328473dfc0
+Revises: 79f5eb811000
+Create Date: 2026-10-18 09:09:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b328473dfc0'
+down_revision: Union[str, None] = '79f5eb811000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_files_owner_id_id", "files", ["owner_id", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_files_owner_id_id", table_name="files")
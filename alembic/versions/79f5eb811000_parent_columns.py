@@ -0,0 +1,77 @@
+"""parent columns and listing indexes (user-006)
+
+Revision ID: 79f5eb811000
+Revises: 54b767586c04
+Create Date: 2026-10-18 09:06:00.000000
+
+"""
+import posixpath
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '79f5eb811000'
+down_revision: Union[str, None] = '54b767586c04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _fill_parent(table: str, path_column: str) -> None:
+    # листинг папки ищет по parent — без него старые записи в нём не видны
+    t = sa.table(
+        table,
+        sa.column("id", sa.Integer),
+        sa.column(path_column, sa.String),
+        sa.column("parent", sa.String),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(t.c.id, t.c[path_column])
+            .where(t.c.id > last_id)
+            .order_by(t.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            t.update().where(t.c.id == sa.bindparam("b_id")).values(parent=sa.bindparam("b_parent")),
+            [{"b_id": row_id, "b_parent": posixpath.dirname(path)} for row_id, path in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("files") as batch_op:
+        batch_op.add_column(sa.Column("parent", sa.String(), nullable=True))
+    with op.batch_alter_table("directories") as batch_op:
+        batch_op.add_column(sa.Column("parent", sa.String(), nullable=True))
+    _fill_parent("files", "filename")
+    _fill_parent("directories", "path")
+    op.create_index("ix_files_parent_filename", "files", ["parent", "filename"])
+    op.create_index("ix_files_parent_size", "files", ["parent", "size", "id"])
+    op.create_index("ix_files_parent_uploaded_at", "files", ["parent", "uploaded_at", "id"])
+    op.create_index("ix_directories_parent_path", "directories", ["parent", "path"])
+    op.create_index(
+        "ix_directories_parent_created_at", "directories", ["parent", "created_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_directories_parent_created_at", table_name="directories")
+    op.drop_index("ix_directories_parent_path", table_name="directories")
+    op.drop_index("ix_files_parent_uploaded_at", table_name="files")
+    op.drop_index("ix_files_parent_size", table_name="files")
+    op.drop_index("ix_files_parent_filename", table_name="files")
+    with op.batch_alter_table("directories") as batch_op:
+        batch_op.drop_column("parent")
+    with op.batch_alter_table("files") as batch_op:
+        batch_op.drop_column("parent")
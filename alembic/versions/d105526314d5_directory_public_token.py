@@ -0,0 +1,32 @@
+"""public links to directories (user-013)
+
+Revision ID: d105526314d5
+Revises: af666e951c08
+Create Date: 2026-10-18 09:13:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd105526314d5'
+down_revision: Union[str, None] = 'af666e951c08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("directories") as batch_op:
+        batch_op.add_column(sa.Column("public_token", sa.String(), nullable=True))
+    op.create_index("ix_directories_public_token", "directories", ["public_token"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_directories_public_token", table_name="directories")
+    with op.batch_alter_table("directories") as batch_op:
+        batch_op.drop_column("public_token")
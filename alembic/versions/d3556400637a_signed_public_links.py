@@ -0,0 +1,50 @@
+"""signed expiring public links (user-018)
+
+Revision ID: d3556400637a
+Revises: a3af451903cd
+Create Date: 2026-10-18 09:18:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3556400637a'
+down_revision: Union[str, None] = 'a3af451903cd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("files", "directories"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(
+                sa.Column("public_link_expires_at", sa.DateTime(timezone=True), nullable=True)
+            )
+            batch_op.add_column(
+                sa.Column("download_count", sa.BigInteger(), nullable=False, server_default="0")
+            )
+    op.create_table(
+        "revoked_links",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=1), nullable=False),
+        sa.Column("target_id", sa.Integer(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_revoked_links_expires_at", "revoked_links", ["expires_at"])
+    op.create_index("ix_revoked_links_kind_target_id", "revoked_links", ["kind", "target_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("revoked_links")
+    for table in ("directories", "files"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("download_count")
+            batch_op.drop_column("public_link_expires_at")
@@ -0,0 +1,46 @@
+"""content-addressed blob store (user-003)
+
+Revision ID: d86fd9fc1f60
+Revises: 4f709703ac50
+Create Date: 2026-10-18 09:03:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd86fd9fc1f60'
+down_revision: Union[str, None] = '4f709703ac50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "blobs",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("refcount", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    # у старых файлов checksum пуст: их данные остаются на диске по старому пути
+    with op.batch_alter_table("files") as batch_op:
+        batch_op.add_column(sa.Column("checksum", sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key("fk_files_checksum_blobs", "blobs", ["checksum"], ["sha256"])
+        batch_op.create_index("ix_files_checksum", ["checksum"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("files") as batch_op:
+        batch_op.drop_index("ix_files_checksum")
+        batch_op.drop_constraint("fk_files_checksum_blobs", type_="foreignkey")
+        batch_op.drop_column("checksum")
+    op.drop_table("blobs")
@@ -0,0 +1,444 @@
+# benchmarks/run.py
+"""
+Бенчмарки API хранилища: поднимают настоящее приложение (TestClient,
+без сети) на отдельной БД, наполняют её и меряют основные сценарии.
+
+    python benchmarks/run.py --files 5000 --output results.json
+    python benchmarks/run.py --baseline results.json --threshold 0.25
+
+Результат — JSON (медиана, p95, среднее, операций и МБ в секунду по
+каждому сценарию). С --baseline медианы сравниваются с прошлым прогоном,
+и при замедлении больше чем на threshold скрипт завершается с кодом 1.
+
+По умолчанию БД — SQLite во временной папке. Для PostgreSQL передайте
+--database-url и --reset-database: все таблицы в этой БД будут пересозданы.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+# потоков с листингами и скачиваниями во время замера логинов
+FILE_TRAFFIC_THREADS = 4
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Storage API benchmarks")
+    parser.add_argument("--database-url", help="default: SQLite in a temporary directory")
+    parser.add_argument("--reset-database", action="store_true",
+                        help="drop and recreate all tables of --database-url")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--files", type=int, default=2_000, help="files per user")
+    parser.add_argument("--dirs", type=int, default=50, help="directories per user")
+    parser.add_argument("--depth", type=int, default=4, help="directory nesting depth")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="parallel clients for the request benchmarks")
+    parser.add_argument("--transfer-size", type=int, default=8, help="upload/download size, MiB")
+    parser.add_argument("--zip-files", type=int, default=500, help="entries in the unpacked archive")
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown of the median, 0.25 = 25%%")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace, workdir: str) -> None:
+    """
+    Настройки приложения читаются при импорте — задаём их до него.
+    Явно выставленные переменные окружения не перетираются.
+    """
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ["UPLOAD_ROOT"] = os.path.join(workdir, "uploads")
+    # лимиты скорости исказили бы пропускную способность
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "none")
+    os.environ.setdefault("USER_QUOTA_BYTES", "0")
+    os.environ.setdefault("JOB_POLL_INTERVAL_SECONDS", "0.05")
+    sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+    # StaticFiles клиента монтируется по относительному пути
+    os.chdir(REPO_ROOT)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(latencies: list[float], wall: float, bytes_per_op: int | None) -> dict:
+    latencies = sorted(latencies)
+    result = {
+        "iterations": len(latencies),
+        "median_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "min_ms": round(latencies[0] * 1000, 3),
+        "ops_per_sec": round(len(latencies) / wall, 2),
+    }
+    if bytes_per_op:
+        result["mb_per_sec"] = round(bytes_per_op * len(latencies) / wall / MB, 2)
+    return result
+
+
+def measure(operation, iterations: int, warmup: int, concurrency: int = 1,
+            bytes_per_op: int | None = None) -> dict:
+    """
+    operation(i) выполняет одну операцию и сама проверяет ответ.
+    """
+    for i in range(warmup):
+        operation(-1 - i)
+
+    def timed(i: int) -> float:
+        start = time.perf_counter()
+        operation(i)
+        return time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            latencies = list(pool.map(timed, range(iterations)))
+    else:
+        latencies = [timed(i) for i in range(iterations)]
+    return summarize(latencies, time.perf_counter() - wall_start, bytes_per_op)
+
+
+def expect(response, status: int = 200):
+    if response.status_code != status:
+        raise RuntimeError(
+            f"{response.request.method} {response.request.url} -> "
+            f"{response.status_code}: {response.text[:200]}"
+        )
+    return response
+
+
+class Benchmarks:
+    def __init__(self, args, client, users, headers):
+        self.args = args
+        self.client = client
+        self.users = users
+        self.headers = headers
+        self.rng = random.Random(42)
+
+    def _request_bench(self, url_for) -> dict:
+        # запросы идут от разных пользователей по кругу
+        def operation(i):
+            n = i % len(self.users)
+            expect(self.client.get(url_for(self.users[n]), headers=self.headers[n]))
+        return measure(operation, self.args.iterations, self.args.warmup, self.args.concurrency)
+
+    def list_dir_root(self) -> dict:
+        return self._request_bench(lambda u: "/files/?limit=200")
+
+    def list_dir_deep(self) -> dict:
+        return self._request_bench(lambda u: f"/files/?path={u.deepest}&limit=200")
+
+    def list_dir_busiest_by_size(self) -> dict:
+        return self._request_bench(lambda u: f"/files/?path={u.busiest}&sort=size&limit=200")
+
+    def search_substring(self) -> dict:
+        # несколько совпадений среди всех файлов пользователя
+        return self._request_bench(lambda u: "/files/search?q=f00012&limit=100")
+
+    def search_glob(self) -> dict:
+        return self._request_bench(lambda u: "/files/search?q=c1/**/f*7.txt&mode=glob&limit=100")
+
+    def changes_unchanged(self) -> dict:
+        # проход синхронизации по аккаунту, где с прошлого раза ничего не менялось
+        cursors = {}
+        for user, headers in zip(self.users, self.headers):
+            response = expect(self.client.get("/changes/cursor", headers=headers))
+            cursors[user.id] = response.json()["cursor"]
+        return self._request_bench(lambda u: f"/changes/?cursor={cursors[u.id]}")
+
+    def files_stats(self) -> dict:
+        return self._request_bench(lambda u: "/files/stats")
+
+    def users_list(self) -> dict:
+        return self._request_bench(lambda u: "/users/?limit=100")
+
+    def upload_file(self) -> dict:
+        size = self.args.transfer_size * MB
+        payload = bytearray(os.urandom(size))
+        headers = self.headers[0]
+
+        def operation(i):
+            # у каждой итерации своё содержимое — без дедупликации
+            payload[:8] = i.to_bytes(8, "big", signed=True)
+            expect(self.client.post(
+                "/files/upload",
+                headers=headers,
+                files={"file": (f"upload-{i}.bin", bytes(payload), "application/octet-stream")},
+            ), 201)
+
+        return measure(operation, max(self.args.iterations // 5, 3), 1, bytes_per_op=size)
+
+    def _download_target(self) -> str:
+        name = "download.bin"
+        url = f"/files/download/user_{self.users[0].id}/{name}"
+        if self.client.get(url, headers={**self.headers[0], "Range": "bytes=0-0"}).status_code == 404:
+            expect(self.client.post(
+                "/files/upload",
+                headers=self.headers[0],
+                files={"file": (name, os.urandom(self.args.transfer_size * MB),
+                                "application/octet-stream")},
+            ), 201)
+        return url
+
+    def download_file(self) -> dict:
+        url = self._download_target()
+        size = self.args.transfer_size * MB
+
+        def operation(i):
+            response = expect(self.client.get(url, headers=self.headers[0]))
+            assert len(response.content) == size
+
+        return measure(operation, max(self.args.iterations // 5, 3), 1, bytes_per_op=size)
+
+    def download_range(self) -> dict:
+        url = self._download_target()
+        size = self.args.transfer_size * MB
+        chunk = 64 * 1024
+        starts = [self.rng.randrange(0, size - chunk) for _ in range(self.args.iterations)]
+
+        def operation(i):
+            start = starts[i] if i >= 0 else 0
+            headers = {**self.headers[0], "Range": f"bytes={start}-{start + chunk - 1}"}
+            response = expect(self.client.get(url, headers=headers), 206)
+            assert len(response.content) == chunk
+
+        return measure(operation, self.args.iterations, self.args.warmup,
+                       self.args.concurrency, bytes_per_op=chunk)
+
+    def login_under_file_traffic(self) -> dict:
+        """
+        Логины (bcrypt) параллельно с листингами и скачиваниями: кроме
+        задержки логина, в результате — сколько файловых запросов в секунду
+        успевало пройти за это время.
+        """
+        credentials = {"email": "bench-login@example.com", "password": "bench-password"}
+        response = self.client.post("/auth/register", json=credentials)
+        if response.status_code != 400:
+            expect(response, 201)
+        url = self._download_target()
+        headers = self.headers[0]
+        stop = threading.Event()
+        served = [0] * FILE_TRAFFIC_THREADS
+        errors = []
+
+        def traffic(n):
+            try:
+                while not stop.is_set():
+                    expect(self.client.get("/files/?limit=200", headers=headers))
+                    expect(self.client.get(url, headers={**headers, "Range": "bytes=0-65535"}), 206)
+                    served[n] += 2
+            except Exception as exc:
+                errors.append(exc)
+
+        def operation(i):
+            expect(self.client.post("/auth/login", json=credentials))
+
+        threads = [threading.Thread(target=traffic, args=(n,)) for n in range(FILE_TRAFFIC_THREADS)]
+        for thread in threads:
+            thread.start()
+        start = time.perf_counter()
+        try:
+            result = measure(operation, self.args.iterations, self.args.warmup,
+                             max(self.args.concurrency, 4))
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+        result["file_requests_per_sec"] = round(sum(served) / (time.perf_counter() - start), 2)
+        return result
+
+    def unpack_zip(self) -> dict:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for n in range(self.args.zip_files):
+                archive.writestr(f"docs/{n % 20}/file-{n}.txt", f"entry {n}\n" * 50)
+        data = buffer.getvalue()
+        iterations = max(self.args.iterations // 10, 3)
+        # распаковка в уже заполненную папку ничего не делает — у каждой
+        # итерации свой пользователь и свой загруженный архив
+        targets = []
+        for n in range(iterations + 1):
+            user = self.users[n % len(self.users)]
+            headers = self.headers[n % len(self.users)]
+            name = f"archive-{n}.zip"
+            expect(self.client.post(
+                "/files/upload", headers=headers,
+                files={"file": (name, data, "application/zip")},
+            ), 201)
+            targets.append((headers, name))
+
+        def operation(i):
+            headers, name = targets[i + 1 if i >= 0 else 0]
+            job = expect(self.client.post(
+                "/jobs/unpack", headers=headers, json={"path": name}
+            ), 202).json()
+            while job["status"] in ("queued", "running"):
+                time.sleep(0.005)
+                job = expect(self.client.get(f"/jobs/{job['id']}", headers=headers)).json()
+            if job["status"] != "succeeded":
+                raise RuntimeError(f"unpack job {job['status']}: {job.get('error')}")
+
+        return measure(operation, iterations, 1)
+
+
+BENCHMARKS = [
+    "list_dir_root",
+    "list_dir_deep",
+    "list_dir_busiest_by_size",
+    "search_substring",
+    "search_glob",
+    "changes_unchanged",
+    "files_stats",
+    "users_list",
+    "upload_file",
+    "download_file",
+    "download_range",
+    "unpack_zip",
+    "login_under_file_traffic",
+]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Сравнивает медианы с прошлым прогоном. Возвращает список регрессий.
+    """
+    if baseline["meta"]["params"] != results["meta"]["params"]:
+        print("warning: baseline was recorded with different parameters", file=sys.stderr)
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        change = current["median_ms"] / previous["median_ms"] - 1
+        line = (
+            f"{name:28} {previous['median_ms']:10.3f} ms -> {current['median_ms']:10.3f} ms"
+            f"  {change:+.1%}"
+        )
+        if change > threshold:
+            line += "  REGRESSION"
+            regressions.append(name)
+        print(line, file=sys.stderr)
+    return regressions
+
+
+def main() -> int:
+    args = parse_args()
+    # пути — до смены рабочей папки
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    workdir = tempfile.mkdtemp(prefix="storage-bench-")
+    configure_environment(args, workdir)
+
+    from fastapi.testclient import TestClient
+
+    from auth.jwt import create_access_token
+    from database import Base, SessionLocal, engine
+
+    if args.database_url and engine.url.get_backend_name() != "sqlite":
+        if not args.reset_database:
+            print("refusing to use a non-SQLite database without --reset-database",
+                  file=sys.stderr)
+            return 2
+    # импорт приложения создаёт недостающие таблицы
+    import main as app_module
+
+    if args.reset_database:
+        from crud.search import ensure_search_index
+
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        ensure_search_index(engine)
+
+    from seed import SeedParams, seed_database
+
+    params = SeedParams(args.users, args.files, args.dirs, args.depth)
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        users = seed_database(db, params)
+    finally:
+        db.close()
+    print(f"seeded {args.users} users x {args.files} files in "
+          f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    headers = [{"Authorization": f"Bearer {create_access_token(u.email)}"} for u in users]
+    selected = args.only or BENCHMARKS
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        print(f"unknown benchmarks: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    results = {}
+    with TestClient(app_module.app) as client:
+        bench = Benchmarks(args, client, users, headers)
+        for name in BENCHMARKS:
+            if name not in selected:
+                continue
+            results[name] = getattr(bench, name)()
+            print(f"{name:28} median {results[name]['median_ms']:10.3f} ms", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.url.get_backend_name(),
+            "params": {
+                **asdict(params),
+                "iterations": args.iterations,
+                "concurrency": args.concurrency,
+                "transfer_size_mb": args.transfer_size,
+                "zip_files": args.zip_files,
+            },
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"regressions: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# benchmarks/seed.py
+"""
+Наполнение БД для бенчмарков: пользователи, дерево папок и файлы.
+
+Строки вставляются пачками в обход ORM — сидинг 100 000 файлов занимает
+секунды. Файлы ссылаются на небольшой набор blob-записей без данных на
+диске: листингу и статистике содержимое не нужно, а сценарии скачивания
+загружают свои файлы через API.
+"""
+
+import hashlib
+import posixpath
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from crud.usage import rebuild_usage
+from models.blob import Blob
+from models.directory import Directory
+from models.file import File
+from models.user import User
+
+INSERT_BATCH = 5_000
+SEED_BLOBS = 256
+
+
+@dataclass
+class SeedParams:
+    users: int
+    files: int  # на пользователя
+    dirs: int  # на пользователя
+    depth: int
+
+
+@dataclass
+class SeededUser:
+    id: int
+    email: str
+    # папки для листинга: корень, самая глубокая и самая наполненная
+    root: str
+    deepest: str
+    busiest: str
+
+
+def _directory_paths(user_prefix: str, dirs: int, depth: int) -> list[str]:
+    """
+    Цепочки вложенных папок длины depth: c0, c0/l1, c0/l1/l2, …, c1, …
+    Возвращает dirs путей, родители — раньше детей.
+    """
+    paths = []
+    for k in range(dirs):
+        chain, level = divmod(k, depth)
+        path = f"{user_prefix}/c{chain}" + "".join(f"/l{j}" for j in range(1, level + 1))
+        paths.append(path)
+    return paths
+
+
+def _batched(rows: list[dict]):
+    for start in range(0, len(rows), INSERT_BATCH):
+        yield rows[start:start + INSERT_BATCH]
+
+
+def seed_database(db: Session, params: SeedParams) -> list[SeededUser]:
+    now = datetime.now(timezone.utc)
+    blobs = []
+    for n in range(SEED_BLOBS):
+        size = 1024 * (1 + n % 64)
+        blobs.append({
+            "sha256": hashlib.sha256(f"seed-{n}".encode()).hexdigest(),
+            "size": size,
+            "stored_size": size,
+            "refcount": 0,
+        })
+
+    # blob'ы — первыми: на них ссылается внешний ключ files.checksum
+    db.execute(insert(Blob), blobs)
+
+    seeded = []
+    refcounts = [0] * SEED_BLOBS
+    for u in range(params.users):
+        email = f"bench{u}@example.com"
+        user = User(email=email, hashed_password="!")
+        db.add(user)
+        db.flush()
+        prefix = f"user_{user.id}"
+
+        dir_paths = _directory_paths(prefix, params.dirs, params.depth)
+        for batch in _batched([
+            {
+                "path": path,
+                "parent": posixpath.dirname(path),
+                "owner_id": user.id,
+                "created_at": now,
+            }
+            for path in dir_paths
+        ]):
+            db.execute(insert(Directory), batch)
+
+        # файл j — в папку j % (dirs + 1); последний «слот» — корень
+        folders = dir_paths + [prefix]
+        rows = []
+        for j in range(params.files):
+            folder = folders[j % len(folders)]
+            blob = (u * params.files + j) % SEED_BLOBS
+            refcounts[blob] += 1
+            name = f"{folder}/f{j:07d}.txt"
+            rows.append({
+                "filename": name,
+                "parent": folder,
+                "owner_id": user.id,
+                "checksum": blobs[blob]["sha256"],
+                "size": blobs[blob]["size"],
+                "mime_type": "text/plain",
+                "uploaded_at": now - timedelta(seconds=j),
+            })
+        for batch in _batched(rows):
+            db.execute(insert(File), batch)
+
+        counts: dict[str, int] = {}
+        for row in rows:
+            counts[row["parent"]] = counts.get(row["parent"], 0) + 1
+        seeded.append(SeededUser(
+            id=user.id,
+            email=email,
+            root="",
+            deepest=dir_paths[min(params.depth, len(dir_paths)) - 1][len(prefix) + 1:]
+            if dir_paths else "",
+            busiest=max(counts, key=counts.get)[len(prefix) + 1:] if counts else "",
+        ))
+
+    db.execute(
+        update(Blob.__table__)
+        .where(Blob.sha256 == bindparam("sha"))
+        .values(refcount=bindparam("refcount")),
+        [{"sha": blob["sha256"], "refcount": n} for blob, n in zip(blobs, refcounts)],
+    )
+    db.commit()
+    rebuild_usage(db)
+    return seeded
@@ -4,6 +4,9 @@
   let userId = null;
   let userPrefix = "";
 
+  // файлы, для которых сервер умеет рисовать превью
+  const PREVIEW_EXT = /\.(jpe?g|png|gif|webp|bmp|tiff?|pdf)$/i;
+
   function getToken() {
     return localStorage.getItem("token");
   }
@@ -172,11 +175,20 @@
   async function refreshList(container) {
     container.innerHTML = "";
     try {
-      const res = await fetch(`${API}/files/`, {
-        headers: authHeaders()
-      });
-      if (!res.ok) throw new Error("Не удалось получить список");
-      const { files } = await res.json();
+      // листинг постраничный — идём по next_cursor до конца
+      const files = [];
+      let cursor = null;
+      do {
+        const url = new URL(`${API}/files/`);
+        if (cursor) url.searchParams.set("cursor", cursor);
+        const res = await fetch(url, {
+          headers: authHeaders()
+        });
+        if (!res.ok) throw new Error("Не удалось получить список");
+        const page = await res.json();
+        files.push(...page.files);
+        cursor = page.next_cursor;
+      } while (cursor);
 
       files.forEach(name => {
         const fullPath = `${userPrefix}/${name}`;
@@ -203,6 +215,7 @@
         btnDel.onclick = () => deleteFile(fullPath, container);
 
         acts.append(btnDl, btnPub, btnDel);
+        if (PREVIEW_EXT.test(name)) li.append(createPreview(fullPath));
         li.append(nm, acts);
         container.appendChild(li);
       });
@@ -226,6 +239,27 @@
     }
   }
 
+  // Миниатюра: img не умеет слать Authorization, поэтому грузим через fetch
+  function createPreview(fullPath) {
+    const img = document.createElement("img");
+    img.className = "file-thumb";
+    img.alt = "";
+    fetch(
+      `${API}/files/preview/${encodeURIComponent(fullPath)}?size=small`,
+      { headers: authHeaders() }
+    )
+      .then(res => {
+        if (!res.ok) throw new Error();
+        return res.blob();
+      })
+      .then(blob => {
+        img.src = URL.createObjectURL(blob);
+        img.onload = () => URL.revokeObjectURL(img.src);
+      })
+      .catch(() => img.remove());
+    return img;
+  }
+
   // Скачивание
   async function downloadFile(fullPath) {
     try {
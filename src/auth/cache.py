@@ -0,0 +1,261 @@
+# src/auth/cache.py
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from core.config import settings
+from services.metrics import AUTH_CACHE_LOOKUPS
+from utils.redis_clients import redis_clients
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    Личность пользователя, проверенная по JWT. Лёгкий неизменяемый объект
+    вместо ORM-модели: его можно кешировать и разделять между запросами.
+    """
+    id: int
+    email: str
+
+
+class InMemoryBackend:
+    """
+    TTL + LRU кеш в памяти процесса. Быстрый, но у каждого воркера свой —
+    инвалидация видна только в том процессе, где она произошла.
+    a-методы — те же синхронные: они не ждут ничего, кроме лока.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, AuthenticatedUser]] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> AuthenticatedUser | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key: str, user: AuthenticatedUser, ttl: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, user)
+            self._keys_by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._drop(key)
+
+    async def aget(self, key: str) -> AuthenticatedUser | None:
+        return self.get(key)
+
+    async def aset(self, key: str, user: AuthenticatedUser, ttl: float) -> None:
+        self.set(key, user, ttl)
+
+    async def ainvalidate_user(self, user_id: int) -> None:
+        self.invalidate_user(user_id)
+
+    def _drop(self, key: str) -> None:
+        _, user = self._entries.pop(key)
+        keys = self._keys_by_user.get(user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user.id]
+
+
+class RedisBackend:
+    """
+    Общий для всех воркеров кеш в Redis: инвалидация после смены email,
+    пароля или удаления пользователя сразу видна везде. Из event loop —
+    a-методы через асинхронный клиент.
+    """
+
+    def __init__(self, url: str, prefix: str = "auth:"):
+        self._redis, self._aredis = redis_clients(url, "AUTH_CACHE_BACKEND")
+        self._prefix = prefix
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self._prefix}user:{user_id}"
+
+    def _set_commands(self, pipe, key: str, user: AuthenticatedUser, ttl: float) -> None:
+        user_key = self._user_key(user.id)
+        payload = json.dumps({"id": user.id, "email": user.email})
+        pipe.set(self._prefix + key, payload, ex=max(int(ttl), 1))
+        pipe.sadd(user_key, key)
+        # индекс живёт, пока жив самый долгий из его токенов: срок только
+        # продлеваем (NX — новому множеству, GT — уже существующему; Redis 7+)
+        pipe.expire(user_key, max(int(ttl), 1), nx=True)
+        pipe.expire(user_key, max(int(ttl), 1), gt=True)
+
+    @staticmethod
+    def _load(raw) -> AuthenticatedUser | None:
+        if raw is None:
+            return None
+        return AuthenticatedUser(**json.loads(raw))
+
+    def get(self, key: str) -> AuthenticatedUser | None:
+        return self._load(self._redis.get(self._prefix + key))
+
+    async def aget(self, key: str) -> AuthenticatedUser | None:
+        return self._load(await self._aredis.get(self._prefix + key))
+
+    def set(self, key: str, user: AuthenticatedUser, ttl: float) -> None:
+        pipe = self._redis.pipeline()
+        self._set_commands(pipe, key, user, ttl)
+        pipe.execute()
+
+    async def aset(self, key: str, user: AuthenticatedUser, ttl: float) -> None:
+        pipe = self._aredis.pipeline()
+        self._set_commands(pipe, key, user, ttl)
+        await pipe.execute()
+
+    def invalidate_user(self, user_id: int) -> None:
+        user_key = self._user_key(user_id)
+        keys = self._redis.smembers(user_key)
+        pipe = self._redis.pipeline()
+        for key in keys:
+            pipe.delete(self._prefix + key.decode())
+        pipe.delete(user_key)
+        pipe.execute()
+
+    async def ainvalidate_user(self, user_id: int) -> None:
+        user_key = self._user_key(user_id)
+        keys = await self._aredis.smembers(user_key)
+        pipe = self._aredis.pipeline()
+        for key in keys:
+            pipe.delete(self._prefix + key.decode())
+        pipe.delete(user_key)
+        await pipe.execute()
+
+
+class TokenCache:
+    """
+    Кеш «проверенный токен → пользователь» со счётчиками попаданий.
+    Ключ — SHA-256 токена, сами токены нигде не хранятся. Ошибки
+    бэкенда не ломают аутентификацию: запрос просто идёт в БД.
+    Синхронные методы — для кода в пуле потоков, a-методы — для event loop.
+    """
+
+    def __init__(self, backend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _count(self, user: AuthenticatedUser | None) -> AuthenticatedUser | None:
+        if user is None:
+            self.misses += 1
+            AUTH_CACHE_LOOKUPS.labels("miss").inc()
+        else:
+            self.hits += 1
+            AUTH_CACHE_LOOKUPS.labels("hit").inc()
+        return user
+
+    def _ttl(self, expires_at: float | None) -> float:
+        # не дольше, чем живёт сам токен
+        ttl = self.ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        return ttl
+
+    def get(self, token: str) -> AuthenticatedUser | None:
+        if self.backend is None:
+            return None
+        try:
+            user = self.backend.get(self._key(token))
+        except Exception:
+            user = None
+        return self._count(user)
+
+    async def aget(self, token: str) -> AuthenticatedUser | None:
+        if self.backend is None:
+            return None
+        try:
+            user = await self.backend.aget(self._key(token))
+        except Exception:
+            user = None
+        return self._count(user)
+
+    def set(self, token: str, user: AuthenticatedUser, expires_at: float | None = None) -> None:
+        """
+        Кладёт пользователя в кеш не дольше, чем живёт сам токен.
+        """
+        ttl = self._ttl(expires_at)
+        if self.backend is None or ttl <= 0:
+            return
+        try:
+            self.backend.set(self._key(token), user, ttl)
+        except Exception:
+            pass
+
+    async def aset(self, token: str, user: AuthenticatedUser, expires_at: float | None = None) -> None:
+        ttl = self._ttl(expires_at)
+        if self.backend is None or ttl <= 0:
+            return
+        try:
+            await self.backend.aset(self._key(token), user, ttl)
+        except Exception:
+            pass
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Сбрасывает все закешированные токены пользователя. Изменение в БД к
+        этому моменту уже зафиксировано, поэтому ошибка бэкенда только
+        пишется в лог: старые записи доживут до своего TTL.
+        """
+        if self.backend is None:
+            return
+        try:
+            self.backend.invalidate_user(user_id)
+        except Exception:
+            logger.exception("Token cache invalidation failed for user %s", user_id)
+
+    async def ainvalidate_user(self, user_id: int) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self.backend.ainvalidate_user(user_id)
+        except Exception:
+            logger.exception("Token cache invalidation failed for user %s", user_id)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def build_token_cache() -> TokenCache:
+    backend_name = settings.AUTH_CACHE_BACKEND
+    if backend_name == "memory":
+        backend = InMemoryBackend(settings.AUTH_CACHE_MAX_ENTRIES)
+    elif backend_name == "redis":
+        backend = RedisBackend(settings.REDIS_URL)
+    elif backend_name == "none":
+        backend = None
+    else:
+        raise ValueError(f"Unknown AUTH_CACHE_BACKEND: {backend_name}")
+    return TokenCache(backend, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+token_cache = build_token_cache()
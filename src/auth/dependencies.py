@@ -1,20 +1,23 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
 from core.config import settings
-from database import get_db
+from database import AsyncSessionLocal
 from models.user import User
+from auth.cache import AuthenticatedUser, token_cache
+from services.rate_limit import rate_limiter, user_subject
 
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+) -> AuthenticatedUser:
+    # async-зависимость: попадание в кеш обслуживается прямо в event loop,
+    # без прыжков в пул потоков и без соединения с БД
     if credentials is None or credentials.scheme.lower() != "bearer":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -22,6 +25,11 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     token = credentials.credentials
+    # уже проверенный токен: ни разбора JWT, ни запроса в БД
+    cached = await token_cache.aget(token)
+    if cached is not None:
+        await rate_limiter.acheck_request(user_subject(cached.id))
+        return cached
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         email: str = payload.get("sub")
@@ -29,7 +37,12 @@ def get_current_user(
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.id, User.email).where(User.email == email))
+        row = result.first()
+    if row is None:
         raise HTTPException(status_code=401, detail="User not found")
+    user = AuthenticatedUser(id=row.id, email=row.email)
+    await token_cache.aset(token, user, expires_at=payload.get("exp"))
+    await rate_limiter.acheck_request(user_subject(user.id))
     return user
@@ -0,0 +1,46 @@
+# src/auth/password_hashing.py
+"""
+bcrypt-хеширование паролей. Функции выполняются в дочерних процессах
+пула (см. auth.passwords), поэтому модуль не импортирует ничего из
+приложения; стоимость (rounds) передаётся аргументом.
+"""
+
+from passlib.context import CryptContext
+
+_contexts: dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    context = _contexts.get(rounds)
+    if context is None:
+        # хеш с другой стоимостью — в любую сторону — считается устаревшим:
+        # verify_and_update вернёт новый
+        context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        _contexts[rounds] = context
+    return context
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_password(password: str, hashed: str | None, rounds: int) -> tuple[bool, str | None]:
+    """
+    (пароль верен, новый хеш или None). Новый хеш возвращается, если
+    сохранённый посчитан с другой стоимостью. Без хеша (пользователя нет)
+    проверка всё равно тратит то же время — ответ не выдаёт, существует
+    ли такой email.
+    """
+    context = _context(rounds)
+    # не bcrypt-хеш (например, "!" у заблокированной учётной записи) — как
+    # неверный пароль; ошибки самого bcrypt при этом не маскируются под 401
+    if not hashed or context.identify(hashed) is None:
+        context.dummy_verify()
+        return False, None
+    return context.verify_and_update(password, hashed)
@@ -0,0 +1,79 @@
+# src/auth/passwords.py
+"""
+Хеширование и проверка паролей в отдельном пуле процессов.
+
+bcrypt намеренно медленный (десятки миллисекунд процессора на вызов),
+поэтому всплеск логинов в пуле потоков занял бы все потоки и остановил
+скачивания и листинги. Здесь он считается в PASSWORD_HASH_WORKERS
+процессах, а запросов в очереди к ним не больше PASSWORD_HASH_MAX_PENDING:
+сверх этого — 503 с Retry-After, а не растущая очередь.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from auth import password_hashing
+from core.config import settings
+from utils.errors import AppError
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_pending = 0
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, а не fork: родитель многопоточный (пул Starlette, asyncio)
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_password_hashing() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def _run(func, *args):
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_PENDING:
+        raise AppError(
+            "Too many sign-ins in progress, try again later",
+            status_code=503,
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+        )
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_get_executor(), func, *args)
+        except BrokenProcessPool:
+            # процесс пула упал — пересоздадим пул при следующем вызове
+            shutdown_password_hashing()
+            raise AppError("Password worker failed, try again later", status_code=503)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(password_hashing.hash_password, password, settings.BCRYPT_ROUNDS)
+
+
+async def verify_password(password: str, hashed: str | None) -> tuple[bool, str | None]:
+    """
+    (пароль верен, новый хеш с текущей BCRYPT_ROUNDS или None) —
+    новый хеш нужно сохранить вместо старого.
+    """
+    return await _run(
+        password_hashing.verify_password, password, hashed, settings.BCRYPT_ROUNDS
+    )
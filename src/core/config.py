@@ -6,9 +6,159 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Пул соединений с БД (общие настройки для sync- и async-движка)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 30 * 60
+    # 0 — без ограничения; применяется только к PostgreSQL
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Хранилище содержимого файлов: "local" (диск), "s3" (S3-совместимое)
+    # или "memory" (заглушка S3 в памяти процесса — для разработки и тестов)
+    STORAGE_BACKEND: str = "local"
+    # Локальная папка: данные local-хранилища, временные файлы загрузок
+    # и старые файлы без checksum
+    UPLOAD_ROOT: str = "uploads"
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""
+    S3_ENDPOINT_URL: str | None = None
+    S3_REGION: str | None = None
+    S3_ACCESS_KEY_ID: str | None = None
+    S3_SECRET_ACCESS_KEY: str | None = None
+    # размер части multipart upload (не меньше 5 МиБ)
+    S3_PART_SIZE: int = 8 * 1024 * 1024
+
+    # Сжатие при хранении: "gzip", "zstd" (нужен пакет zstandard) или "none"
+    COMPRESSION_ALGORITHM: str = "gzip"
+    COMPRESSION_MIN_SIZE: int = 4 * 1024
+    # сжимаем, только если выборка сжалась хотя бы на эту долю
+    COMPRESSION_MIN_SAVINGS: float = 0.1
+    COMPRESSION_SAMPLE_SIZE: int = 96 * 1024
+
+    # Превью изображений и первой страницы PDF: нужен пакет Pillow,
+    # для PDF — ещё pypdfium2. Рисуются в пуле из PREVIEW_WORKERS процессов
+    PREVIEW_WORKERS: int = 2
+    # сколько превью может ждать свободного процесса, дальше — 503
+    PREVIEW_MAX_PENDING: int = 32
+    PREVIEW_MAX_SOURCE_SIZE: int = 64 * 1024 * 1024
+    PREVIEW_MAX_PIXELS: int = 64_000_000
+    # бюджет кеша превью на диске; сверх него удаляются давно не запрошенные
+    PREVIEW_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # Квота на суммарный размер файлов пользователя, если у него не задана
+    # своя (users.quota_bytes); 0 — без ограничения
+    USER_QUOTA_BYTES: int = 0
+
+    # Сборщик blob'ов: данные содержимого, на которое никто не ссылается
+    # дольше BLOB_GC_GRACE_SECONDS, стираются раз в BLOB_GC_INTERVAL_SECONDS
+    BLOB_GC_GRACE_SECONDS: int = 60 * 60
+    BLOB_GC_INTERVAL_SECONDS: int = 10 * 60
+
+    # Сессии возобновляемой загрузки (chunked upload)
+    UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_MAX_CHUNK_SIZE: int = 64 * 1024 * 1024
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 60 * 60
+    UPLOAD_SESSION_PURGE_INTERVAL_SECONDS: int = 10 * 60
+
+    # Ограничения на распаковку ZIP-архивов (защита от zip-бомб)
+    ARCHIVE_MAX_ENTRIES: int = 100_000
+    ARCHIVE_MAX_TOTAL_SIZE: int = 20 * 1024 * 1024 * 1024
+    # во сколько раз распакованные данные могут превышать сжатые
+    ARCHIVE_MAX_COMPRESSION_RATIO: int = 200
+
+    # Пакетные операции над файлами (POST /files/batch)
+    BATCH_MAX_OPERATIONS: int = 10_000
+    # сколько потоков удаляют/переносят данные на диске после коммита
+    BATCH_FS_WORKERS: int = 8
+
+    # Фоновые задачи (распаковка архивов): очередь — таблица jobs,
+    # каждый процесс приложения запускает JOB_WORKERS потоков (0 — не запускать)
+    JOB_WORKERS: int = 2
+    # сколько задач одного пользователя могут выполняться одновременно
+    JOB_USER_CONCURRENCY: int = 1
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_HEARTBEAT_SECONDS: float = 2.0
+    # задача без heartbeat дольше этого — её процесс упал, задача вернётся в очередь
+    JOB_STALE_SECONDS: int = 60
+    JOB_MAX_ATTEMPTS: int = 3
+    # пауза перед повтором после ошибки; удваивается с каждой попыткой
+    JOB_RETRY_DELAY_SECONDS: int = 30
+    JOB_MAINTENANCE_INTERVAL_SECONDS: int = 60
+    # сколько хранить завершённые задачи
+    JOB_RETENTION_SECONDS: int = 7 * 24 * 60 * 60
+    JOB_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # Поиск по путям (GET /files/search): сколько найденных индексом строк
+    # проверяет один запрос; сверх этого страница может выйти неполной,
+    # next_cursor продолжит с места остановки
+    SEARCH_MAX_SCANNED_ROWS: int = 20_000
+
+    # Лента изменений (GET /changes): сколько хранится журнал, дольше какого
+    # срока может ждать long-poll запрос и как часто он перепроверяет журнал
+    # (изменения из других процессов видны не позже чем через этот интервал)
+    CHANGES_RETENTION_SECONDS: int = 30 * 24 * 60 * 60
+    CHANGES_PURGE_INTERVAL_SECONDS: int = 60 * 60
+    CHANGES_MAX_WAIT_SECONDS: float = 60.0
+    CHANGES_RECHECK_SECONDS: float = 2.0
+
+    # Метрики Prometheus на GET /metrics; при нескольких воркерах задайте
+    # переменную окружения PROMETHEUS_MULTIPROC_DIR (общая пустая папка).
+    # Скрейпер передаёт METRICS_TOKEN в заголовке Authorization: Bearer …;
+    # пока токен не задан, /metrics отвечает 404
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""
+
+    # Пароли: стоимость bcrypt (хеши с другой пересчитываются при входе),
+    # сколько процессов считают хеши и сколько запросов может ждать их,
+    # дальше — 503 с Retry-After
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+
+    # Кеш аутентификации: "memory" (в процессе), "redis" (общий для воркеров) или "none"
+    AUTH_CACHE_BACKEND: str = "memory"
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # таймауты Redis: при зависшем Redis запрос ждёт не дольше, после чего
+    # идёт мимо кеша и без лимитов
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 0.5
+
+    # Ограничение скорости (token bucket) по пользователю и по публичной
+    # ссылке: "memory" (свои корзины у каждого процесса), "redis" (общие
+    # для всех воркеров, REDIS_URL) или "none". 0 — лимит выключен
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REQUESTS_PER_SECOND: float = 50.0
+    RATE_LIMIT_REQUEST_BURST: int = 200
+    RATE_LIMIT_DOWNLOAD_BYTES_PER_SECOND: int = 50 * 1024 * 1024
+    RATE_LIMIT_UPLOAD_BYTES_PER_SECOND: int = 50 * 1024 * 1024
+    # сколько байт можно передать разом, прежде чем скорость начнёт ограничиваться
+    RATE_LIMIT_BYTES_BURST: int = 16 * 1024 * 1024
+    RATE_LIMIT_PUBLIC_REQUESTS_PER_SECOND: float = 5.0
+    RATE_LIMIT_PUBLIC_REQUEST_BURST: int = 20
+    RATE_LIMIT_PUBLIC_DOWNLOAD_BYTES_PER_SECOND: int = 20 * 1024 * 1024
+    # для "memory": сверх этого забываются давно не использованные корзины
+    RATE_LIMIT_MAX_BUCKETS: int = 100_000
+
+    # Сколько секунд прокси/CDN могут кешировать файлы публичных ссылок
+    PUBLIC_LINK_CACHE_MAX_AGE: int = 60 * 60
+    # Публичные ссылки: адрес, с которого их открывают клиенты, ключ подписи
+    # (пусто — производный от SECRET_KEY) и срок действия
+    PUBLIC_BASE_URL: str = "http://localhost:8002"
+    PUBLIC_LINK_SECRET: str = ""
+    PUBLIC_LINK_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    PUBLIC_LINK_MAX_TTL_SECONDS: int = 90 * 24 * 60 * 60
+    # как часто процесс перечитывает список отзыва и сбрасывает счётчики скачиваний
+    PUBLIC_LINK_SYNC_SECONDS: int = 10
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
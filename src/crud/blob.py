@@ -0,0 +1,186 @@
+# src/crud/blob.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, case, update, delete
+from sqlalchemy.orm import Session
+from models.blob import Blob
+from utils.db import dialect_insert
+
+
+def get_blob(db: Session, sha256: str) -> Blob | None:
+    return db.query(Blob).filter(Blob.sha256 == sha256).first()
+
+
+def add_blob_ref(
+    db: Session,
+    sha256: str,
+    size: int,
+    encoding: str | None = None,
+    stored_size: int | None = None,
+) -> None:
+    """
+    Увеличивает refcount blob'а, создавая запись при первом упоминании.
+    Атомарный upsert: параллельные загрузки одинакового содержимого
+    не конфликтуют. encoding/stored_size записываются для нового blob'а
+    и для blob'а без ссылок: его данные, возможно, уже стирает сборщик,
+    и вызывающий код должен записать их заново. У blob'а со ссылками
+    остаются его данные. Коммит — за вызывающим кодом.
+    """
+    table = Blob.__table__
+    stmt = dialect_insert(db, table).values(
+        sha256=sha256, size=size, refcount=1, encoding=encoding, stored_size=stored_size
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.sha256],
+        set_=_revive(table, stmt, {"refcount": table.c.refcount + 1}),
+    )
+    db.execute(stmt)
+
+
+def _revive(table, stmt, values: dict) -> dict:
+    """
+    SET для upsert ссылки: снимает отметку сборщика, а у blob'а без
+    ссылок заменяет описание данных на описание новых.
+    """
+    orphaned = table.c.refcount <= 0
+    return {
+        **values,
+        "orphaned_at": None,
+        "encoding": case((orphaned, stmt.excluded.encoding), else_=table.c.encoding),
+        "stored_size": case((orphaned, stmt.excluded.stored_size), else_=table.c.stored_size),
+    }
+
+
+def add_existing_blob_ref(db: Session, sha256: str) -> Blob | None:
+    """
+    Увеличивает refcount, только если на blob уже ссылаются другие файлы
+    (данные blob'а без ссылок может в этот момент стирать сборщик).
+    Возвращает blob или None.
+    """
+    result = db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256, Blob.refcount > 0)
+        .values(refcount=Blob.refcount + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return None
+    return get_blob(db, sha256)
+
+
+def release_blob_ref(db: Session, sha256: str) -> None:
+    """
+    Уменьшает refcount; когда ссылок не осталось, отмечает время —
+    данные сотрёт сборщик, если blob так и останется ненужным.
+    Коммит — за вызывающим кодом.
+    """
+    db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256)
+        .values(
+            refcount=Blob.refcount - 1,
+            orphaned_at=case(
+                (Blob.refcount <= 1, datetime.now(timezone.utc)), else_=Blob.orphaned_at
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def add_blob_refs(db: Session, refs: dict[str, tuple[int, int]]) -> None:
+    """
+    Пакетный вариант add_blob_ref: refs = {sha256: (size, count)}.
+    Один upsert на все blob'ы (executemany). Коммит — за вызывающим кодом.
+    """
+    if not refs:
+        return
+    table = Blob.__table__
+    stmt = dialect_insert(db, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.sha256],
+        set_=_revive(table, stmt, {"refcount": table.c.refcount + stmt.excluded.refcount}),
+    )
+    db.execute(
+        stmt,
+        [
+            {
+                "sha256": sha256,
+                "size": size,
+                "refcount": count,
+                "encoding": None,
+                "stored_size": None,
+            }
+            for sha256, (size, count) in refs.items()
+        ],
+    )
+
+
+def release_blob_refs(db: Session, refs: dict[str, int]) -> None:
+    """
+    Пакетный вариант release_blob_ref: refs = {sha256: сколько ссылок снять}.
+    Коммит — за вызывающим кодом.
+    """
+    if not refs:
+        return
+    table = Blob.__table__
+    db.execute(
+        update(table)
+        .where(table.c.sha256 == bindparam("b_sha256"))
+        .values(
+            refcount=table.c.refcount - bindparam("b_count"),
+            orphaned_at=case(
+                (table.c.refcount <= bindparam("b_count"), datetime.now(timezone.utc)),
+                else_=table.c.orphaned_at,
+            ),
+        ),
+        [{"b_sha256": sha256, "b_count": count} for sha256, count in refs.items()],
+    )
+
+
+def list_orphaned_blobs(db: Session, older_than: datetime, limit: int = 500) -> list[str]:
+    """
+    Хеши blob'ов, на которые никто не ссылается с момента раньше older_than.
+    """
+    rows = (
+        db.query(Blob.sha256)
+        .filter(Blob.refcount <= 0, Blob.orphaned_at < older_than)
+        .order_by(Blob.orphaned_at)
+        .limit(limit)
+    )
+    return [sha256 for (sha256,) in rows]
+
+
+def delete_orphaned_blob(db: Session, sha256: str, older_than: datetime) -> bool:
+    """
+    Удаляет запись blob'а, если на него по-прежнему никто не ссылается
+    с момента раньше older_than. До коммита строка заблокирована: новая
+    ссылка на это содержимое дождётся его и создаст запись заново.
+    Коммит — за вызывающим кодом.
+    """
+    result = db.execute(
+        delete(Blob)
+        .where(Blob.sha256 == sha256, Blob.refcount <= 0, Blob.orphaned_at < older_than)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def get_stored_sizes(db: Session, sha256s: list[str]) -> dict[str, int]:
+    """
+    {sha256: байт в хранилище} для перечисленных blob'ов.
+    """
+    if not sha256s:
+        return {}
+    rows = db.query(Blob.sha256, Blob.size, Blob.stored_size).filter(Blob.sha256.in_(sha256s))
+    return {sha256: stored if stored is not None else size for sha256, size, stored in rows}
+
+
+def get_blob_encodings(db: Session, sha256s: list[str]) -> dict[str, str | None]:
+    """
+    {sha256: сжатие данных в хранилище} для перечисленных blob'ов.
+    """
+    if not sha256s:
+        return {}
+    rows = db.query(Blob.sha256, Blob.encoding).filter(Blob.sha256.in_(sha256s))
+    return {sha256: encoding for sha256, encoding in rows}
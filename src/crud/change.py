@@ -0,0 +1,135 @@
+# src/crud/change.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from models.change import Change, ChangeSequence
+from utils.db import dialect_insert
+
+# ключ в session.info: чьи журналы изменились в текущей транзакции
+# (после коммита services.changes будит их long-poll запросы)
+CHANGED_OWNERS = "changed_owners"
+
+
+def _allocate_seqs(db: Session, owner_id: int, count: int) -> int:
+    """
+    Резервирует count номеров подряд и возвращает последний. Upsert
+    блокирует строку счётчика до конца транзакции.
+    """
+    table = ChangeSequence.__table__
+    stmt = dialect_insert(db, table).values(user_id=owner_id, last_seq=count)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={"last_seq": table.c.last_seq + count},
+    ).returning(table.c.last_seq)
+    return db.execute(stmt).scalar_one()
+
+
+def record_changes(db: Session, owner_id: int, changes: list[dict]) -> None:
+    """
+    Добавляет изменения пользователя в журнал с очередными номерами.
+    changes — словари с ключами op, kind, path и, если есть, old_path,
+    size, checksum. Коммит — за вызывающим кодом, чтобы журнал писался
+    в одной транзакции с самим изменением.
+    """
+    if not changes:
+        return
+    last = _allocate_seqs(db, owner_id, len(changes))
+    first = last - len(changes) + 1
+    now = datetime.now(timezone.utc)
+    db.execute(
+        insert(Change),
+        [
+            {
+                "owner_id": owner_id,
+                "seq": first + n,
+                "old_path": None,
+                "size": None,
+                "checksum": None,
+                "created_at": now,
+                **change,
+            }
+            for n, change in enumerate(changes)
+        ],
+    )
+    db.info.setdefault(CHANGED_OWNERS, set()).add(owner_id)
+
+
+def record_change(
+    db: Session,
+    owner_id: int,
+    op: str,
+    kind: str,
+    path: str,
+    old_path: str | None = None,
+    size: int | None = None,
+    checksum: str | None = None,
+) -> None:
+    record_changes(db, owner_id, [{
+        "op": op,
+        "kind": kind,
+        "path": path,
+        "old_path": old_path,
+        "size": size,
+        "checksum": checksum,
+    }])
+
+
+def list_changes(db: Session, owner_id: int, after_seq: int, limit: int) -> list:
+    """
+    Изменения с номерами больше after_seq по порядку — лёгкие строки
+    (seq, op, kind, path, old_path, size, checksum, created_at).
+    """
+    return (
+        db.query(
+            Change.seq,
+            Change.op,
+            Change.kind,
+            Change.path,
+            Change.old_path,
+            Change.size,
+            Change.checksum,
+            Change.created_at,
+        )
+        .filter(Change.owner_id == owner_id, Change.seq > after_seq)
+        .order_by(Change.seq)
+        .limit(limit)
+        .all()
+    )
+
+
+def get_last_seq(db: Session, owner_id: int) -> int:
+    last = db.scalar(
+        select(ChangeSequence.last_seq).where(ChangeSequence.user_id == owner_id)
+    )
+    return last or 0
+
+
+def delete_user_changes(db: Session, user_id: int) -> None:
+    """
+    Убирает журнал и счётчик пользователя; коммит — за вызывающим кодом.
+    """
+    db.execute(delete(Change).where(Change.owner_id == user_id))
+    db.execute(delete(ChangeSequence).where(ChangeSequence.user_id == user_id))
+
+
+def purge_changes(db: Session, older_than: datetime) -> int:
+    """
+    Удаляет записи журнала старше older_than, кроме последней записи
+    каждого пользователя: по ней видно, что более ранние номера уже
+    удалены. Возвращает число удалённых строк.
+    """
+    last_seq = (
+        select(ChangeSequence.last_seq)
+        .where(ChangeSequence.user_id == Change.owner_id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        delete(Change)
+        .where(Change.created_at < older_than, Change.seq < last_seq)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
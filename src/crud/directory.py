@@ -1,12 +1,66 @@
 from sqlalchemy.orm import Session
+from crud.change import record_change
 from models.directory import Directory
+from utils.db import path_under
+from utils.pagination import keyset_after, keyset_order
+
+# колонки сортировки листинга; у папок нет размера — сортируем по имени
+DIRECTORY_SORT_COLUMNS = {
+    "name": Directory.path,
+    "size": Directory.path,
+    "uploaded_at": Directory.created_at,
+}
 
 def create_directory(db: Session, path: str, owner_id: int) -> Directory:
     d = Directory(path=path, owner_id=owner_id)
     db.add(d)
+    record_change(db, owner_id, "create", "directory", path)
     db.commit()
     db.refresh(d)
     return d
 
 def get_directories_for_user(db: Session, owner_id: int) -> list[Directory]:
     return db.query(Directory).filter(Directory.owner_id == owner_id).all()
+
+def list_child_directories(
+    db: Session,
+    owner_id: int,
+    parent: str,
+    sort: str = "name",
+    descending: bool = False,
+    after: tuple | None = None,
+    limit: int = 100,
+) -> list[Directory]:
+    """
+    Прямые подпапки parent (например "user_1/docs") в порядке sort,
+    начиная после позиции after = (значение_сортировки, id).
+    """
+    column = DIRECTORY_SORT_COLUMNS[sort]
+    query = db.query(Directory).filter(
+        Directory.parent == parent, Directory.owner_id == owner_id
+    )
+    if after is not None:
+        query = query.filter(keyset_after(column, Directory.id, after[0], after[1], descending))
+    return query.order_by(*keyset_order(column, Directory.id, descending)).limit(limit).all()
+
+def get_directory(db: Session, path: str) -> Directory | None:
+    return db.query(Directory).filter(Directory.path == path).first()
+
+def list_directories_under(db: Session, owner_id: int, path: str) -> list[str]:
+    """
+    Пути всех подпапок path (на любой глубине), упорядоченные по имени.
+    """
+    rows = (
+        db.query(Directory.path)
+        .filter(Directory.owner_id == owner_id, path_under(Directory.path, path + "/"))
+        .order_by(Directory.path)
+        .all()
+    )
+    return [p for (p,) in rows]
+
+def get_directory_by_id(db: Session, directory_id: int) -> Directory | None:
+    return db.query(Directory).filter(Directory.id == directory_id).first()
+
+
+def get_directory_by_token(db: Session, token: str) -> Directory | None:
+    return db.query(Directory).filter(Directory.public_token == token).first()
@@ -1,13 +1,34 @@
 # src/crud/file.py
 
-import os
-import uuid
+import mimetypes
+import posixpath
 import zipfile
+from datetime import datetime, timezone
+from typing import Callable
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from models.blob import Blob
+from models.directory import Directory
 from models.file import File
+from crud.blob import (
+    add_blob_ref,
+    add_blob_refs,
+    add_existing_blob_ref,
+    get_blob_encodings,
+    get_stored_sizes,
+    release_blob_ref,
+)
+from crud.change import record_change, record_changes
+from crud.usage import bump_usage, get_usage
+from utils.db import chunked, path_under
+from utils.pagination import keyset_after, keyset_order
 
-# Корневая папка для всех загрузок
-UPLOAD_ROOT = "uploads"
+# колонки, по которым можно сортировать листинг папки
+FILE_SORT_COLUMNS = {
+    "name": File.filename,
+    "size": File.size,
+    "uploaded_at": File.uploaded_at,
+}
 
 
 def get_file_details(db: Session, filename: str) -> File | None:
@@ -18,19 +39,17 @@ def get_file_details(db: Session, filename: str) -> File | None:
     return db.query(File).filter(File.filename == filename).first()
 
 
-def get_user_file_stats(db: Session, owner_id: int) -> tuple[int, int]:
+def get_user_file_stats(db: Session, owner_id: int) -> tuple[int, int, int]:
     """
-    Возвращает (количество_файлов, суммарный_размер) по всем файлам
-    пользователя owner_id. Размер считается, глядя на реальные файлы в папке uploads.
+    Возвращает (количество_файлов, суммарный_размер, занято_в_хранилище)
+    по всем файлам пользователя owner_id: размер — исходный, занятое
+    место — с учётом сжатия. Читает одну строку агрегата user_usage,
+    который поддерживается при каждой записи и удалении.
     """
-    files = db.query(File).filter(File.owner_id == owner_id).all()
-    total_files = len(files)
-    total_size = 0
-    for f in files:
-        path_on_disk = os.path.join(UPLOAD_ROOT, f.filename)
-        if os.path.exists(path_on_disk):
-            total_size += os.path.getsize(path_on_disk)
-    return total_files, total_size
+    usage = get_usage(db, owner_id)
+    if usage is None:
+        return 0, 0, 0
+    return usage.file_count, usage.total_bytes, usage.stored_bytes
 
 
 def get_files_by_owner(db: Session, owner_id: int):
@@ -40,27 +59,150 @@ def get_files_by_owner(db: Session, owner_id: int):
     return db.query(File).filter(File.owner_id == owner_id).all()
 
 
+def get_files_page(
+    db: Session, owner_id: int, after_id: int | None = None, limit: int = 100
+) -> list[File]:
+    """
+    Страница файлов пользователя в порядке id (keyset: после after_id).
+    """
+    query = db.query(File).filter(File.owner_id == owner_id)
+    if after_id is not None:
+        query = query.filter(File.id > after_id)
+    return query.order_by(File.id).limit(limit).all()
+
+
+def list_child_files(
+    db: Session,
+    owner_id: int,
+    parent: str,
+    sort: str = "name",
+    descending: bool = False,
+    after: tuple | None = None,
+    limit: int = 100,
+) -> list[File]:
+    """
+    Файлы, лежащие прямо в папке parent (например "user_1/docs"), в порядке
+    sort, начиная после позиции after = (значение_сортировки, id).
+    Запрос идёт по индексу (parent, …) и не трогает остальные файлы пользователя.
+    """
+    column = FILE_SORT_COLUMNS[sort]
+    query = db.query(File).filter(File.parent == parent, File.owner_id == owner_id)
+    if after is not None:
+        query = query.filter(keyset_after(column, File.id, after[0], after[1], descending))
+    return query.order_by(*keyset_order(column, File.id, descending)).limit(limit).all()
+
+
+def list_files_under(db: Session, owner_id: int, path: str) -> list:
+    """
+    Все файлы поддерева path (например "user_1/docs"), упорядоченные по имени.
+    Возвращает лёгкие строки (filename, checksum, size, mime_type,
+    uploaded_at, encoding, stored_size) вместо ORM‐объектов — их может быть очень много.
+    """
+    return (
+        db.query(
+            File.filename,
+            File.checksum,
+            File.size,
+            File.mime_type,
+            File.uploaded_at,
+            Blob.encoding,
+            Blob.stored_size,
+        )
+        .outerjoin(Blob, Blob.sha256 == File.checksum)
+        .filter(File.owner_id == owner_id, path_under(File.filename, path + "/"))
+        .order_by(File.filename)
+        .all()
+    )
+
+
 def rename_file_record(db: Session, old_name: str, new_name: str) -> File | None:
     """
     Переименовывает запись в БД: old_name → new_name.
+    Данные лежат в blob-хранилище по хешу, поэтому на диске ничего не двигается.
     Если записи old_name нет, возвращает None.
     """
     file = get_file_details(db, old_name)
     if file:
         file.filename = new_name
+        record_change(db, file.owner_id, "move", "file", new_name, old_path=old_name)
         db.commit()
         db.refresh(file)
         return file
     return None
 
 
-def create_file(db: Session, filename: str, owner_id: int) -> File:
+def guess_mime_type(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _new_file(
+    db: Session,
+    filename: str,
+    owner_id: int,
+    checksum: str | None,
+    size: int | None,
+    mime_type: str | None,
+    stored_size: int | None = None,
+) -> File:
+    file = File(
+        filename=filename,
+        owner_id=owner_id,
+        checksum=checksum,
+        size=size,
+        mime_type=mime_type or guess_mime_type(filename),
+    )
+    from services.quota import enforce_quota
+
+    db.add(file)
+    bump_usage(db, owner_id, 1, size or 0, stored_size)
+    record_change(db, owner_id, "create", "file", filename, size=size, checksum=checksum)
+    if size:
+        enforce_quota(db, owner_id)
+    return file
+
+
+def create_file(
+    db: Session,
+    filename: str,
+    owner_id: int,
+    checksum: str | None = None,
+    size: int | None = None,
+    mime_type: str | None = None,
+    encoding: str | None = None,
+    stored_size: int | None = None,
+) -> File:
     """
     Создаёт новую запись File с указанным filename (полный относительный путь, например "user_3/a.txt")
-    и owner_id. Возвращает созданный ORM‐объект.
+    и owner_id. Если передан checksum, запись ссылается на blob с этим хешем
+    (refcount увеличивается в той же транзакции); encoding/stored_size —
+    как данные сжаты в хранилище, если blob новый. Размер и тип сохраняются
+    в записи, агрегат пользователя обновляется в той же транзакции;
+    превышение квоты — QuotaExceededError.
+    Возвращает созданный ORM‐объект.
     """
-    file = File(filename=filename, owner_id=owner_id)
-    db.add(file)
+    if checksum is not None:
+        add_blob_ref(db, checksum, size, encoding, stored_size)
+        # blob мог уже существовать — в агрегат идёт его реальный размер
+        stored_size = get_stored_sizes(db, [checksum]).get(checksum)
+    file = _new_file(db, filename, owner_id, checksum, size, mime_type, stored_size)
+    db.commit()
+    db.refresh(file)
+    return file
+
+
+def create_file_from_blob(
+    db: Session, filename: str, owner_id: int, checksum: str, size: int
+) -> File | None:
+    """
+    «Мгновенная» загрузка: создаёт File, ссылающийся на уже существующий blob.
+    Если blob с таким хешем и размером нет, возвращает None.
+    """
+    blob = add_existing_blob_ref(db, checksum)
+    if blob is None or blob.size != size:
+        db.rollback()
+        return None
+    stored_size = blob.stored_size if blob.stored_size is not None else blob.size
+    file = _new_file(db, filename, owner_id, checksum, size, None, stored_size)
     db.commit()
     db.refresh(file)
     return file
@@ -73,82 +215,162 @@ def get_file(db: Session, filename: str) -> File | None:
     return db.query(File).filter(File.filename == filename).first()
 
 
-def delete_file_record(db: Session, filename: str):
+def delete_file_record(db: Session, filename: str) -> None:
     """
-    Удаляет из БД запись File с этим filename (если она есть) и коммитит.
+    Удаляет из БД запись File с этим filename (если она есть), освобождает
+    ссылку на blob, уменьшает агрегат пользователя и коммитит. Данные
+    blob'а, на который больше никто не ссылается, позже сотрёт сборщик
+    (services.blob_store.collect_orphaned_blobs).
     """
     file = get_file(db, filename)
-    if file:
-        db.delete(file)
-        db.commit()
+    if not file:
+        return
+    checksum = file.checksum
+    stored_size = file.size or 0
+    if checksum is not None:
+        stored_size = get_stored_sizes(db, [checksum]).get(checksum, stored_size)
+    bump_usage(db, file.owner_id, -1, -(file.size or 0), -stored_size)
+    record_change(db, file.owner_id, "delete", "file", filename)
+    db.delete(file)
+    db.flush()
+    if checksum is not None:
+        release_blob_ref(db, checksum)
+    db.commit()
 
 
-# --- Новая функция: распаковка ZIP и регистрация директории ---
-def unpack_and_register_directory(db: Session, zip_path: str, owner_id: int) -> list[File]:
+# --- Распаковка ZIP и регистрация директории ---
+def unpack_and_register_directory(
+    db: Session,
+    zip_path: str,
+    owner_id: int,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[File]:
     """
-    1) Распаковывает zip-файл, лежащий по абсолютному пути zip_path, во временную папку.
-    2) Проходит по каждому файлу внутри распакованной структуры,
-       перемещает его в uploads/user_{owner_id}/… сохраняя вложенную структуру.
-    3) Создаёт запись в БД через create_file(...) для каждого перемещённого файла.
-    4) Возвращает список созданных ORM‐объектов File.
+    1) Проверяет оглавление zip-файла zip_path (лимиты на число записей,
+       объём и степень сжатия, пути вне папки пользователя).
+    2) Потоково распаковывает каждый файл во временный файл blob-хранилища,
+       по пути считая хеш; progress(байт, всего) — см. stage_archive.
+    3) Одной транзакцией добавляет все записи File (user_{owner_id}/…),
+       недостающие Directory, ссылки на blob'ы, агрегат пользователя
+       и записи в журнал изменений.
+       Файлы, которые уже есть, пропускаются.
+    4) После коммита переименовывает данные под их хеш (дубликаты
+       не занимают места) и возвращает список созданных ORM‐объектов File.
     """
-    base_tmp = zip_path + "_tmp"
-    os.makedirs(base_tmp, exist_ok=True)
+    from services.archive_import import discard_staged, stage_archive
+    from services.blob_store import store_blob_file
+    from services.quota import enforce_quota
 
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(base_tmp)
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            staged = stage_archive(zip_ref, progress)
     except zipfile.BadZipFile:
         # если не zip или повреждённый архив
         return []
 
-    created_files: list[File] = []
     user_prefix = f"user_{owner_id}/"
+    members = {user_prefix + m.path: m for m in staged.members}
+    dir_paths = sorted(user_prefix + d for d in staged.directories)
 
-    for root, _, files in os.walk(base_tmp):
-        for fname in files:
-            abs_src_path = os.path.join(root, fname)
-            rel_inside = os.path.relpath(abs_src_path, base_tmp)  # e.g. "docs/a.txt"
-            rel_full_path = os.path.normpath(user_prefix + rel_inside.replace("\\", "/"))
-            abs_target_path = os.path.join(UPLOAD_ROOT, rel_full_path)
-
-            os.makedirs(os.path.dirname(abs_target_path), exist_ok=True)
-            os.replace(abs_src_path, abs_target_path)
-
-            try:
-                new_rec = create_file(db, rel_full_path, owner_id)
-                created_files.append(new_rec)
-            except Exception:
-                db.rollback()
-                continue
-
-    # Удаляем временную папку
     try:
-        import shutil
-        shutil.rmtree(base_tmp)
-    except Exception:
-        pass
+        existing: set[str] = set()
+        for names in chunked(list(members)):
+            existing.update(
+                name for (name,) in db.query(File.filename).filter(File.filename.in_(names))
+            )
+        for paths in chunked(dir_paths):
+            existing.update(
+                path for (path,) in db.query(Directory.path).filter(Directory.path.in_(paths))
+            )
 
-    return created_files
+        now = datetime.now(timezone.utc)
+        new_members = [m for name, m in members.items() if name not in existing]
+        file_rows = [
+            {
+                "filename": user_prefix + m.path,
+                # вставка в обход ORM не вызывает @validates — parent считаем сами
+                "parent": posixpath.dirname(user_prefix + m.path),
+                "owner_id": owner_id,
+                "checksum": m.sha256,
+                "size": m.size,
+                "mime_type": guess_mime_type(m.path),
+                "uploaded_at": now,
+            }
+            for m in new_members
+        ]
+        dir_rows = [
+            {
+                "path": path,
+                "parent": posixpath.dirname(path),
+                "owner_id": owner_id,
+                "created_at": now,
+            }
+            for path in dir_paths
+            if path not in existing
+        ]
 
+        refs: dict[str, tuple[int, int]] = {}
+        for m in new_members:
+            size, count = refs.get(m.sha256, (m.size, 0))
+            refs[m.sha256] = (size, count + 1)
+        add_blob_refs(db, refs)
+        stored_sizes: dict[str, int] = {}
+        encodings: dict[str, str | None] = {}
+        for shas in chunked(list(refs)):
+            stored_sizes.update(get_stored_sizes(db, shas))
+            encodings.update(get_blob_encodings(db, shas))
 
-# --- Публичные ссылки (без изменений) ---
-def create_public_link(db: Session, filename: str) -> File | None:
-    """
-    Генерирует новый UUID4‑токен для данной записи File (по filename),
-    сохраняет его в public_token, возвращает обновлённый ORM‑объект.
-    """
-    file = get_file(db, filename)
-    if not file:
-        return None
+        created: list[File] = []
+        if file_rows:
+            created = list(db.scalars(insert(File).returning(File), file_rows))
+        if dir_rows:
+            db.execute(insert(Directory), dir_rows)
+        bump_usage(
+            db,
+            owner_id,
+            len(file_rows),
+            sum(m.size for m in new_members),
+            sum(stored_sizes.get(m.sha256, m.size) for m in new_members),
+        )
+        # родительские папки — раньше своих файлов
+        record_changes(
+            db,
+            owner_id,
+            [{"op": "create", "kind": "directory", "path": row["path"]} for row in dir_rows]
+            + [
+                {
+                    "op": "create",
+                    "kind": "file",
+                    "path": row["filename"],
+                    "size": row["size"],
+                    "checksum": row["checksum"],
+                }
+                for row in file_rows
+            ],
+        )
+        if new_members:
+            enforce_quota(db, owner_id)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        discard_staged(staged.members)
+        raise
 
-    token = str(uuid.uuid4())
-    file.public_token = token
-    db.commit()
-    db.refresh(file)
-    return file
+    # распакованные данные несжаты: blob, уже сохранённый со сжатием, не
+    # трогаем, а одинаковое содержимое нескольких записей пишем один раз
+    stored: set[str] = set()
+    leftovers = [m for name, m in members.items() if name in existing]
+    for m in new_members:
+        if m.sha256 in stored or encodings.get(m.sha256) is not None:
+            leftovers.append(m)
+            continue
+        store_blob_file(m.tmp_path, m.sha256)
+        stored.add(m.sha256)
+    discard_staged(leftovers)
+    return created
 
 
+# --- Публичные ссылки (без изменений) ---
 def get_file_by_token(db: Session, token: str) -> File | None:
     """
     Возвращает объект File, у которого public_token == token, или None.
@@ -0,0 +1,266 @@
+# src/crud/job.py
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from models.job import Job
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def create_job(db: Session, owner_id: int, kind: str, payload: dict) -> Job:
+    job = Job(owner_id=owner_id, kind=kind, status="queued", payload=payload, run_after=_now())
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Job | None:
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def list_jobs(
+    db: Session, owner_id: int, status: str | None = None, limit: int = 50
+) -> list[Job]:
+    query = db.query(Job).filter(Job.owner_id == owner_id)
+    if status is not None:
+        query = query.filter(Job.status == status)
+    return query.order_by(Job.id.desc()).limit(limit).all()
+
+
+def claim_next_job(db: Session, worker_id: str, per_user_limit: int) -> Job | None:
+    """
+    Берёт в работу самую старую готовую задачу пользователя, у которого
+    выполняется меньше per_user_limit задач. Захват — условный UPDATE
+    по id и статусу: из нескольких процессов задачу получит только один,
+    без SELECT ... FOR UPDATE (работает и на SQLite).
+    Проигравший гонку пробует следующего кандидата.
+    """
+    busy_owners = (
+        select(Job.owner_id)
+        .where(Job.status == "running")
+        .group_by(Job.owner_id)
+        .having(func.count() >= per_user_limit)
+    )
+    candidates = (
+        db.query(Job.id, Job.owner_id)
+        .filter(
+            Job.status == "queued",
+            Job.run_after <= _now(),
+            Job.owner_id.not_in(busy_owners),
+        )
+        .order_by(Job.id)
+        .limit(10)
+        .all()
+    )
+    for job_id, owner_id in candidates:
+        now = _now()
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(
+                status="running",
+                worker_id=worker_id,
+                heartbeat_at=now,
+                started_at=now,
+                attempts=Job.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            continue
+        running = (
+            db.query(func.count(Job.id))
+            .filter(Job.owner_id == owner_id, Job.status == "running")
+            .scalar()
+        )
+        if running > per_user_limit:
+            # другой процесс успел запустить задачу того же пользователя
+            db.rollback()
+            continue
+        db.commit()
+        return get_job(db, job_id)
+    return None
+
+
+def heartbeat_jobs(
+    db: Session, worker_id: str, progress: dict[int, tuple[int, int | None]]
+) -> set[int]:
+    """
+    Одним UPDATE продлевает жизнь задач этого воркера и сохраняет их
+    прогресс. Возвращает id задач, для которых запрошена отмена.
+    """
+    if not progress:
+        return set()
+    stmt = (
+        update(Job.__table__)
+        .where(Job.id == bindparam("job_id"), Job.worker_id == worker_id)
+        .values(
+            heartbeat_at=bindparam("now"),
+            progress_done=bindparam("done"),
+            progress_total=bindparam("total"),
+        )
+    )
+    now = _now()
+    db.execute(
+        stmt,
+        [
+            {"job_id": job_id, "now": now, "done": done, "total": total}
+            for job_id, (done, total) in progress.items()
+        ],
+    )
+    cancelled = {
+        job_id
+        for (job_id,) in db.query(Job.id).filter(
+            Job.id.in_(list(progress)), Job.cancel_requested.is_(True)
+        )
+    }
+    db.commit()
+    return cancelled
+
+
+def finish_job(
+    db: Session,
+    job_id: int,
+    worker_id: str,
+    status: str,
+    result: dict | None = None,
+    error: str | None = None,
+    retry_delay: float | None = None,
+    progress: tuple[int, int | None] | None = None,
+) -> bool:
+    """
+    Завершает задачу: status — итоговый статус или "queued" для повтора
+    через retry_delay секунд. Только если задача всё ещё за этим воркером
+    (её могли счесть зависшей и отдать другому). Возвращает, получилось ли.
+    """
+    values: dict = {"status": status, "worker_id": None, "error": error}
+    if progress is not None:
+        values["progress_done"], values["progress_total"] = progress
+    if status == "queued":
+        values["run_after"] = _now() + timedelta(seconds=retry_delay or 0)
+    else:
+        values["finished_at"] = _now()
+        values["result"] = result
+    updated = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == "running")
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return bool(updated)
+
+
+def release_job(db: Session, job_id: int, worker_id: str) -> None:
+    """
+    Возвращает задачу в очередь без траты попытки (воркер останавливается).
+    """
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == "running")
+        .values(status="queued", worker_id=None, attempts=Job.attempts - 1, run_after=_now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session, stale_seconds: int, max_attempts: int) -> int:
+    """
+    Задачи, чей воркер давно не подавал признаков жизни (процесс упал),
+    возвращаются в очередь; исчерпавшие попытки — помечаются failed.
+    Возвращает число обработанных задач.
+    """
+    deadline = _now() - timedelta(seconds=stale_seconds)
+    stale = (Job.status == "running") & (Job.heartbeat_at < deadline)
+    failed = db.execute(
+        update(Job)
+        .where(stale, Job.attempts >= max_attempts)
+        .values(
+            status="failed",
+            worker_id=None,
+            error="Worker stopped responding",
+            finished_at=_now(),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    requeued = db.execute(
+        update(Job)
+        .where(stale)
+        .values(status="queued", worker_id=None, run_after=_now())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return failed + requeued
+
+
+def request_cancel(db: Session, job: Job) -> Job:
+    """
+    Задача из очереди отменяется сразу; у выполняющейся выставляется
+    флаг, который воркер увидит при следующем heartbeat. Оба UPDATE
+    условные — задачу могли взять в работу после того, как её прочитали.
+    """
+    db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == "queued")
+        .values(status="cancelled", finished_at=_now())
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == "running")
+        .values(cancel_requested=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def retry_job(db: Session, job: Job) -> bool:
+    """
+    Ставит завершившуюся неудачей или отменённую задачу в очередь заново.
+    False — задача в другом состоянии.
+    """
+    updated = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status.in_(("failed", "cancelled")))
+        .values(
+            status="queued",
+            attempts=0,
+            error=None,
+            result=None,
+            cancel_requested=False,
+            progress_done=0,
+            progress_total=None,
+            finished_at=None,
+            run_after=_now(),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    db.refresh(job)
+    return bool(updated)
+
+
+def purge_finished_jobs(db: Session, retention_seconds: int) -> int:
+    """
+    Удаляет завершённые задачи старше retention_seconds.
+    Возвращает число удалённых.
+    """
+    deadline = _now() - timedelta(seconds=retention_seconds)
+    deleted = db.execute(
+        delete(Job)
+        .where(Job.status.in_(FINISHED_STATUSES), Job.finished_at < deadline)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return deleted
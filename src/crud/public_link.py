@@ -0,0 +1,96 @@
+# src/crud/public_link.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, delete, func, update
+from sqlalchemy.orm import Session
+
+from models.directory import Directory
+from models.file import File
+from models.revoked_link import RevokedLink
+
+# kind ссылки → модель объекта
+LINK_MODELS = {"f": File, "d": Directory}
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    # SQLite возвращает даты без часового пояса; храним мы всегда UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def note_public_link(db: Session, target: File | Directory, expires_at: datetime) -> None:
+    """
+    Запоминает срок самой долгой выданной ссылки на объект — по нему
+    удаление объекта решает, нужно ли отзывать ссылки.
+    """
+    current = _aware(target.public_link_expires_at)
+    if current is None or current < expires_at:
+        target.public_link_expires_at = expires_at
+    db.commit()
+
+
+def revoke_public_links(
+    db: Session, kind: str, targets: list[File] | list[Directory]
+) -> list[tuple[str, int, datetime]]:
+    """
+    Отзывает все выданные ссылки на объекты targets (и старый бессрочный
+    public_token). Объекты без действующих подписанных ссылок не попадают
+    в список отзыва. Коммит — за вызывающим кодом.
+    Возвращает добавленные записи (kind, id, revoked_at) для кеша процесса.
+    """
+    now = datetime.now(timezone.utc)
+    revoked = []
+    for target in targets:
+        target.public_token = None
+        expires_at = _aware(target.public_link_expires_at)
+        if expires_at is None or expires_at <= now:
+            continue
+        db.add(RevokedLink(kind=kind, target_id=target.id, revoked_at=now, expires_at=expires_at))
+        target.public_link_expires_at = None
+        revoked.append((kind, target.id, now))
+    return revoked
+
+
+def load_revocations(db: Session) -> dict[tuple[str, int], datetime]:
+    """
+    Действующий список отзыва: (kind, id) → время последнего отзыва.
+    """
+    rows = (
+        db.query(RevokedLink.kind, RevokedLink.target_id, func.max(RevokedLink.revoked_at))
+        .filter(RevokedLink.expires_at > datetime.now(timezone.utc))
+        .group_by(RevokedLink.kind, RevokedLink.target_id)
+        .all()
+    )
+    return {(kind, target_id): _aware(revoked_at) for kind, target_id, revoked_at in rows}
+
+
+def purge_expired_revocations(db: Session) -> int:
+    deleted = db.execute(
+        delete(RevokedLink).where(RevokedLink.expires_at <= datetime.now(timezone.utc))
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def add_download_counts(db: Session, counts: dict[tuple[str, int], int]) -> None:
+    """
+    Прибавляет накопленные счётчики скачиваний: один executemany UPDATE
+    на тип объекта. Удалённые за это время объекты просто не обновятся.
+    """
+    for kind, model in LINK_MODELS.items():
+        rows = [
+            {"target_id": target_id, "n": n}
+            for (row_kind, target_id), n in counts.items()
+            if row_kind == kind
+        ]
+        if rows:
+            table = model.__table__
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("target_id"))
+                .values(download_count=table.c.download_count + bindparam("n")),
+                rows,
+            )
+    db.commit()
@@ -0,0 +1,224 @@
+# src/crud/search.py
+"""
+Поиск по путям файлов и папок пользователя.
+
+Индексы создаёт ensure_search_index: в PostgreSQL — триграммные GIN-индексы
+(pg_trgm) по files.filename и directories.path, по ним работает ILIKE с
+подстрокой; в SQLite — таблицы FTS5 с токенизатором trigram, которые
+триггеры держат в актуальном состоянии. Индекс только сужает выборку:
+точное совпадение с шаблоном проверяет services.search.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import Integer, column, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from crud.directory import DIRECTORY_SORT_COLUMNS
+from crud.file import FILE_SORT_COLUMNS
+from models.directory import Directory
+from models.file import File
+from utils.db import path_under
+from utils.pagination import keyset_after, keyset_order
+
+# таблица → (колонка пути, FTS-таблица SQLite, индекс PostgreSQL)
+_SEARCH_TARGETS = {
+    "files": ("filename", "files_search", "ix_files_filename_trgm"),
+    "directories": ("path", "directories_search", "ix_directories_path_trgm"),
+}
+
+_SQLITE_FTS_DDL = """
+CREATE VIRTUAL TABLE {fts} USING fts5(
+    {col}, content='{table}', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN
+    INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col});
+END;
+CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col});
+END;
+CREATE TRIGGER {fts}_au AFTER UPDATE OF {col} ON {table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col});
+    INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col});
+END;
+INSERT INTO {fts}({fts}) VALUES ('rebuild');
+"""
+
+# есть ли в SQLite таблицы FTS5 (старые версии без trigram их не получат)
+_sqlite_fts: bool | None = None
+
+
+@dataclass
+class PathPattern:
+    """
+    Условие поиска для БД: like — LIKE-шаблон по полному пути (экранирование
+    "\\"), fragments — литеральные куски шаблона длиной от трёх символов
+    (по ним ищет FTS5 trigram; все должны встретиться в пути).
+    """
+    like: str
+    fragments: list[str]
+
+
+@dataclass
+class FileFilters:
+    min_size: int | None = None
+    max_size: int | None = None
+    # "image/png" или только основная часть — "image"
+    mime_type: str | None = None
+    uploaded_after: datetime | None = None
+    uploaded_before: datetime | None = None
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """
+    Создаёт поисковые индексы, если их ещё нет. В PostgreSQL индекс
+    строится CONCURRENTLY — без блокировки записи в большие таблицы;
+    прерванная такая сборка оставляет индекс INVALID (запросы его не
+    используют), и он перестраивается заново.
+    """
+    global _sqlite_fts
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            # воркеры стартуют одновременно — индекс строит один, остальные ждут
+            conn.execute(text("SELECT pg_advisory_lock(hashtext('ensure_search_index'))"))
+            try:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for table, (col, _, index) in _SEARCH_TARGETS.items():
+                    valid = conn.execute(text(
+                        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+                    ), {"name": index}).scalar()
+                    if valid is False:
+                        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index}"))
+                    conn.execute(text(
+                        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} "
+                        f"ON {table} USING gin ({col} gin_trgm_ops)"
+                    ))
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext('ensure_search_index'))"))
+    elif dialect == "sqlite":
+        existing = set(inspect(engine).get_table_names())
+        raw = engine.raw_connection()
+        try:
+            for table, (col, fts, _) in _SEARCH_TARGETS.items():
+                if fts not in existing:
+                    raw.executescript(_SQLITE_FTS_DDL.format(fts=fts, table=table, col=col))
+            raw.commit()
+            _sqlite_fts = True
+        except Exception:
+            # SQLite старше 3.34 без токенизатора trigram: поиск работает
+            # и без индекса, перебором файлов пользователя
+            raw.rollback()
+            _sqlite_fts = False
+        finally:
+            raw.close()
+
+
+def _has_sqlite_fts(db: Session) -> bool:
+    global _sqlite_fts
+    if _sqlite_fts is None:
+        found = db.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {"name": _SEARCH_TARGETS["files"][1]}).scalar()
+        _sqlite_fts = bool(found)
+    return _sqlite_fts
+
+
+def _fts_query(fragments: list[str]) -> str:
+    return " AND ".join('"' + f.replace('"', '""') + '"' for f in fragments)
+
+
+def _path_conditions(db: Session, table: str, id_column, path_column, pattern: PathPattern):
+    dialect = db.get_bind().dialect.name
+    if dialect != "sqlite":
+        # в PostgreSQL ILIKE идёт по триграммному индексу
+        return [path_column.ilike(pattern.like, escape="\\")]
+    conditions = []
+    if pattern.fragments and _has_sqlite_fts(db):
+        fts = _SEARCH_TARGETS[table][1]
+        matched = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :match").bindparams(
+            match=_fts_query(pattern.fragments)
+        ).columns(column("rowid", Integer))
+        conditions.append(id_column.in_(matched))
+    # LIKE в SQLite не различает регистр только латиницы — иначе он
+    # отбросил бы совпадения, которые регистронезависимый поиск должен найти
+    if pattern.like.isascii():
+        conditions.append(path_column.like(pattern.like, escape="\\"))
+    return conditions
+
+
+def search_files(
+    db: Session,
+    owner_id: int,
+    scope: str,
+    pattern: PathPattern,
+    filters: FileFilters,
+    sort: str = "name",
+    descending: bool = False,
+    after: tuple | None = None,
+    limit: int = 100,
+) -> list:
+    """
+    Файлы поддерева scope (например "user_1/docs"), путь которых может
+    подходить под pattern, в порядке sort после позиции after. Возвращает
+    лёгкие строки (id, filename, size, mime_type, uploaded_at).
+    """
+    sort_column = FILE_SORT_COLUMNS[sort]
+    query = db.query(
+        File.id, File.filename, File.size, File.mime_type, File.uploaded_at
+    ).filter(File.owner_id == owner_id, path_under(File.filename, scope + "/"))
+    query = query.filter(*_path_conditions(db, "files", File.id, File.filename, pattern))
+    if filters.min_size is not None:
+        query = query.filter(File.size >= filters.min_size)
+    if filters.max_size is not None:
+        query = query.filter(File.size <= filters.max_size)
+    if filters.mime_type:
+        if "/" in filters.mime_type:
+            query = query.filter(File.mime_type == filters.mime_type)
+        else:
+            query = query.filter(
+                File.mime_type.startswith(filters.mime_type + "/", autoescape=True)
+            )
+    if filters.uploaded_after is not None:
+        query = query.filter(File.uploaded_at >= filters.uploaded_after)
+    if filters.uploaded_before is not None:
+        query = query.filter(File.uploaded_at < filters.uploaded_before)
+    if after is not None:
+        query = query.filter(keyset_after(sort_column, File.id, after[0], after[1], descending))
+    return query.order_by(*keyset_order(sort_column, File.id, descending)).limit(limit).all()
+
+
+def search_directories(
+    db: Session,
+    owner_id: int,
+    scope: str,
+    pattern: PathPattern,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    sort: str = "name",
+    descending: bool = False,
+    after: tuple | None = None,
+    limit: int = 100,
+) -> list:
+    """
+    То же для папок: строки (id, path, created_at).
+    """
+    sort_column = DIRECTORY_SORT_COLUMNS[sort]
+    query = db.query(Directory.id, Directory.path, Directory.created_at).filter(
+        Directory.owner_id == owner_id, path_under(Directory.path, scope + "/")
+    )
+    query = query.filter(
+        *_path_conditions(db, "directories", Directory.id, Directory.path, pattern)
+    )
+    if created_after is not None:
+        query = query.filter(Directory.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(Directory.created_at < created_before)
+    if after is not None:
+        query = query.filter(
+            keyset_after(sort_column, Directory.id, after[0], after[1], descending)
+        )
+    return query.order_by(*keyset_order(sort_column, Directory.id, descending)).limit(limit).all()
@@ -0,0 +1,115 @@
+# src/crud/upload_session.py
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.upload_session import UploadSession, UploadChunk
+
+
+def _expiry(ttl_seconds: int) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+
+
+def create_upload_session(
+    db: Session,
+    owner_id: int,
+    filename: str,
+    total_size: int,
+    chunk_size: int,
+    ttl_seconds: int,
+) -> UploadSession:
+    """
+    Создаёт сессию загрузки для файла filename ("user_{owner_id}/…")
+    размером total_size байт, нарезанного на чанки по chunk_size.
+    """
+    session = UploadSession(
+        id=str(uuid.uuid4()),
+        owner_id=owner_id,
+        filename=filename,
+        total_size=total_size,
+        chunk_size=chunk_size,
+        expires_at=_expiry(ttl_seconds),
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+def get_upload_session(db: Session, session_id: str) -> UploadSession | None:
+    return db.query(UploadSession).filter(UploadSession.id == session_id).first()
+
+
+def record_chunk(
+    db: Session, session_id: str, number: int, size: int, ttl_seconds: int
+) -> bool:
+    """
+    Отмечает чанк number как принятый и продлевает жизнь сессии.
+    Повторная отправка того же чанка (ретрай клиента) не считается ошибкой.
+    False — сессии уже нет (удалена или просрочена, пока принимался чанк).
+    """
+    if not _touch_session(db, session_id, ttl_seconds):
+        db.rollback()
+        return False
+    db.add(UploadChunk(session_id=session_id, number=number, size=size))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        _touch_session(db, session_id, ttl_seconds)
+        db.commit()
+    return True
+
+
+def _touch_session(db: Session, session_id: str, ttl_seconds: int) -> bool:
+    result = db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session_id)
+        .values(expires_at=_expiry(ttl_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def get_received_chunks(db: Session, session_id: str) -> list[int]:
+    """
+    Возвращает отсортированный список номеров принятых чанков.
+    """
+    rows = (
+        db.query(UploadChunk.number)
+        .filter(UploadChunk.session_id == session_id)
+        .order_by(UploadChunk.number)
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def delete_upload_session(db: Session, session: UploadSession) -> None:
+    db.query(UploadChunk).filter(UploadChunk.session_id == session.id).delete(
+        synchronize_session=False
+    )
+    db.delete(session)
+    db.commit()
+
+
+def pop_expired_sessions(db: Session) -> list[str]:
+    """
+    Удаляет из БД просроченные сессии и возвращает их id,
+    чтобы вызывающий код мог убрать частичные данные с диска.
+    """
+    now = datetime.now(timezone.utc)
+    ids = [
+        r[0]
+        for r in db.query(UploadSession.id).filter(UploadSession.expires_at < now).all()
+    ]
+    if ids:
+        db.query(UploadChunk).filter(UploadChunk.session_id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        db.query(UploadSession).filter(UploadSession.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        db.commit()
+    return ids
@@ -0,0 +1,88 @@
+# src/crud/usage.py
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models.blob import Blob
+from models.file import File
+from models.user import User
+from models.usage import UserUsage
+from utils.db import dialect_insert
+
+
+def bump_usage(
+    db: Session,
+    owner_id: int,
+    files_delta: int,
+    bytes_delta: int,
+    stored_delta: int | None = None,
+) -> None:
+    """
+    Атомарно изменяет агрегат пользователя на (files_delta, bytes_delta);
+    stored_delta — изменение занятого в хранилище (по умолчанию равно
+    bytes_delta, т.е. без сжатия). Коммит — за вызывающим кодом, чтобы
+    агрегат менялся в одной транзакции с записями File.
+    """
+    if stored_delta is None:
+        stored_delta = bytes_delta
+    table = UserUsage.__table__
+    stmt = dialect_insert(db, table).values(
+        user_id=owner_id,
+        file_count=files_delta,
+        total_bytes=bytes_delta,
+        stored_bytes=stored_delta,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            "file_count": table.c.file_count + files_delta,
+            "total_bytes": table.c.total_bytes + bytes_delta,
+            "stored_bytes": table.c.stored_bytes + stored_delta,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def get_usage(db: Session, owner_id: int) -> UserUsage | None:
+    return db.query(UserUsage).filter(UserUsage.user_id == owner_id).first()
+
+
+def get_quota_usage(db: Session, owner_id: int) -> tuple[int | None, int]:
+    """
+    (квота из записи пользователя или None, занято байт) — одним запросом
+    по первичным ключам, без обхода файлов.
+    """
+    row = (
+        db.query(User.quota_bytes, UserUsage.total_bytes)
+        .outerjoin(UserUsage, UserUsage.user_id == User.id)
+        .filter(User.id == owner_id)
+        .first()
+    )
+    if row is None:
+        return None, 0
+    return row.quota_bytes, row.total_bytes or 0
+
+
+def rebuild_usage(db: Session) -> int:
+    """
+    Пересчитывает агрегаты всех пользователей по таблице files.
+    Возвращает количество пользователей с файлами.
+    """
+    rows = (
+        db.query(
+            File.owner_id,
+            func.count(File.id),
+            func.coalesce(func.sum(File.size), 0),
+            func.coalesce(func.sum(func.coalesce(Blob.stored_size, File.size)), 0),
+        )
+        .outerjoin(Blob, Blob.sha256 == File.checksum)
+        .group_by(File.owner_id)
+        .all()
+    )
+    db.query(UserUsage).delete(synchronize_session=False)
+    db.add_all(
+        UserUsage(user_id=owner_id, file_count=count, total_bytes=total, stored_bytes=stored)
+        for owner_id, count, total, stored in rows
+    )
+    db.commit()
+    return len(rows)
@@ -1,11 +1,16 @@
 # src/crud/user.py
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.user import User
-from schemas.user import UserCreate, UserUpdate
-from passlib.context import CryptContext
-
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from models.directory import Directory
+from models.file import File
+from models.usage import UserUsage
+from crud.blob import release_blob_ref
+from crud.change import delete_user_changes
+from crud.public_link import revoke_public_links
+from auth.cache import token_cache
 
 
 def get_user_by_email(db: Session, email: str) -> User | None:
@@ -24,30 +29,131 @@ def get_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
     return db.query(User).offset(skip).limit(limit).all()
 
 
+def get_users_with_usage(
+    db: Session, skip: int = 0, limit: int = 100
+) -> list[tuple[User, UserUsage | None]]:
+    """
+    Пользователи вместе с их агрегатом использования — одним запросом,
+    без ленивой загрузки user.files для каждого.
+    """
+    return (
+        db.query(User, UserUsage)
+        .outerjoin(UserUsage, UserUsage.user_id == User.id)
+        .order_by(User.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
 def get_user(db: Session, user_id: int) -> User | None:
     return db.query(User).filter(User.id == user_id).first()
 
 
-def update_user(db: Session, user_id: int, user_in: UserUpdate) -> User | None:
+def _apply_user_update(
+    db: Session,
+    user_id: int,
+    email: str | None,
+    hashed_password: str | None,
+) -> User | None:
     user = get_user(db, user_id)
     if not user:
         return None
 
-    if user_in.email is not None:
-        user.email = user_in.email
-    if user_in.password is not None:
-        user.hashed_password = pwd_context.hash(user_in.password)
+    if email is not None:
+        user.email = email
+    if hashed_password is not None:
+        user.hashed_password = hashed_password
 
     db.commit()
     db.refresh(user)
     return user
 
 
+def update_user(
+    db: Session,
+    user_id: int,
+    email: str | None = None,
+    hashed_password: str | None = None,
+) -> User | None:
+    """
+    Меняет email и/или пароль. Пароль приходит уже захешированным
+    (auth.passwords): bcrypt не должен считаться внутри транзакции.
+    """
+    user = _apply_user_update(db, user_id, email, hashed_password)
+    if user:
+        # старые токены не должны отдавать закешированные email/доступ
+        token_cache.invalidate_user(user_id)
+    return user
+
+
+async def aupdate_user(
+    db: AsyncSession,
+    user_id: int,
+    email: str | None = None,
+    hashed_password: str | None = None,
+) -> User | None:
+    """
+    То же, что update_user, для event loop: кеш токенов сбрасывается
+    асинхронным клиентом, а не синхронным вызовом Redis внутри run_sync.
+    """
+    user = await db.run_sync(_apply_user_update, user_id, email, hashed_password)
+    if user:
+        await token_cache.ainvalidate_user(user_id)
+    return user
+
+
+def set_password_hash(db: Session, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """
+    Сохраняет пересчитанный при входе хеш того же пароля (с новой
+    стоимостью bcrypt), только если хеш всё ещё old_hash: пароль, сменённый
+    пока шла проверка, не перезаписывается старым. Токены остаются
+    действительными. Возвращает True, если хеш заменён.
+    """
+    updated = (
+        db.query(User)
+        .filter(User.id == user_id, User.hashed_password == old_hash)
+        .update({User.hashed_password: new_hash}, synchronize_session=False)
+    )
+    db.commit()
+    return updated > 0
+
+
 def delete_user(db: Session, user_id: int) -> User | None:
+    from services.public_links import remember_revocations
+
     user = get_user(db, user_id)
 
     if user:
+        now = datetime.now(timezone.utc)
+        # действующие подписанные ссылки иначе пережили бы удаление
+        revoked = revoke_public_links(
+            db,
+            "f",
+            db.query(File).filter(File.owner_id == user_id, File.public_link_expires_at > now).all(),
+        ) + revoke_public_links(
+            db,
+            "d",
+            db.query(Directory)
+            .filter(Directory.owner_id == user_id, Directory.public_link_expires_at > now)
+            .all(),
+        )
+        checksums = [
+            c for (c,) in db.query(File.checksum).filter(
+                File.owner_id == user_id, File.checksum.isnot(None)
+            )
+        ]
+        db.query(UserUsage).filter(UserUsage.user_id == user_id).delete(
+            synchronize_session=False
+        )
+        delete_user_changes(db, user_id)
         db.delete(user)
+        db.flush()
+        # файлы удаляются каскадом — освобождаем их ссылки на blob'ы
+        for checksum in checksums:
+            release_blob_ref(db, checksum)
         db.commit()
+        token_cache.invalidate_user(user_id)
+        remember_revocations(revoked)
 
     return user
\ No newline at end of file
@@ -1,12 +1,97 @@
+import os
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from core.config import settings
 
 
-engine = create_engine(settings.DATABASE_URL, echo=True, future=True)
+# асинхронные драйверы для тех же баз: asyncpg в проде, aiosqlite локально
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _pool_options(url) -> dict:
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    # у SQLite свой пул без размеров и очереди
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+def _connect_args(url, is_async: bool) -> dict:
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if not timeout or url.get_backend_name() != "postgresql":
+        return {}
+    if is_async:
+        return {"server_settings": {"statement_timeout": str(timeout)}}
+    return {"options": f"-c statement_timeout={timeout}"}
+
+
+_url = make_url(settings.DATABASE_URL)
+engine = create_engine(
+    _url,
+    echo=settings.DB_ECHO,
+    future=True,
+    connect_args=_connect_args(_url, is_async=False),
+    **_pool_options(_url),
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """
+    Асинхронный движок создаётся лениво: драйвер (asyncpg/aiosqlite)
+    нужен только если приложение реально использует async-сессии.
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        url = _url.set(drivername=ASYNC_DRIVERS.get(_url.get_backend_name(), _url.drivername))
+        _async_engine = create_async_engine(
+            url,
+            echo=settings.DB_ECHO,
+            connect_args=_connect_args(url, is_async=True),
+            **_pool_options(url),
+        )
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _AsyncSessionLocal()
+
+
+def upgrade_schema() -> None:
+    """
+    Доводит схему БД до последней ревизии Alembic (alembic upgrade head):
+    новые таблицы и колонки появляются и в уже развёрнутых базах.
+    Повторный вызов ничего не делает.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic.ini"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
 
 # Dependencies for FastAPI
 def get_db():
@@ -15,3 +100,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Async-сессия для async-роутов: работает прямо в event loop, не занимая
+    поток из пула. Синхронные функции crud вызываются через
+    `await db.run_sync(crud_fn, *args)`.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,18 +1,146 @@
 # src/main.py
 
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 
-from database import Base, engine
-from routes import auth, users, files
+from auth.passwords import shutdown_password_hashing
+from core.config import settings
+from crud.change import purge_changes
+from crud.public_link import purge_expired_revocations
+from crud.search import ensure_search_index
+from database import engine, SessionLocal, get_async_engine, upgrade_schema
+from routes import auth, users, files, uploads, jobs, metrics, changes
+from services.blob_store import collect_orphaned_blobs
+from services.directory_move import recover_directory_moves
+from services.jobs import start_job_workers, stop_job_workers
+from services.metrics import MetricsMiddleware, instrument_engine, shutdown_metrics
+from services.previews import shutdown_previews
+from services.public_links import flush_download_counts, refresh_revocations
+from services.upload_sessions import purge_expired_sessions
 from utils.errors import AppError
 
+logger = logging.getLogger(__name__)
+
+
+def _purge_upload_sessions():
+    db = SessionLocal()
+    try:
+        purge_expired_sessions(db)
+    finally:
+        db.close()
+
+
+def _recover_directory_moves():
+    db = SessionLocal()
+    try:
+        recover_directory_moves(db)
+    finally:
+        db.close()
+
+
+def _collect_blobs():
+    db = SessionLocal()
+    try:
+        collect_orphaned_blobs(db)
+    finally:
+        db.close()
+
+
+def _purge_change_log():
+    db = SessionLocal()
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.CHANGES_RETENTION_SECONDS)
+        purge_changes(db, cutoff)
+    finally:
+        db.close()
+
+
+def _sync_public_links(purge: bool = False):
+    db = SessionLocal()
+    try:
+        flush_download_counts(db)
+        refresh_revocations(db)
+        if purge:
+            purge_expired_revocations(db)
+    finally:
+        db.close()
+
+
+def _public_link_sync_round():
+    # истёкшие записи отзыва чистим примерно раз в час
+    purge_every = max(3600 // settings.PUBLIC_LINK_SYNC_SECONDS, 1)
+    rounds = itertools.count(1)
+    return lambda: _sync_public_links(next(rounds) % purge_every == 0)
+
+
+def _run_periodically(name: str, interval: float, job) -> asyncio.Task:
+    """
+    Фоновая задача процесса: раз в interval секунд вызывает job в пуле
+    потоков. Ошибка одного прохода пишется в лог и не останавливает цикл.
+    """
+    async def loop():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_in_threadpool(job)
+            except Exception:
+                logger.exception("Periodic task %s failed", name)
+
+    return asyncio.create_task(loop(), name=name)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # перемещения папок, прерванные падением процесса, доводим до конца
+    await run_in_threadpool(_recover_directory_moves)
+    await run_in_threadpool(_sync_public_links, True)
+    background = [
+        # брошенные сессии загрузки и их частичные данные
+        _run_periodically(
+            "purge-upload-sessions",
+            settings.UPLOAD_SESSION_PURGE_INTERVAL_SECONDS,
+            _purge_upload_sessions,
+        ),
+        # список отзыва ссылок перечитываем, счётчики скачиваний сбрасываем в БД
+        _run_periodically(
+            "sync-public-links", settings.PUBLIC_LINK_SYNC_SECONDS, _public_link_sync_round()
+        ),
+        # старые записи журнала изменений: клиенты с такими курсорами
+        # получат 410 и перечитают дерево целиком
+        _run_periodically(
+            "purge-change-log", settings.CHANGES_PURGE_INTERVAL_SECONDS, _purge_change_log
+        ),
+        # данные blob'ов, на которые давно никто не ссылается
+        _run_periodically("collect-blobs", settings.BLOB_GC_INTERVAL_SECONDS, _collect_blobs),
+    ]
+    start_job_workers(SessionLocal)
+    yield
+    for task in background:
+        task.cancel()
+    try:
+        await run_in_threadpool(_sync_public_links)
+    except Exception:
+        logger.exception("Final public link sync failed")
+    await run_in_threadpool(stop_job_workers)
+    shutdown_previews()
+    shutdown_password_hashing()
+    shutdown_metrics()
+
+
 app = FastAPI(
     title="Cloud Storage API",
     version="0.1.0",
-    description="Backend of cloud storage"
+    description="Backend of cloud storage",
+    lifespan=lifespan,
 )
 
 # Разрешаем любые Origin, чтобы публичные ссылки работали отовсюду
@@ -24,9 +152,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Метрики: middleware добавлено последним — оно внешнее и меряет весь запрос
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine, "sync")
+    instrument_engine(get_async_engine().sync_engine, "async")
+    app.include_router(metrics.router)
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(files.router)
+app.include_router(uploads.router)
+app.include_router(jobs.router)
+app.include_router(changes.router)
 
 app.mount("/", StaticFiles(directory="client", html=True), name="client")
 
@@ -34,7 +172,9 @@ app.mount("/", StaticFiles(directory="client", html=True), name="client")
 async def app_error_handler(request: Request, exc: AppError):
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=exc.headers,
     )
 
-Base.metadata.create_all(bind=engine)
+upgrade_schema()
+ensure_search_index(engine)
@@ -0,0 +1,24 @@
+# src/models/blob.py
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, func
+from database import Base
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    # SHA-256 содержимого (hex) — ключ контентно-адресуемого хранилища
+    sha256 = Column(String(64), primary_key=True)
+    # размер исходного содержимого
+    size = Column(BigInteger, nullable=False)
+    # сжатие при хранении: None, "gzip" или "zstd"; stored_size — сколько
+    # байт занимает в хранилище (None — столько же, сколько size)
+    encoding = Column(String(16), nullable=True)
+    stored_size = Column(BigInteger, nullable=True)
+    # сколько записей File ссылаются на этот blob
+    refcount = Column(Integer, nullable=False, default=0)
+    # когда refcount упал до 0. Запись остаётся, а данные стирает сборщик
+    # (services.blob_store.collect_orphaned_blobs), если за BLOB_GC_GRACE_SECONDS
+    # на blob никто снова не сослался; новая ссылка сбрасывает отметку
+    orphaned_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,47 @@
+# src/models/change.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String
+from database import Base
+
+
+class Change(Base):
+    __tablename__ = "changes"
+
+    # журнал изменений дерева пользователя для синхронизации клиентов:
+    # строка пишется в той же транзакции, что и само изменение
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # номер изменения у пользователя: 1, 2, 3, … без пропусков
+    seq = Column(BigInteger, nullable=False)
+    # "create", "delete" или "move"
+    op = Column(String(16), nullable=False)
+    # "file" или "directory"
+    kind = Column(String(16), nullable=False)
+    # полный путь ("user_1/docs/a.txt"); для move — новый, old_path — прежний
+    path = Column(String, nullable=False)
+    old_path = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=True)
+    checksum = Column(String(64), nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (
+        Index("ix_changes_owner_id_seq", "owner_id", "seq", unique=True),
+        Index("ix_changes_created_at", "created_at"),
+    )
+
+
+class ChangeSequence(Base):
+    __tablename__ = "change_sequences"
+
+    # последний выданный номер изменения пользователя. Строка блокируется
+    # до конца транзакции, записавшей изменение, поэтому номера одного
+    # пользователя коммитятся строго по порядку и клиент, прочитавший
+    # изменения до N, не пропустит N - 1, закоммиченное позже
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    last_seq = Column(BigInteger, nullable=False, default=0)
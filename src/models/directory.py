@@ -1,5 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
-from sqlalchemy.orm import relationship
+import posixpath
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index, func
+from sqlalchemy.orm import relationship, validates
 from database import Base
 
 class Directory(Base):
@@ -8,8 +11,31 @@ class Directory(Base):
     id = Column(Integer, primary_key=True, index=True)
     # относительный путь, например "user_1/docs"
     path = Column(String, unique=True, index=True, nullable=False)
+    # путь родительской папки, например "user_1" для "user_1/docs"
+    parent = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # токен публичной ссылки на скачивание папки ZIP-архивом
+    # (старые бессрочные ссылки; новые подписываются, см. services.public_links)
+    public_token = Column(String, unique=True, index=True, nullable=True)
+    public_link_expires_at = Column(DateTime(timezone=True), nullable=True)
+    download_count = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # время ставит приложение: значения с микросекундами одинаково
+    # сравниваются в курсорах пагинации и в PostgreSQL, и в SQLite
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
 
     # связываем с атрибутом `directories` в User
     owner = relationship("User", back_populates="directories")
+
+    __table_args__ = (
+        Index("ix_directories_parent_path", "parent", "path"),
+        Index("ix_directories_parent_created_at", "parent", "created_at", "id"),
+    )
+
+    @validates("path")
+    def _sync_parent(self, key, value):
+        self.parent = posixpath.dirname(value)
+        return value
@@ -0,0 +1,17 @@
+# src/models/directory_move.py
+
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from database import Base
+
+
+class DirectoryMove(Base):
+    __tablename__ = "directory_moves"
+
+    # журнал незавершённых перемещений папок: строка фиксируется до
+    # os.rename на диске и удаляется в одной транзакции с переписыванием
+    # путей — после сбоя по ней перемещение доводится до конца при старте
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    source = Column(String, nullable=False)
+    destination = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
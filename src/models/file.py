@@ -1,7 +1,10 @@
 # src/models/file.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
-from sqlalchemy.orm import relationship
+import posixpath
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index, func
+from sqlalchemy.orm import relationship, validates
 from database import Base
 
 
@@ -11,10 +14,44 @@ class File(Base):
     id = Column(Integer, primary_key=True, index=True)
     # В поле filename теперь хранится относительный путь: "user_{owner_id}/…"
     filename = Column(String, unique=True, index=True, nullable=False)
+    # путь родительской папки ("user_{owner_id}/docs"): листинг папки
+    # читает только её прямых детей по индексу
+    parent = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    # время ставит приложение: значения с микросекундами одинаково
+    # сравниваются в курсорах пагинации и в PostgreSQL, и в SQLite
+    uploaded_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
+
+    # SHA-256 содержимого — ссылка на blob в контентно-адресуемом хранилище.
+    # Пусто у файлов, загруженных до его появления (лежат в uploads/<filename>)
+    checksum = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True)
+    # размер и тип фиксируются при записи, чтобы статистика не ходила на диск
+    size = Column(BigInteger, nullable=True)
+    mime_type = Column(String, nullable=True)
 
     # --- новое поле для UUID‐токена публичной ссылки ---
+    # (старые бессрочные ссылки; новые подписываются, см. services.public_links)
     public_token = Column(String, unique=True, index=True, nullable=True)
+    # когда истекает последняя выданная подписанная ссылка: до этого момента
+    # удаление файла должно отзывать ссылки
+    public_link_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # скачивания по публичным ссылкам; копятся в памяти и сбрасываются пачками
+    download_count = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     owner = relationship("User", back_populates="files")
+
+    __table_args__ = (
+        Index("ix_files_owner_id_id", "owner_id", "id"),
+        Index("ix_files_parent_filename", "parent", "filename"),
+        Index("ix_files_parent_size", "parent", "size", "id"),
+        Index("ix_files_parent_uploaded_at", "parent", "uploaded_at", "id"),
+    )
+
+    @validates("filename")
+    def _sync_parent(self, key, value):
+        self.parent = posixpath.dirname(value)
+        return value
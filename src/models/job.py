@@ -0,0 +1,48 @@
+# src/models/job.py
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
+from database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    # фоновая задача (например, распаковка архива): очередь — сама таблица,
+    # поэтому задачи переживают перезапуск процессов
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(32), nullable=False)
+    # queued → running → succeeded | failed | cancelled
+    status = Column(String(16), nullable=False, default="queued")
+    payload = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    # прогресс в единицах задачи (для распаковки — байты); total = None — неизвестно
+    progress_done = Column(BigInteger, nullable=False, default=0)
+    progress_total = Column(BigInteger, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    # кто выполняет задачу и когда последний раз подтвердил, что жив
+    worker_id = Column(String(64), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    # не брать в работу раньше этого времени (отложенный повтор после ошибки)
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
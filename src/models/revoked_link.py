@@ -0,0 +1,23 @@
+# src/models/revoked_link.py
+
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from database import Base
+
+
+class RevokedLink(Base):
+    __tablename__ = "revoked_links"
+
+    # подписанные публичные ссылки проверяются без БД, поэтому отзыв —
+    # отдельный список: ссылки на объект (kind "f" — файл, "d" — папка),
+    # выданные не позже revoked_at, недействительны. Строка нужна, пока
+    # не истекла последняя выданная ссылка (expires_at), — список маленький
+    # и целиком держится в памяти процессов
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(1), nullable=False)
+    target_id = Column(Integer, nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_revoked_links_kind_target_id", "kind", "target_id"),
+    )
@@ -0,0 +1,42 @@
+# src/models/upload_session.py
+
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, func
+from sqlalchemy.orm import relationship
+from database import Base
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    # UUID4 сессии, его же клиент использует в URL
+    id = Column(String, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # итоговый путь файла: "user_{owner_id}/…"
+    filename = Column(String, nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # продлевается при каждом принятом чанке; просроченные сессии удаляются
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    chunks = relationship(
+        "UploadChunk",
+        back_populates="session",
+        cascade="all, delete-orphan",
+    )
+
+    @property
+    def total_chunks(self) -> int:
+        return -(-self.total_size // self.chunk_size)
+
+
+class UploadChunk(Base):
+    __tablename__ = "upload_chunks"
+
+    session_id = Column(
+        String, ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True
+    )
+    number = Column(Integer, primary_key=True)
+    size = Column(Integer, nullable=False)
+
+    session = relationship("UploadSession", back_populates="chunks")
@@ -0,0 +1,19 @@
+# src/models/usage.py
+
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, DateTime, func
+from database import Base
+
+
+class UserUsage(Base):
+    __tablename__ = "user_usage"
+
+    # одна строка на пользователя — агрегат, который обновляется в той же
+    # транзакции, что и записи File, поэтому /files/stats читает одну строку
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    file_count = Column(BigInteger, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
+    # сколько байт файлы занимают в хранилище с учётом сжатия
+    stored_bytes = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Integer, String
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -8,6 +8,8 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # квота на суммарный размер файлов; NULL — USER_QUOTA_BYTES из настроек
+    quota_bytes = Column(BigInteger, nullable=True)
 
     # файлы пользователя
     files = relationship(
@@ -1,15 +1,19 @@
 # src/routes/auth.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from schemas.user import UserCreate, UserRead
 from schemas.token import Token
-from crud.user import get_user_by_email, create_user
-from auth.jwt import create_access_token, verify_password
+from crud.user import get_user_by_email, create_user, set_password_hash
+from crud.usage import get_usage
+from auth.jwt import create_access_token
+from auth.passwords import hash_password, verify_password
+from auth.cache import AuthenticatedUser
 from auth.dependencies import get_current_user
-from database import get_db
-import models.user as models
+from database import get_db, get_async_db
 import schemas.user as schemas
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -22,21 +26,33 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
     summary="Register a new user",
     response_description="User profile without password"
 )
-def register(
+async def register(
     user_in: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new user account.
     - **user_in**: JSON payload with `email` and `password`.
     - **Returns**: the created user (id and email).
+    Пароль хешируется в пуле процессов (auth.passwords), а не в пуле потоков.
     """
-    if get_user_by_email(db, user_in.email):
+    if await db.run_sync(get_user_by_email, user_in.email):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    # не держим соединение из пула, пока считается хеш
+    await db.rollback()
+    hashed_password = await hash_password(user_in.password)
+    try:
+        return await db.run_sync(create_user, user_in.email, hashed_password)
+    except IntegrityError:
+        # тот же email успели зарегистрировать, пока считался хеш
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    return create_user(db, user_in)
 
 
 @router.post(
@@ -45,23 +61,31 @@ def register(
     summary="Authenticate and receive a JWT",
     response_description="Access token and its type"
 )
-def login(
+async def login(
     user_in: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate existing user.
     - **user_in**: JSON payload with `email` and `password`.
     - **Returns**: JSON with `access_token` and `token_type`.
+    Хеш, посчитанный с другой стоимостью bcrypt, заменяется новым
+    (BCRYPT_ROUNDS) — незаметно для пользователя.
     """
-    user = get_user_by_email(db, user_in.email)
-    if not user or not verify_password(user_in.password, user.hashed_password):
+    user = await db.run_sync(get_user_by_email, user_in.email)
+    user_id = user.id if user else None
+    hashed_password = user.hashed_password if user else None
+    await db.rollback()
+    valid, new_hash = await verify_password(user_in.password, hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    token = create_access_token(subject=user.email)
+    if new_hash is not None:
+        await db.run_sync(set_password_hash, user_id, hashed_password, new_hash)
+    token = create_access_token(subject=user_in.email)
     return {
         "access_token": token,
         "token_type": "bearer"
@@ -72,18 +96,21 @@ def login(
     "/me",
     response_model=UserRead,
     summary="Get current user profile",
-    response_description="Current user’s id, email and their filenames"
+    response_description="Current user’s id, email, file count and total size"
 )
 def read_current_user(
-    current_user: models.User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
-    Return the current user's profile and list of their filenames.
+    Return the current user's profile with their file count and total size.
+    Use `/users/{id}/files` to page through the files themselves.
     """
-    filenames = [f.filename for f in current_user.files]
+    usage = get_usage(db, current_user.id)
     return schemas.UserRead(
         id=current_user.id,
         email=current_user.email,
-        files=filenames
+        file_count=usage.file_count if usage else 0,
+        total_bytes=usage.total_bytes if usage else 0,
     )
 
@@ -0,0 +1,82 @@
+# src/routes/changes.py
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.cache import AuthenticatedUser
+from auth.dependencies import get_current_user
+from core.config import settings
+from crud.change import get_last_seq
+from database import get_async_db
+from schemas.change import ChangeCursor, ChangeInfo, ChangePage
+from services.changes import wait_for_changes
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["Changes"],
+)
+
+
+def _relative(path: str | None, root: int) -> str | None:
+    return path[root:] if path is not None else None
+
+
+@router.get(
+    "/",
+    response_model=ChangePage,
+    summary="Changes since a cursor",
+)
+async def list_changes(
+    cursor: int = Query(0, ge=0, description="cursor from the previous response"),
+    limit: int = Query(1000, ge=1, le=10_000),
+    wait: float = Query(
+        0, ge=0, le=settings.CHANGES_MAX_WAIT_SECONDS,
+        description="Seconds to wait for a change if there is none yet (long poll)",
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Изменения дерева пользователя после cursor: создание, удаление и
+    перемещение файлов и папок. Пустой ответ — с прошлого раза ничего
+    не изменилось. 410 — курсор старше хранимого журнала, нужно заново
+    прочитать дерево и взять свежий курсор из GET /changes/cursor.
+    """
+    rows = await wait_for_changes(db, current_user.id, cursor, limit, wait)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    root = len(f"user_{current_user.id}/")
+    return ChangePage(
+        changes=[
+            ChangeInfo(
+                seq=row.seq,
+                op=row.op,
+                kind=row.kind,
+                path=row.path[root:],
+                old_path=_relative(row.old_path, root),
+                size=row.size,
+                checksum=row.checksum,
+                created_at=row.created_at,
+            )
+            for row in rows
+        ],
+        cursor=rows[-1].seq if rows else cursor,
+        has_more=has_more,
+    )
+
+
+@router.get(
+    "/cursor",
+    response_model=ChangeCursor,
+    summary="Current change cursor",
+)
+async def current_cursor(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Курсор «сейчас»: возьмите его перед полным чтением дерева, а потом
+    запрашивайте изменения после него — всё, что изменится во время
+    чтения, придёт в ленте.
+    """
+    return ChangeCursor(cursor=await db.run_sync(get_last_seq, current_user.id))
@@ -1,122 +1,245 @@
 from fastapi import (
     APIRouter,
-    UploadFile,
-    File as FileParam,
     HTTPException,
     Depends,
+    Request,
     status,
     Query,
 )
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-import shutil
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
 import os
-import uuid
+import posixpath
 
-from database import get_db
+from core.config import settings
+from database import get_db, get_async_db
+from auth.cache import AuthenticatedUser
 from auth.dependencies import get_current_user
-from models.user import User
 from models.directory import Directory
-from models.file import File as FileModel
+from models.file import File
 from schemas.file import (
     FileInfo,
     FileDetail,
     FileStats,
     PublicLinkResponse,
     ListDirResponse,
+    UploadByHashRequest,
+    BatchRequest,
+    BatchResponse,
+    RenameRequest,
+    SearchHit,
+    SearchResponse,
 )
 from crud.file import (
+    FILE_SORT_COLUMNS,
     create_file,
+    create_file_from_blob,
+    list_child_files,
     get_file as crud_get_file,
     delete_file_record,
     get_user_file_stats,
-    create_public_link,
+    guess_mime_type,
     get_file_by_token,
+    list_files_under,
     unpack_and_register_directory,
 )
+from crud.blob import get_blob
+from crud.search import FileFilters
+from crud.usage import get_quota_usage
+from crud.public_link import note_public_link, revoke_public_links
 from crud.directory import (
+    DIRECTORY_SORT_COLUMNS,
     create_directory,
-    get_directories_for_user,
+    get_directory,
+    get_directory_by_id,
+    get_directory_by_token,
+    list_child_directories,
+    list_directories_under,
 )
+from services.blob_store import StoredData, legacy_path, locate_file_data
+from services.directory_move import move_directory
+from services.downloads import (
+    ZipEntry,
+    asset_not_modified,
+    build_asset_response,
+    build_file_response,
+    build_zip_response,
+)
+from services.file_batch import apply_batch, run_cleanup
+from services.public_links import (
+    count_download,
+    issue_directory_link,
+    issue_file_link,
+    parse_public_link,
+    public_url,
+    remember_revocations,
+)
+from services.previews import (
+    PREVIEW_MEDIA_TYPE,
+    discard_previews,
+    get_preview,
+    preview_key,
+)
+from services.quota import effective_quota, quota_remaining
+from services.search import compile_query, search as search_paths
+from services.rate_limit import link_subject, rate_limiter, throttle_response, user_subject
+from services.streaming_upload import (
+    receive_multipart_file,
+    compress_upload,
+    commit_upload,
+    discard_upload,
+)
+from utils.pagination import encode_cursor, decode_cursor
+from utils.paths import normalize_relative_path, user_file_path
 
 router = APIRouter(
     prefix="/files",
     tags=["Files"],
 )
 
-UPLOAD_ROOT = "uploads"
-os.makedirs(UPLOAD_ROOT, exist_ok=True)
+ZipCompression = Literal["auto", "store", "deflate"]
+PreviewSize = Literal["small", "medium", "large"]
+# Content-Length multipart-тела больше размера файла на заголовки частей
+# и границы; с таким запасом тело заведомо не влезает в остаток квоты
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _cursor_position(sort: str, data: dict) -> tuple | None:
+    if "v" not in data:
+        return None
+    value = data["v"]
+    if sort == "uploaded_at" and value is not None:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise HTTPException(422, detail="Invalid cursor")
+    return value, data.get("i", 0)
+
+
+def _file_data(db: Session, record: File) -> StoredData:
+    blob = get_blob(db, record.checksum) if record.checksum else None
+    data = locate_file_data(record, blob.encoding if blob else None)
+    if data is None:
+        raise HTTPException(404, detail="Not found")
+    return data
+
+
+def _directory_zip_entries(db: Session, owner_id: int, path: str) -> list[ZipEntry] | None:
+    """
+    Содержимое папки path для ZIP-архива: файлы и пустые подпапки
+    с путями относительно path. None — такой папки нет.
+    """
+    files = list_files_under(db, owner_id, path)
+    directories = list_directories_under(db, owner_id, path)
+    if not files and not directories and path != f"user_{owner_id}":
+        directory = get_directory(db, path)
+        if directory is None or directory.owner_id != owner_id:
+            return None
+    start = len(path) + 1
+    # папки с файлами появятся в архиве сами — отдельно пишем только пустые
+    non_empty: set[str] = set()
+    for f in files:
+        parent = posixpath.dirname(f.filename)
+        while len(parent) > len(path) and parent not in non_empty:
+            non_empty.add(parent)
+            parent = posixpath.dirname(parent)
+    entries = [ZipEntry(arcname=d[start:]) for d in directories if d not in non_empty]
+    entries.extend(
+        ZipEntry(
+            arcname=f.filename[start:],
+            record=f,
+            size=f.size,
+            modified=f.uploaded_at,
+            mime_type=f.mime_type,
+            encoding=f.encoding,
+            stored_size=f.stored_size,
+        )
+        for f in files
+    )
+    return entries
 
 
 @router.get(
     "/",
     response_model=ListDirResponse,
     summary="List files and directories",
-    dependencies=[Depends(get_current_user)],
 )
 def list_dir(
     path: str = Query("", description="Relative path under user_{id}"),
+    sort: Literal["name", "size", "uploaded_at"] = Query("name"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    limit: int = Query(200, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     """
-    Возвращает:
+    Возвращает одну страницу содержимого директории:
       - directories: список имён вложенных папок
       - files: список имён файлов
-    по конкретной директории.
+      - next_cursor: курсор следующей страницы (keyset-пагинация)
+    Сначала отдаются папки, затем файлы. Запрашиваются только прямые
+    потомки папки — по индексу на parent.
     """
     user_prefix = f"user_{current_user.id}"
-    # полный префикс в таблицах
-    full_prefix = user_prefix + (f"/{path}" if path else "")
+    # полный путь папки в таблицах
+    full_prefix = user_prefix + (f"/{normalize_relative_path(path)}" if path.strip("/") else "")
+    descending = order == "desc"
+
+    state = decode_cursor(cursor) if cursor else {"k": "d"}
+    if state.get("k") not in ("d", "f"):
+        raise HTTPException(422, detail="Invalid cursor")
+    after = _cursor_position(sort, state)
 
-    # получаем все папки пользователя
-    all_dirs = get_directories_for_user(db, current_user.id)
-    # фильтруем дочерние: у которых путь начинается с full_prefix + '/'
-    # и не содержит дополнительного '/'
     children_dirs = []
-    for d in all_dirs:
-        p = d.path
-        if full_prefix:
-            if not p.startswith(full_prefix + "/"):
-                continue
-            rest = p[len(full_prefix) + 1 :]
-        else:
-            if not p.startswith(user_prefix + "/"):
-                continue
-            rest = p[len(user_prefix) + 1 :]
-        if "/" not in rest:
-            children_dirs.append(rest)
-
-    # файлы аналогично
-    files = db.query(FileModel).filter(FileModel.owner_id == current_user.id).all()
     children_files = []
-    for f in files:
-        fn = f.filename
-        if full_prefix:
-            if not fn.startswith(full_prefix + "/"):
-                continue
-            rest = fn[len(full_prefix) + 1 :]
-        else:
-            if not fn.startswith(user_prefix + "/"):
-                continue
-            rest = fn[len(user_prefix) + 1 :]
-        if "/" not in rest:
-            children_files.append(rest)
+    next_cursor = None
 
-    return ListDirResponse(directories=children_dirs, files=children_files)
+    if state["k"] == "d":
+        dirs = list_child_directories(
+            db, current_user.id, full_prefix, sort, descending, after, limit + 1
+        )
+        if len(dirs) > limit:
+            dirs = dirs[:limit]
+            last = dirs[-1]
+            value = getattr(last, DIRECTORY_SORT_COLUMNS[sort].key)
+            next_cursor = encode_cursor({"k": "d", "v": value, "i": last.id})
+        children_dirs = [d.path[len(full_prefix) + 1 :] for d in dirs]
+        after = None
+
+    remaining = limit - len(children_dirs)
+    if next_cursor is None and remaining == 0:
+        next_cursor = encode_cursor({"k": "f"})
+    elif next_cursor is None:
+        files = list_child_files(
+            db, current_user.id, full_prefix, sort, descending, after, remaining + 1
+        )
+        if len(files) > remaining:
+            files = files[:remaining]
+            last = files[-1]
+            value = getattr(last, FILE_SORT_COLUMNS[sort].key)
+            next_cursor = encode_cursor({"k": "f", "v": value, "i": last.id})
+        children_files = [f.filename[len(full_prefix) + 1 :] for f in files]
+
+    return ListDirResponse(
+        directories=children_dirs, files=children_files, next_cursor=next_cursor
+    )
 
 
 @router.post(
     "/{file_path:path}/mkdir",
     status_code=status.HTTP_201_CREATED,
     summary="Create a new directory",
-    dependencies=[Depends(get_current_user)],
 )
 def make_dir(
     file_path: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     """
     Создаёт новую запись Directory по полному относительному пути file_path.
@@ -132,116 +255,475 @@ def make_dir(
     return {"path": new_dir.path}
 
 
+@router.post(
+    "/{dir_path:path}/move",
+    summary="Move a directory with its contents",
+)
+def move_dir(
+    dir_path: str,
+    rename_in: RenameRequest,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Перемещает папку dir_path (полный путь, например "user_1/docs") со всем
+    содержимым в new_name (путь относительно user_{id}). Пути всех файлов
+    и подпапок переписываются одним набором UPDATE в одной транзакции.
+    """
+    user_prefix = f"user_{current_user.id}/"
+    if not dir_path.startswith(user_prefix):
+        raise HTTPException(404, detail="Not found")
+    source = user_file_path(current_user.id, dir_path[len(user_prefix):])
+    destination = user_file_path(current_user.id, rename_in.new_name)
+    files_moved, dirs_moved = move_directory(db, current_user.id, source, destination)
+    return {"path": destination, "files": files_moved, "directories": dirs_moved}
+
+
 @router.post(
     "/upload",
     response_model=FileInfo,
     status_code=status.HTTP_201_CREATED,
     summary="Upload a single file",
-    dependencies=[Depends(get_current_user)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                }
+            },
+        }
+    },
 )
 async def upload_file(
-    file: UploadFile = FileParam(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    user_prefix = f"user_{current_user.id}/"
-    rel_path = user_prefix + file.filename
-    abs_path = os.path.join(UPLOAD_ROOT, rel_path)
-    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-    with open(abs_path, "wb") as buf:
-        shutil.copyfileobj(file.file, buf)
+    """
+    Принимает multipart-поле file потоково, за один проход: тело пишется
+    во временный файл (попутно считаются SHA-256 и размер), текстовые
+    данные при выгоде сжимаются, затем файл публикуется в хранилище
+    под своим хешем. Диск — в пуле потоков, БД — через async-сессию,
+    чтобы медленный диск или БД не останавливали event loop.
+    """
+    remaining = await db.run_sync(quota_remaining, current_user.id)
+    # не держим соединение из пула, пока принимается тело
+    await db.rollback()
+    content_length = request.headers.get("content-length")
+    if (
+        remaining is not None
+        and content_length is not None
+        and content_length.isdigit()
+        and int(content_length) > remaining + MULTIPART_OVERHEAD
+    ):
+        raise HTTPException(413, detail="Storage quota exceeded")
+    received = await receive_multipart_file(
+        request,
+        lambda filename: user_file_path(current_user.id, filename),
+        throttle=rate_limiter.upload_throttle(user_subject(current_user.id)),
+        max_size=remaining,
+    )
+    rel_path = user_file_path(current_user.id, received.filename)
+    mime_type = received.content_type or guess_mime_type(rel_path)
 
     try:
-        file_record = create_file(db, rel_path, current_user.id)
+        await run_in_threadpool(compress_upload, received, mime_type)
+        file_record = await db.run_sync(
+            create_file,
+            rel_path,
+            current_user.id,
+            received.sha256,
+            received.size,
+            mime_type,
+            received.encoding,
+            received.stored_size,
+        )
+    except IntegrityError:
+        await db.rollback()
+        await run_in_threadpool(discard_upload, received)
+        raise HTTPException(400, detail="File already exists")
+    except BaseException:
+        await run_in_threadpool(discard_upload, received)
+        raise
+    blob = await db.run_sync(get_blob, received.sha256)
+    try:
+        await run_in_threadpool(commit_upload, received, blob.encoding)
+    except OSError:
+        await run_in_threadpool(discard_upload, received)
+        await db.run_sync(delete_file_record, rel_path)
+        raise
+    return file_record
+
+
+@router.post(
+    "/upload-by-hash",
+    response_model=FileInfo,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a file from already stored content",
+)
+def upload_by_hash(
+    upload_in: UploadByHashRequest,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Мгновенная загрузка: если содержимое с таким SHA-256 и размером уже есть
+    в хранилище, создаёт файл-ссылку без передачи данных. Иначе 404 —
+    клиент загружает файл обычным способом.
+    """
+    rel_path = user_file_path(current_user.id, upload_in.filename)
+    try:
+        file_record = create_file_from_blob(
+            db, rel_path, current_user.id, upload_in.sha256.lower(), upload_in.size
+        )
     except IntegrityError:
         db.rollback()
         raise HTTPException(400, detail="File already exists")
+    if file_record is None:
+        raise HTTPException(404, detail="Content not found")
     return file_record
 
 
+@router.post(
+    "/batch",
+    response_model=BatchResponse,
+    summary="Delete or move many files at once",
+)
+def batch(
+    batch_in: BatchRequest,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Пакетное удаление/перемещение файлов (пути — относительно user_{id}).
+    Операции применяются по порядку одной транзакцией; для каждой
+    возвращается свой результат, ошибка одной не отменяет остальные.
+    Старые файлы без checksum стираются с диска параллельно после коммита,
+    данные из blob-хранилища — сборщиком.
+    """
+    results, cleanup = apply_batch(db, current_user.id, batch_in.operations)
+    run_cleanup(cleanup)
+    return BatchResponse(results=results)
+
+
 @router.get(
     "/stats",
     response_model=FileStats,
     summary="Get user file statistics",
-    dependencies=[Depends(get_current_user)],
 )
 def stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    total_files, total_size = get_user_file_stats(db, current_user.id)
-    return FileStats(total_files=total_files, total_size=total_size)
+    total_files, total_size, stored_size = get_user_file_stats(db, current_user.id)
+    quota_bytes, _ = get_quota_usage(db, current_user.id)
+    return FileStats(
+        total_files=total_files,
+        total_size=total_size,
+        stored_size=stored_size,
+        quota_bytes=effective_quota(quota_bytes),
+    )
+
+
+@router.get(
+    "/search",
+    response_model=SearchResponse,
+    summary="Search files and directories by path",
+)
+def search(
+    q: str = Query(..., min_length=1, max_length=512, description="What to look for"),
+    mode: Literal["substring", "prefix", "glob"] = Query("substring"),
+    kind: Literal["all", "file", "directory"] = Query("all"),
+    path: str = Query("", description="Search only under this directory"),
+    file_type: Optional[str] = Query(
+        None, alias="type", description='MIME type ("image/png") or its major part ("image")'
+    ),
+    min_size: Optional[int] = Query(None, ge=0),
+    max_size: Optional[int] = Query(None, ge=0),
+    uploaded_after: Optional[datetime] = Query(None),
+    uploaded_before: Optional[datetime] = Query(None),
+    sort: Literal["name", "size", "uploaded_at"] = Query("name"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Ищет по путям во всём дереве пользователя (или в папке path):
+      - mode=substring — q встречается в пути;
+      - mode=prefix — имя файла или папки начинается с q;
+      - mode=glob — шаблон: "*.pdf", "docs/**/report-??.txt".
+    Регистр не важен. Фильтры type, min_size и max_size есть только у
+    файлов; uploaded_after/uploaded_before у папок сравниваются с датой
+    создания. Результаты — страницами с keyset-пагинацией, как в листинге.
+    """
+    scope = f"user_{current_user.id}"
+    if path.strip("/"):
+        scope += f"/{normalize_relative_path(path)}"
+    query = compile_query(mode, q)
+    filters = FileFilters(
+        min_size=min_size,
+        max_size=max_size,
+        mime_type=file_type.strip().lower() if file_type else None,
+        uploaded_after=uploaded_after,
+        uploaded_before=uploaded_before,
+    )
+    result = search_paths(
+        db, current_user.id, scope, query, filters,
+        kind, sort, order == "desc", cursor, limit,
+    )
+    root = len(f"user_{current_user.id}/")
+    return SearchResponse(
+        directories=result.directories,
+        files=[
+            SearchHit(
+                path=f.filename[root:],
+                size=f.size,
+                mime_type=f.mime_type,
+                uploaded_at=f.uploaded_at,
+            )
+            for f in result.files
+        ],
+        next_cursor=result.next_cursor,
+    )
 
 
 @router.get(
     "/download/{file_path:path}",
-    response_class=FileResponse,
+    response_class=StreamingResponse,
     summary="Download file",
-    dependencies=[Depends(get_current_user)],
 )
 def download_file(
     file_path: str,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
+    """
+    Скачивание с поддержкой Range (в т.ч. нескольких диапазонов), ETag
+    и условных запросов — плееры и менеджеры загрузок могут докачивать
+    и перематывать, не скачивая файл заново.
+    """
     record = crud_get_file(db, file_path)
     if not record or record.owner_id != current_user.id:
         raise HTTPException(404, detail="Not found")
-    abs_path = os.path.join(UPLOAD_ROOT, record.filename)
-    return FileResponse(path=abs_path, filename=os.path.basename(record.filename))
+    return throttle_response(
+        build_file_response(request, record, _file_data(db, record)),
+        rate_limiter.download_throttle(user_subject(current_user.id)),
+    )
+
+
+@router.get(
+    "/download-zip/{dir_path:path}",
+    response_class=StreamingResponse,
+    summary="Download directory as ZIP",
+)
+def download_directory(
+    dir_path: str,
+    compression: ZipCompression = Query("auto", description="auto | store | deflate"),
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Скачивание папки (полный путь, например "user_1/docs"; "user_1" — все
+    файлы) одним ZIP-архивом, который формируется на лету. compression=store
+    не сжимает ничего, auto — не сжимает уже сжатые медиа и архивы.
+    """
+    user_prefix = f"user_{current_user.id}"
+    if dir_path.rstrip("/") == user_prefix:
+        path = user_prefix
+    elif dir_path.startswith(user_prefix + "/"):
+        path = user_file_path(current_user.id, dir_path[len(user_prefix) + 1 :])
+    else:
+        raise HTTPException(404, detail="Not found")
+    entries = _directory_zip_entries(db, current_user.id, path)
+    if entries is None:
+        raise HTTPException(404, detail="Not found")
+    return throttle_response(
+        build_zip_response(path, entries, compression),
+        rate_limiter.download_throttle(user_subject(current_user.id)),
+    )
+
+
+@router.get(
+    "/preview/{file_path:path}",
+    response_class=Response,
+    summary="File preview",
+)
+async def preview_file(
+    file_path: str,
+    request: Request,
+    size: PreviewSize = Query("medium", description="small (128px) | medium (512px) | large (1280px)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    JPEG-миниатюра изображения или первой страницы PDF — списки файлов
+    могут показывать превью, не скачивая оригиналы. Превью рисуются
+    в отдельных процессах и кешируются по содержимому файла.
+    """
+    record = await db.run_sync(crud_get_file, file_path)
+    if not record or record.owner_id != current_user.id:
+        raise HTTPException(404, detail="Not found")
+    etag = f'"{preview_key(record)}-{size}"'
+    content = None
+    # превью одного содержимого не меняется — на 304 его не нужно даже читать
+    if not asset_not_modified(request, etag):
+        data = await db.run_sync(_file_data, record)
+        content = await get_preview(record, data, size)
+    return build_asset_response(content, PREVIEW_MEDIA_TYPE, etag)
+
+
+@router.delete(
+    "/{file_path:path}/public-link",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Revoke public links",
+)
+def revoke_public_link(
+    file_path: str,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Отзывает все выданные публичные ссылки на файл или папку.
+    """
+    record = crud_get_file(db, file_path)
+    if record and record.owner_id == current_user.id:
+        revoked = revoke_public_links(db, "f", [record])
+    else:
+        directory = get_directory(db, file_path)
+        if not directory or directory.owner_id != current_user.id:
+            raise HTTPException(404, detail="Not found")
+        revoked = revoke_public_links(db, "d", [directory])
+    db.commit()
+    remember_revocations(revoked)
 
 
 @router.delete(
     "/{file_path:path}",
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Delete file",
-    dependencies=[Depends(get_current_user)],
 )
 def delete_file(
     file_path: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     record = crud_get_file(db, file_path)
     if not record or record.owner_id != current_user.id:
         raise HTTPException(404, detail="Not found")
-    abs_path = os.path.join(UPLOAD_ROOT, record.filename)
-    if os.path.exists(abs_path):
-        os.remove(abs_path)
+    if record.checksum is None:
+        abs_path = legacy_path(record.filename)
+        if os.path.exists(abs_path):
+            os.remove(abs_path)
+        discard_previews(preview_key(record))
+    # отзыв фиксируется тем же коммитом, что и удаление
+    revoked = revoke_public_links(db, "f", [record])
     delete_file_record(db, record.filename)
+    remember_revocations(revoked)
 
 
 @router.post(
     "/{file_path:path}/public-link",
     response_model=PublicLinkResponse,
     summary="Generate public link",
-    dependencies=[Depends(get_current_user)],
 )
 def make_public_link(
     file_path: str,
+    expires_in: Optional[int] = Query(
+        None,
+        ge=60,
+        le=settings.PUBLIC_LINK_MAX_TTL_SECONDS,
+        description="Link lifetime in seconds (default PUBLIC_LINK_TTL_SECONDS)",
+    ),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
+    """
+    Подписанная публичная ссылка на файл или на папку (папка скачивается
+    ZIP-архивом) со сроком действия.
+    """
+    ttl = expires_in or settings.PUBLIC_LINK_TTL_SECONDS
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
     record = crud_get_file(db, file_path)
-    if not record or record.owner_id != current_user.id:
-        raise HTTPException(404, detail="Not found")
-    updated = create_public_link(db, file_path)
-    public_url = f"http://localhost:8002/files/public/{updated.public_token}"
+    if record and record.owner_id == current_user.id:
+        blob = get_blob(db, record.checksum) if record.checksum else None
+        token = issue_file_link(record, blob.encoding if blob else None, expires_at)
+        note_public_link(db, record, expires_at)
+        filename = record.filename
+    else:
+        directory = get_directory(db, file_path)
+        if not directory or directory.owner_id != current_user.id:
+            raise HTTPException(404, detail="Not found")
+        token = issue_directory_link(directory, expires_at)
+        note_public_link(db, directory, expires_at)
+        filename = directory.path
     return PublicLinkResponse(
-        filename=updated.filename,
-        public_token=updated.public_token,
-        public_url=public_url,
+        filename=filename,
+        public_token=token,
+        public_url=public_url(token),
+        expires_at=expires_at,
     )
 
 
 @router.get(
     "/public/{token}",
-    response_class=FileResponse,
+    response_class=StreamingResponse,
     summary="Download by public token",
 )
-def download_by_token(token: str, db: Session = Depends(get_db)):
-    record = get_file_by_token(db, token)
-    if not record:
-        raise HTTPException(404, detail="Invalid token")
-    abs_path = os.path.join(UPLOAD_ROOT, record.filename)
-    return FileResponse(path=abs_path, filename=os.path.basename(record.filename))
+def download_by_token(
+    token: str,
+    request: Request,
+    compression: ZipCompression = Query("auto", description="auto | store | deflate (folders only)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Подписанная ссылка проверяется без БД (подпись, срок, список отзыва),
+    и файл отдаётся по данным из самой ссылки; к БД обращаются только
+    папки (за списком файлов) и старые бессрочные UUID-токены.
+    """
+    subject = link_subject(token)
+    rate_limiter.check_request(subject)
+    throttle = rate_limiter.download_throttle(subject)
+    link = parse_public_link(token)
+    if link is None:
+        record = get_file_by_token(db, token)
+        if record:
+            response = build_file_response(request, record, _file_data(db, record), public=True)
+            if response.status_code == status.HTTP_200_OK:
+                count_download("f", record.id)
+            return throttle_response(response, throttle)
+        directory = get_directory_by_token(db, token)
+        if not directory:
+            raise HTTPException(404, detail="Invalid token")
+        cache_max_age = None
+    else:
+        cache_max_age = int((link.expires_at - datetime.now(timezone.utc)).total_seconds())
+        if link.kind == "f":
+            data = locate_file_data(link, link.encoding)
+            if data is None:
+                raise HTTPException(404, detail="Not found")
+            response = build_file_response(
+                request, link, data, public=True, cache_max_age=cache_max_age
+            )
+            # докачка (206) и ревалидация (304) — не новые скачивания
+            if response.status_code == status.HTTP_200_OK:
+                count_download("f", link.id)
+            return throttle_response(response, throttle)
+        directory = get_directory_by_id(db, link.id)
+        if not directory:
+            raise HTTPException(404, detail="Not found")
+    entries = _directory_zip_entries(db, directory.owner_id, directory.path)
+    count_download("d", directory.id)
+    return throttle_response(
+        build_zip_response(
+            directory.path, entries, compression, public=True, cache_max_age=cache_max_age
+        ),
+        throttle,
+    )
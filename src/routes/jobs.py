@@ -0,0 +1,116 @@
+# src/routes/jobs.py
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from database import get_db
+from auth.cache import AuthenticatedUser
+from auth.dependencies import get_current_user
+from crud.file import get_file
+from crud.job import create_job, get_job, list_jobs, request_cancel, retry_job
+from models.job import Job
+from schemas.job import JobInfo, UnpackJobCreate
+from services.jobs import wake_job_workers
+from utils.paths import user_file_path
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"],
+)
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+def _get_owned_job(db: Session, job_id: int, owner_id: int) -> Job:
+    job = get_job(db, job_id)
+    if not job or job.owner_id != owner_id:
+        raise HTTPException(404, detail="Job not found")
+    return job
+
+
+@router.post(
+    "/unpack",
+    response_model=JobInfo,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Unpack an uploaded ZIP archive in the background",
+)
+def create_unpack_job(
+    job_in: UnpackJobCreate,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Ставит распаковку ZIP-файла в очередь и сразу отвечает 202 с задачей;
+    ход выполнения — GET /jobs/{id}. Задача переживает перезапуск сервера.
+    """
+    path = user_file_path(current_user.id, job_in.path)
+    record = get_file(db, path)
+    if not record or record.owner_id != current_user.id:
+        raise HTTPException(404, detail="Not found")
+    job = create_job(db, current_user.id, "unpack_archive", {"path": path})
+    wake_job_workers()
+    return job
+
+
+@router.get(
+    "/",
+    response_model=list[JobInfo],
+    summary="List my jobs",
+)
+def list_my_jobs(
+    status: Optional[JobStatus] = Query(None, description="Filter by status"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    return list_jobs(db, current_user.id, status, limit)
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobInfo,
+    summary="Job status and progress",
+)
+def job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    return _get_owned_job(db, job_id, current_user.id)
+
+
+@router.post(
+    "/{job_id}/cancel",
+    response_model=JobInfo,
+    summary="Cancel a job",
+)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Задача из очереди отменяется сразу; выполняющаяся — в течение
+    нескольких секунд (cancel_requested = true, пока она не остановится).
+    """
+    job = _get_owned_job(db, job_id, current_user.id)
+    return request_cancel(db, job)
+
+
+@router.post(
+    "/{job_id}/retry",
+    response_model=JobInfo,
+    summary="Retry a failed or cancelled job",
+)
+def retry(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    job = _get_owned_job(db, job_id, current_user.id)
+    if not retry_job(db, job):
+        raise HTTPException(409, detail="Only failed or cancelled jobs can be retried")
+    wake_job_workers()
+    return job
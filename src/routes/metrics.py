@@ -0,0 +1,37 @@
+# src/routes/metrics.py
+
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from core.config import settings
+from services.metrics import metrics_response
+
+router = APIRouter(
+    tags=["Metrics"],
+)
+
+
+def require_metrics_token(request: Request) -> None:
+    """
+    Метрики раскрывают маршруты и нагрузку — отдаём их только скрейперу
+    с METRICS_TOKEN; без настроенного токена эндпоинта как будто нет.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise HTTPException(404, detail="Not Found")
+    supplied = request.headers.get("authorization", "")
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        raise HTTPException(
+            401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+@router.get(
+    "/metrics",
+    include_in_schema=False,
+    summary="Prometheus metrics",
+    dependencies=[Depends(require_metrics_token)],
+)
+def metrics():
+    return metrics_response()
@@ -0,0 +1,257 @@
+# src/routes/uploads.py
+
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from database import get_db, get_async_db
+from auth.cache import AuthenticatedUser
+from auth.dependencies import get_current_user
+from models.upload_session import UploadSession
+from schemas.file import FileInfo
+from schemas.upload_session import UploadSessionCreate, UploadSessionStatus
+from crud.blob import get_blob
+from crud.file import create_file, delete_file_record, get_file, guess_mime_type
+from crud.upload_session import (
+    create_upload_session,
+    get_upload_session,
+    record_chunk,
+    get_received_chunks,
+    delete_upload_session,
+)
+from services.quota import quota_remaining
+from services.rate_limit import rate_limiter, user_subject
+from services.upload_sessions import (
+    create_part_file,
+    ChunkWriter,
+    part_path,
+    remove_part_file,
+    chunk_bounds,
+    received_ranges,
+    purge_expired_sessions,
+)
+from services.blob_store import (
+    compress_for_storage,
+    hash_file,
+    store_blob_file,
+)
+from utils.errors import QuotaExceededError
+from utils.paths import user_file_path
+
+router = APIRouter(
+    prefix="/uploads",
+    tags=["Uploads"],
+)
+
+
+def _get_owned_session(db: Session, session_id: str, owner_id: int) -> UploadSession:
+    session = get_upload_session(db, session_id)
+    if not session or session.owner_id != owner_id:
+        raise HTTPException(404, detail="Upload session not found")
+    return session
+
+
+def _session_status(db: Session, session: UploadSession) -> UploadSessionStatus:
+    numbers = get_received_chunks(db, session.id)
+    received = set(numbers)
+    return UploadSessionStatus(
+        id=session.id,
+        filename=session.filename,
+        size=session.total_size,
+        chunk_size=session.chunk_size,
+        total_chunks=session.total_chunks,
+        received_ranges=received_ranges(numbers, session.chunk_size, session.total_size),
+        missing_chunks=[n for n in range(session.total_chunks) if n not in received],
+        expires_at=session.expires_at,
+    )
+
+
+@router.post(
+    "/",
+    response_model=UploadSessionStatus,
+    status_code=status.HTTP_201_CREATED,
+    summary="Start a resumable upload session",
+)
+def start_upload(
+    session_in: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Открывает сессию загрузки. Дальше клиент отправляет чанки
+    (в любом порядке и параллельно) и завершает загрузку через /commit.
+    """
+    purge_expired_sessions(db)
+
+    chunk_size = session_in.chunk_size or settings.UPLOAD_CHUNK_SIZE
+    if chunk_size > settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise HTTPException(400, detail="Chunk size is too large")
+    rel_path = user_file_path(current_user.id, session_in.filename)
+    if get_file(db, rel_path):
+        raise HTTPException(400, detail="File already exists")
+    remaining = quota_remaining(db, current_user.id)
+    if remaining is not None and session_in.size > remaining:
+        raise HTTPException(413, detail="Storage quota exceeded")
+
+    session = create_upload_session(
+        db,
+        owner_id=current_user.id,
+        filename=rel_path,
+        total_size=session_in.size,
+        chunk_size=chunk_size,
+        ttl_seconds=settings.UPLOAD_SESSION_TTL_SECONDS,
+    )
+    create_part_file(session.id, session.total_size)
+    return _session_status(db, session)
+
+
+@router.get(
+    "/{session_id}",
+    response_model=UploadSessionStatus,
+    summary="Get upload session progress",
+)
+def upload_status(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Возвращает уже принятые диапазоны и недостающие чанки —
+    по ним клиент возобновляет прерванную загрузку.
+    """
+    session = _get_owned_session(db, session_id, current_user.id)
+    return _session_status(db, session)
+
+
+@router.put(
+    "/{session_id}/chunks/{number}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Upload one chunk",
+)
+async def upload_chunk(
+    session_id: str,
+    number: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Принимает чанк number (тело запроса — сырые байты) и по мере приёма
+    пишет его по смещению number * chunk_size. Повторная отправка чанка
+    безопасна.
+    """
+    session = await db.run_sync(_get_owned_session, session_id, current_user.id)
+    if number < 0 or number >= session.total_chunks:
+        raise HTTPException(400, detail="Chunk number out of range")
+    start, end = chunk_bounds(number, session.chunk_size, session.total_size)
+    expected = end - start
+    session_id = session.id
+    # не держим соединение из пула, пока принимается тело
+    await db.rollback()
+
+    throttle = rate_limiter.upload_throttle(user_subject(current_user.id))
+    writer = ChunkWriter(session_id, start)
+    try:
+        await run_in_threadpool(writer.open)
+    except FileNotFoundError:
+        raise HTTPException(404, detail="Upload session not found")
+    received = 0
+    try:
+        async for piece in request.stream():
+            received += len(piece)
+            if received > expected:
+                raise HTTPException(413, detail="Chunk is larger than expected")
+            await run_in_threadpool(writer.write, [piece])
+            if throttle is not None:
+                await throttle(len(piece))
+    finally:
+        await run_in_threadpool(writer.close)
+    if received != expected:
+        raise HTTPException(400, detail="Chunk size mismatch")
+
+    recorded = await db.run_sync(
+        record_chunk, session_id, number, expected, settings.UPLOAD_SESSION_TTL_SECONDS
+    )
+    if not recorded:
+        raise HTTPException(404, detail="Upload session not found")
+
+
+@router.post(
+    "/{session_id}/commit",
+    response_model=FileInfo,
+    status_code=status.HTTP_201_CREATED,
+    summary="Assemble uploaded chunks into a file",
+)
+def commit_upload(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Проверяет, что все чанки приняты, регистрирует файл user_{id}/…
+    через create_file и переносит собранные данные в blob-хранилище.
+    """
+    session = _get_owned_session(db, session_id, current_user.id)
+    received = get_received_chunks(db, session.id)
+    if len(received) != session.total_chunks:
+        raise HTTPException(409, detail="Upload is incomplete")
+
+    try:
+        checksum, size = hash_file(part_path(session.id))
+    except FileNotFoundError:
+        raise HTTPException(404, detail="Upload session not found")
+    mime_type = guess_mime_type(session.filename)
+    # собранный файл остаётся на месте, пока запись не создана:
+    # при конфликте имени сессию можно повторить
+    data_path, encoding, stored_size = compress_for_storage(
+        part_path(session.id), size, mime_type, keep_source=True
+    )
+    try:
+        file_record = create_file(
+            db, session.filename, current_user.id, checksum, size, mime_type,
+            encoding, stored_size,
+        )
+    except IntegrityError:
+        db.rollback()
+        if encoding is not None:
+            os.remove(data_path)
+        raise HTTPException(400, detail="File already exists")
+    except QuotaExceededError:
+        # сессия остаётся: освободив место, коммит можно повторить
+        if encoding is not None:
+            os.remove(data_path)
+        raise
+    try:
+        if get_blob(db, checksum).encoding == encoding:
+            store_blob_file(data_path, checksum, encoding)
+        else:
+            os.remove(data_path)
+    except OSError:
+        delete_file_record(db, file_record.filename)
+        raise HTTPException(404, detail="Upload session not found")
+
+    delete_upload_session(db, session)
+    if encoding is not None:
+        # в хранилище ушла сжатая копия — исходная сборка больше не нужна
+        remove_part_file(session.id)
+    return file_record
+
+
+@router.delete(
+    "/{session_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Abort an upload session",
+)
+def abort_upload(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    session = _get_owned_session(db, session_id, current_user.id)
+    delete_upload_session(db, session)
+    remove_part_file(session_id)
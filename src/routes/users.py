@@ -1,14 +1,23 @@
 # src/routes/users.py
 
-from typing import List
-from fastapi import APIRouter, Depends, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from crud.user import get_users, get_user, update_user, delete_user
+from crud.user import get_users_with_usage, get_user, aupdate_user, delete_user
+from crud.usage import get_usage
+from crud.file import get_files_page
+from models.user import User
+from models.usage import UserUsage
 from schemas.user import UserRead, UserUpdate
+from schemas.file import FilePage
+from utils.errors import ValidationError
 from utils.exceptions import get_error_404
-from database import get_db
+from utils.pagination import encode_cursor, decode_cursor
+from database import get_db, get_async_db
 from auth.dependencies import get_current_user
+from auth.passwords import hash_password
 
 router = APIRouter(
     prefix="/users",
@@ -17,36 +26,35 @@ router = APIRouter(
 )
 
 
+def to_user_read(user: User, usage: Optional[UserUsage]) -> UserRead:
+    return UserRead(
+        id=user.id,
+        email=user.email,
+        file_count=usage.file_count if usage else 0,
+        total_bytes=usage.total_bytes if usage else 0,
+    )
+
+
 @router.get(
     "/",
     response_model=List[UserRead],
     summary="List users",
-    response_description="A list of user profiles with their filenames"
+    response_description="A list of user profiles with their file count and total size"
 )
 def read_users(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
 ):
-    users = get_users(db, skip, limit)
-    result: List[UserRead] = []
-    for u in users:
-        filenames = [f.filename for f in u.files]
-        result.append(
-            UserRead(
-                id=u.id,
-                email=u.email,
-                files=filenames
-            )
-        )
-    return result
+    rows = get_users_with_usage(db, skip, limit)
+    return [to_user_read(u, usage) for u, usage in rows]
 
 
 @router.get(
     "/{user_id}",
     response_model=UserRead,
     summary="Get user by ID",
-    response_description="The user with the given ID and their filenames"
+    response_description="The user with the given ID, their file count and total size"
 )
 def read_user(
     user_id: int,
@@ -54,12 +62,31 @@ def read_user(
 ):
     u = get_user(db, user_id)
     get_error_404(u)
-    filenames = [f.filename for f in u.files]
-    return UserRead(
-        id=u.id,
-        email=u.email,
-        files=filenames
-    )
+    return to_user_read(u, get_usage(db, u.id))
+
+
+@router.get(
+    "/{user_id}/files",
+    response_model=FilePage,
+    summary="List a user's files",
+    response_description="One page of the user's files and the cursor of the next page"
+)
+def read_user_files(
+    user_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    get_error_404(get_user(db, user_id))
+    after_id = decode_cursor(cursor).get("i") if cursor else None
+    if after_id is not None and (not isinstance(after_id, int) or isinstance(after_id, bool)):
+        raise ValidationError("Invalid cursor")
+    files = get_files_page(db, user_id, after_id, limit + 1)
+    next_cursor = None
+    if len(files) > limit:
+        files = files[:limit]
+        next_cursor = encode_cursor({"i": files[-1].id})
+    return FilePage(files=files, next_cursor=next_cursor)
 
 
 @router.put(
@@ -68,20 +95,21 @@ def read_user(
     summary="Update a user",
     response_description="The updated user profile"
 )
-def edit_user(
+async def edit_user(
     user_id: int,
     user_in: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    existing = get_user(db, user_id)
+    existing = await db.run_sync(get_user, user_id)
     get_error_404(existing)
-    updated = update_user(db, user_id, user_in)
-    filenames = [f.filename for f in updated.files]
-    return UserRead(
-        id=updated.id,
-        email=updated.email,
-        files=filenames
-    )
+    hashed_password = None
+    if user_in.password is not None:
+        # bcrypt — в пуле процессов и без открытой транзакции
+        await db.rollback()
+        hashed_password = await hash_password(user_in.password)
+    updated = await aupdate_user(db, user_id, user_in.email, hashed_password)
+    get_error_404(updated)
+    return to_user_read(updated, await db.run_sync(get_usage, updated.id))
 
 
 @router.delete(
@@ -0,0 +1,41 @@
+# src/schemas/change.py
+
+from datetime import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+
+class ChangeInfo(BaseModel):
+    """
+    Одно изменение в дереве пользователя. Пути — относительно
+    user_{owner_id}; old_path — прежний путь (только для move).
+    Перемещение папки — одна запись kind="directory": клиент сам
+    переносит всё, что лежало под old_path.
+    """
+    seq: int
+    op: Literal["create", "delete", "move"]
+    kind: Literal["file", "directory"]
+    path: str
+    old_path: Optional[str] = None
+    size: Optional[int] = None
+    checksum: Optional[str] = None
+    created_at: datetime
+
+
+class ChangePage(BaseModel):
+    """
+    Изменения после запрошенного курсора по порядку. cursor — что
+    передать в следующий раз; has_more = true — забирайте следующую
+    страницу сразу, не дожидаясь.
+    """
+    changes: list[ChangeInfo]
+    cursor: int
+    has_more: bool
+
+
+class ChangeCursor(BaseModel):
+    """
+    Номер последнего изменения: с него начинает клиент, который только
+    что прочитал всё дерево целиком.
+    """
+    cursor: int
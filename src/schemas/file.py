@@ -1,7 +1,10 @@
 # src/schemas/file.py
 
 from datetime import datetime
-from pydantic import BaseModel
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+from core.config import settings
 
 
 class FileInfo(BaseModel):
@@ -14,7 +17,15 @@ class FileInfo(BaseModel):
     uploaded_at: datetime
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+
+class FilePage(BaseModel):
+    """
+    Страница списка файлов; next_cursor = null — страниц больше нет.
+    """
+    files: list[FileInfo]
+    next_cursor: Optional[str] = None
 
 
 class RenameRequest(BaseModel):
@@ -26,6 +37,17 @@ class RenameRequest(BaseModel):
     new_name: str
 
 
+class UploadByHashRequest(BaseModel):
+    """
+    Запрос «мгновенной» загрузки по хешу содержимого:
+      • filename — путь относительно user_{owner_id};
+      • sha256 и size — хеш и размер содержимого, уже известного серверу.
+    """
+    filename: str
+    sha256: str = Field(pattern=r"^[0-9a-fA-F]{64}$")
+    size: int = Field(ge=0)
+
+
 class FileDetail(FileInfo):
     """
     Детальная информация о файле + размер.
@@ -35,10 +57,14 @@ class FileDetail(FileInfo):
 
 class FileStats(BaseModel):
     """
-    Объём и количество файлов пользователя.
+    Объём и количество файлов пользователя: total_size — исходный
+    размер, stored_size — сколько занято в хранилище с учётом сжатия,
+    quota_bytes — квота на total_size (None — без ограничения).
     """
     total_files: int
     total_size: int
+    stored_size: int
+    quota_bytes: Optional[int] = None
 
 
 class PublicLinkResponse(BaseModel):
@@ -46,22 +72,83 @@ class PublicLinkResponse(BaseModel):
     Ответ при генерации публичной ссылки:
     {
         "filename": "user_3/docs/a.txt",
-        "public_token": "550e8400-e29b-41d4-a716-446655440000",
-        "public_url": "http://localhost:8002/files/public/550e8400-e29b-41d4-a716-446655440000"
+        "public_token": "eyJrIjoiZiIsImkiOjd9.Vb6mV5nC3f0hXgqzE1p2ZQ",
+        "public_url": "http://localhost:8002/files/public/eyJrIjoiZiIsImkiOjd9.Vb6mV5nC3f0hXgqzE1p2ZQ",
+        "expires_at": "2025-01-08T12:00:00Z"
     }
+    Токен подписан и проверяется без обращения к БД; отозвать все ссылки
+    на объект — DELETE /files/{path}/public-link.
     """
     filename: str
     public_token: str
     public_url: str
+    expires_at: Optional[datetime] = None
 
 
 class ListDirResponse(BaseModel):
     """
-    Ответ при запросе содержимого директории:
+    Ответ при запросе содержимого директории (одна страница):
     {
       "directories": ["subdir1", ...],
-      "files": ["file1.txt", ...]
+      "files": ["file1.txt", ...],
+      "next_cursor": "eyJrIjoiZiIs..."   // null — страниц больше нет
     }
+    Сначала идут папки, затем файлы.
     """
     directories: list[str]
     files: list[str]
+    next_cursor: Optional[str] = None
+
+
+class SearchHit(BaseModel):
+    """
+    Найденный файл; path — относительно user_{owner_id}.
+    """
+    path: str
+    size: Optional[int] = None
+    mime_type: Optional[str] = None
+    uploaded_at: Optional[datetime] = None
+
+
+class SearchResponse(BaseModel):
+    """
+    Страница результатов поиска: сначала папки, затем файлы.
+    Страница может быть короче limit, если поиск упёрся в лимит
+    просмотренных строк; next_cursor = null — результатов больше нет.
+    """
+    directories: list[str]
+    files: list[SearchHit]
+    next_cursor: Optional[str] = None
+
+
+class BatchOperation(BaseModel):
+    """
+    Одна операция пакетного запроса:
+      • op — "delete" или "move";
+      • path — путь файла относительно user_{owner_id};
+      • destination — новый путь (только для move), тоже относительно user_{owner_id}.
+    """
+    op: Literal["delete", "move"]
+    path: str
+    destination: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(
+        min_length=1, max_length=settings.BATCH_MAX_OPERATIONS
+    )
+
+
+class BatchItemResult(BaseModel):
+    """
+    Результат операции с тем же индексом, что и в запросе:
+    status = "ok" или "error" (причина — в detail).
+    """
+    op: str
+    path: str
+    status: Literal["ok", "error"]
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    results: list[BatchItemResult]
@@ -0,0 +1,35 @@
+# src/schemas/job.py
+
+from datetime import datetime
+from typing import Any, Literal, Optional
+from pydantic import BaseModel
+
+
+class UnpackJobCreate(BaseModel):
+    """
+    Распаковать уже загруженный ZIP-файл path (относительно user_{owner_id},
+    например "archives/photos.zip") в папку пользователя.
+    """
+    path: str
+
+
+class JobInfo(BaseModel):
+    """
+    Состояние фоновой задачи. progress_done / progress_total — прогресс
+    в единицах задачи (для распаковки — байты); total = null — неизвестен.
+    """
+    id: int
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    progress_done: int
+    progress_total: Optional[int] = None
+    attempts: int
+    cancel_requested: bool
+    error: Optional[str] = None
+    result: Optional[dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,32 @@
+# src/schemas/upload_session.py
+
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class UploadSessionCreate(BaseModel):
+    """
+    Запрос на создание сессии загрузки:
+      • filename — путь относительно user_{owner_id}, например "video/big.mkv";
+      • size — полный размер файла в байтах;
+      • chunk_size — желаемый размер чанка (по умолчанию из настроек).
+    """
+    filename: str
+    size: int = Field(ge=0)
+    chunk_size: Optional[int] = Field(default=None, gt=0)
+
+
+class UploadSessionStatus(BaseModel):
+    """
+    Состояние сессии: какие байтовые диапазоны [start, end) уже приняты
+    сервером и какие номера чанков ещё нужно отправить.
+    """
+    id: str
+    filename: str
+    size: int
+    chunk_size: int
+    total_chunks: int
+    received_ranges: list[tuple[int, int]]
+    missing_chunks: list[int]
+    expires_at: datetime
@@ -1,6 +1,6 @@
 # src/schemas/user.py
 
-from typing import List, Optional
+from typing import Optional
 from pydantic import BaseModel, EmailStr
 
 
@@ -19,7 +19,9 @@ class UserUpdate(BaseModel):
 
 class UserRead(UserBase):
     id: int
-    files: List[str] = []  # <-- добавили поле files
+    # сводка вместо полного списка файлов; сами файлы — /users/{id}/files
+    file_count: int = 0
+    total_bytes: int = 0
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,182 @@
+# src/services/archive_import.py
+
+import hashlib
+import os
+import posixpath
+import zipfile
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from services.blob_store import local_file_data, locate_file_data, new_staging_file
+from utils.errors import NotFoundError, ValidationError
+from utils.paths import normalize_relative_path
+
+COPY_CHUNK_SIZE = 1024 * 1024
+# маленькие файлы из нулей легко сжимаются в сотни раз — степень сжатия
+# проверяем только у записей крупнее этого порога
+RATIO_CHECK_MIN_SIZE = 1024 * 1024
+
+
+@dataclass
+class StagedMember:
+    """
+    Файл из архива, уже распакованный во временный файл blob-хранилища.
+    """
+    path: str  # нормализованный путь внутри архива, например "docs/a.txt"
+    tmp_path: str
+    sha256: str
+    size: int
+
+
+@dataclass
+class StagedArchive:
+    members: list[StagedMember]
+    # все папки архива: явные записи "docs/" и родители файлов
+    directories: set[str]
+
+
+def _archive_path(info: zipfile.ZipInfo) -> str:
+    try:
+        return normalize_relative_path(info.filename)
+    except ValidationError:
+        raise ValidationError(f"Unsafe path in archive: {info.filename!r}")
+
+
+def _plan(zf: zipfile.ZipFile) -> tuple[list[tuple[zipfile.ZipInfo, str]], set[str]]:
+    """
+    Проверяет оглавление архива до распаковки: число записей, заявленный
+    суммарный размер, степень сжатия, пути (zip slip) и шифрование.
+    Повторяющиеся имена — берётся первая запись.
+    """
+    infos = zf.infolist()
+    if len(infos) > settings.ARCHIVE_MAX_ENTRIES:
+        raise ValidationError(
+            f"Archive has too many entries (limit {settings.ARCHIVE_MAX_ENTRIES})"
+        )
+
+    entries: list[tuple[zipfile.ZipInfo, str]] = []
+    directories: set[str] = set()
+    seen: set[str] = set()
+    total = 0
+    for info in infos:
+        path = _archive_path(info)
+        if info.is_dir():
+            directories.add(path)
+            continue
+        if info.flag_bits & 0x1:
+            raise ValidationError("Encrypted archives are not supported")
+        if (
+            info.file_size > RATIO_CHECK_MIN_SIZE
+            and info.file_size > settings.ARCHIVE_MAX_COMPRESSION_RATIO * max(info.compress_size, 1)
+        ):
+            raise ValidationError(f"Suspicious compression ratio for {path!r}")
+        if path in seen:
+            continue
+        seen.add(path)
+        total += info.file_size
+        if total > settings.ARCHIVE_MAX_TOTAL_SIZE:
+            raise ValidationError("Archive is too large when unpacked")
+        entries.append((info, path))
+        parent = posixpath.dirname(path)
+        while parent:
+            directories.add(parent)
+            parent = posixpath.dirname(parent)
+
+    if directories & seen:
+        raise ValidationError("Archive has a file and a folder with the same name")
+    return entries, directories
+
+
+def _stage_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, path: str) -> StagedMember:
+    """
+    Потоково распаковывает одну запись во временный файл, считая SHA-256.
+    Заголовкам архива не доверяем: если данных больше заявленного размера,
+    распаковка прерывается — так суммарный объём не превысит проверенный в _plan.
+    """
+    fd, tmp_path = new_staging_file()
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out, zf.open(info) as src:
+            while chunk := src.read(COPY_CHUNK_SIZE):
+                size += len(chunk)
+                if size > info.file_size:
+                    raise ValidationError(f"Archive entry {path!r} is larger than declared")
+                hasher.update(chunk)
+                out.write(chunk)
+    except zipfile.BadZipFile:
+        os.remove(tmp_path)
+        raise ValidationError(f"Corrupted archive entry {path!r}")
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return StagedMember(path=path, tmp_path=tmp_path, sha256=hasher.hexdigest(), size=size)
+
+
+def stage_archive(
+    zf: zipfile.ZipFile, progress: Callable[[int, int], None] | None = None
+) -> StagedArchive:
+    """
+    Распаковывает файлы архива во временные файлы внутри blob-хранилища,
+    откуда после коммита они атомарно переименовываются под свой хеш.
+    Распаковка потоковая: в памяти — не больше одного куска данных.
+    progress(распаковано_байт, всего_байт) вызывается после каждого файла
+    и может прервать распаковку исключением (отмена фоновой задачи).
+    При ошибке все уже распакованные файлы удаляются.
+    """
+    entries, directories = _plan(zf)
+    total = sum(info.file_size for info, _ in entries)
+    done = 0
+    members: list[StagedMember] = []
+    try:
+        if progress is not None:
+            progress(0, total)
+        for info, path in entries:
+            members.append(_stage_member(zf, info, path))
+            done += members[-1].size
+            if progress is not None:
+                progress(done, total)
+    except BaseException:
+        discard_staged(members)
+        raise
+    return StagedArchive(members=members, directories=directories)
+
+
+def discard_staged(members: list[StagedMember]) -> None:
+    for member in members:
+        try:
+            os.remove(member.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+def run_unpack_job(db: Session, job) -> dict:
+    """
+    Фоновая задача "unpack_archive": распаковывает уже загруженный
+    ZIP-файл payload["path"] в папку пользователя (см.
+    unpack_and_register_directory). job — контекст из services.jobs.
+    """
+    from crud.blob import get_blob
+    from crud.file import get_file, unpack_and_register_directory
+
+    record = get_file(db, job.payload["path"])
+    if record is None or record.owner_id != job.owner_id:
+        raise NotFoundError("Archive not found")
+    blob = get_blob(db, record.checksum) if record.checksum else None
+    data = locate_file_data(record, blob.encoding if blob else None)
+    if data is None:
+        raise NotFoundError("Archive data not found")
+    src_path, temporary = local_file_data(data)
+    try:
+        if not zipfile.is_zipfile(src_path):
+            raise ValidationError("Not a ZIP archive")
+        created = unpack_and_register_directory(
+            db, src_path, job.owner_id, progress=job.progress
+        )
+    finally:
+        if temporary:
+            os.remove(src_path)
+    return {"files": len(created)}
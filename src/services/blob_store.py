@@ -0,0 +1,229 @@
+# src/services/blob_store.py
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.blob import delete_orphaned_blob, list_orphaned_blobs
+from models.file import File
+from services.compression import (
+    ENCODING_SUFFIXES,
+    choose_encoding,
+    compress_file,
+    iter_decompressed,
+)
+from services.storage import storage
+from services.storage.base import READ_CHUNK_SIZE
+from services.storage.local import iter_local_range
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredData:
+    """
+    Где и как лежат данные файла: ключ в хранилище (None — старый путь
+    на локальном диске), исходный размер, сжатие и размер в хранилище.
+    """
+    key: str | None
+    path: str | None
+    size: int
+    encoding: str | None = None
+    stored_size: int | None = None
+
+
+def blob_key(sha256: str, encoding: str | None = None) -> str:
+    """
+    Ключ blob'а в хранилище. Сжатые данные лежат под своим ключом
+    (<sha256>.gz / .zst), поэтому повторная загрузка того же содержимого
+    с другим сжатием не может подменить байты, которые описывает запись Blob.
+    """
+    if encoding is None:
+        return sha256
+    return f"{sha256}.{ENCODING_SUFFIXES[encoding]}"
+
+
+def legacy_path(filename: str) -> str:
+    """
+    Записи, созданные до появления blob-хранилища (checksum пуст), лежат
+    на локальном диске по старому пути uploads/<filename>.
+    """
+    return os.path.join(settings.UPLOAD_ROOT, filename)
+
+
+def blob_file_data(
+    sha256: str, size: int, encoding: str | None = None, stored_size: int | None = None
+) -> StoredData:
+    """
+    Описание данных blob'а по метаданным из БД, без обращения к хранилищу.
+    """
+    if stored_size is None:
+        stored_size = size
+    return StoredData(blob_key(sha256, encoding), None, size, encoding, stored_size)
+
+
+def locate_file_data(record: File, encoding: str | None = None) -> StoredData | None:
+    """
+    Находит данные файла (record — запись File или строка с полями
+    filename/checksum/size; encoding — сжатие его blob'а).
+    None — данных в хранилище нет.
+    """
+    if record.checksum:
+        key = blob_key(record.checksum, encoding)
+        stored_size = storage.size(key)
+        if stored_size is None:
+            return None
+        size = record.size if encoding is not None and record.size is not None else stored_size
+        return StoredData(key, None, size, encoding, stored_size)
+    path = legacy_path(record.filename)
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return None
+    return StoredData(None, path, size)
+
+
+def iter_stored_data(data: StoredData, start: int, end: int) -> Iterator[bytes]:
+    """
+    Байты [start, end] в том виде, как они лежат в хранилище (сжатые).
+    """
+    if data.key is None:
+        return iter_local_range(data.path, start, end)
+    return storage.iter_range(data.key, start, end)
+
+
+def iter_file_data(data: StoredData, start: int, end: int) -> Iterator[bytes]:
+    """
+    Байты [start, end] исходного содержимого; сжатые данные
+    распаковываются потоково.
+    """
+    if data.encoding is None:
+        return iter_stored_data(data, start, end)
+    return iter_decompressed(
+        iter_stored_data(data, 0, data.stored_size - 1),
+        data.encoding,
+        start,
+        end,
+        READ_CHUNK_SIZE,
+    )
+
+
+def local_file_data(data: StoredData) -> tuple[str, bool]:
+    """
+    Путь к исходному содержимому на локальном диске — для кода, которому
+    нужен настоящий файл (распаковка архива, отрисовка превью). Из S3
+    и сжатых blob'ов данные выгружаются во временный файл; второй
+    элемент — True, если этот файл после использования надо удалить.
+    """
+    if data.key is None:
+        return data.path, False
+    if data.encoding is None:
+        path = storage.local_path(data.key)
+        if path is not None:
+            return path, False
+    fd, tmp_path = new_staging_file()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter_file_data(data, 0, data.size - 1):
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, True
+
+
+def new_staging_file() -> tuple[int, str]:
+    os.makedirs(storage.staging_dir, exist_ok=True)
+    return tempfile.mkstemp(dir=storage.staging_dir, prefix=".upload-")
+
+
+def hash_file(path: str) -> tuple[str, int]:
+    """
+    Считает (sha256, размер) файла, читая его кусками.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def compress_for_storage(
+    src_path: str, size: int, mime_type: str | None, keep_source: bool = False
+) -> tuple[str, str | None, int]:
+    """
+    Сжимает временный файл, если это выгодно (см. choose_encoding).
+    Возвращает (путь, encoding, размер в хранилище); при сжатии
+    возвращается новый временный файл, а исходный удаляется,
+    если не передан keep_source.
+    """
+    encoding = choose_encoding(src_path, size, mime_type)
+    if encoding is None:
+        return src_path, None, size
+    fd, dst_path = new_staging_file()
+    os.close(fd)
+    try:
+        stored_size = compress_file(src_path, dst_path, encoding)
+    except BaseException:
+        os.remove(dst_path)
+        raise
+    if stored_size >= size:
+        # выборка обманула — весь файл не сжался
+        os.remove(dst_path)
+        return src_path, None, size
+    if not keep_source:
+        os.remove(src_path)
+    return dst_path, encoding, stored_size
+
+
+def store_blob_file(src_path: str, sha256: str, encoding: str | None = None) -> None:
+    """
+    Публикует локальный временный файл src_path в хранилище под ключом
+    blob'а. Одинаковое содержимое с одинаковым сжатием даёт одинаковый
+    ключ, поэтому повторная запись безопасна для читателей.
+    """
+    storage.put_file(blob_key(sha256, encoding), src_path)
+
+
+def remove_blob_file(sha256: str) -> None:
+    from services.previews import discard_previews
+
+    # под хешем могли остаться данные с разным сжатием — убираем все варианты
+    storage.delete(sha256)
+    for encoding in ENCODING_SUFFIXES:
+        storage.delete(blob_key(sha256, encoding))
+    discard_previews(sha256)
+
+
+def collect_orphaned_blobs(db: Session, batch_size: int = 500) -> int:
+    """
+    Сборщик мусора blob-хранилища: стирает данные blob'ов, на которые
+    никто не ссылается дольше BLOB_GC_GRACE_SECONDS. Запись удаляется
+    и данные стираются в одной транзакции, по одному blob'у: пока она
+    не закоммичена, загрузка того же содержимого ждёт на строке Blob
+    и после коммита запишет данные заново. Возвращает число стёртых blob'ов.
+    """
+    older_than = datetime.now(timezone.utc) - timedelta(seconds=settings.BLOB_GC_GRACE_SECONDS)
+    removed = 0
+    while True:
+        candidates = list_orphaned_blobs(db, older_than, batch_size)
+        db.rollback()
+        for sha256 in candidates:
+            try:
+                if delete_orphaned_blob(db, sha256, older_than):
+                    remove_blob_file(sha256)
+                    removed += 1
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+        if len(candidates) < batch_size:
+            return removed
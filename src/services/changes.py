@@ -0,0 +1,118 @@
+# src/services/changes.py
+"""
+Лента изменений для синхронизации клиентов (GET /changes).
+
+Клиент хранит номер последнего увиденного изменения (cursor) и забирает
+только то, что произошло после него: проход синхронизации по неизменному
+аккаунту — один запрос по индексу (owner_id, seq), сколько бы файлов
+ни было. С wait=N запрос ждёт до N секунд, пока что-нибудь не изменится.
+
+Коммит, записавший изменения, сразу будит ожидающие запросы этого
+пользователя в том же процессе. Изменения, сделанные другим процессом,
+ожидающий замечает, перепроверяя журнал раз в CHANGES_RECHECK_SECONDS,
+не держа соединение с БД между проверками.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.change import CHANGED_OWNERS, list_changes
+from utils.errors import AppError
+
+
+class ChangeNotifier:
+    """
+    Ожидающие long-poll запросы процесса по пользователям. notify можно
+    вызывать из любого потока (сессии работают и в пуле потоков).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: dict[int, set] = defaultdict(set)
+
+    def notify(self, owner_ids) -> None:
+        with self._lock:
+            waiters = [w for owner_id in owner_ids for w in self._waiters.get(owner_id, ())]
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # цикл событий уже закрыт
+                pass
+
+    @contextmanager
+    def subscribe(self, owner_id: int):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[owner_id].add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(owner_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[owner_id]
+
+
+notifier = ChangeNotifier()
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session):
+    owners = session.info.pop(CHANGED_OWNERS, None)
+    if owners:
+        notifier.notify(owners)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop(CHANGED_OWNERS, None)
+
+
+def read_changes(db: Session, owner_id: int, cursor: int, limit: int) -> list:
+    """
+    До limit + 1 изменений после cursor (лишнее — признак, что есть ещё).
+    Если первое из них идёт не сразу за cursor, нужные записи уже удалены
+    из журнала (старше CHANGES_RETENTION_SECONDS) — 410, клиенту придётся
+    заново прочитать дерево.
+    """
+    rows = list_changes(db, owner_id, cursor, limit + 1)
+    if rows and rows[0].seq != cursor + 1:
+        raise AppError("Cursor has expired, full resync required", status_code=410)
+    return rows
+
+
+async def wait_for_changes(
+    db: AsyncSession, owner_id: int, cursor: int, limit: int, wait: float
+) -> list:
+    """
+    read_changes, но если изменений нет — ждёт их до wait секунд.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    with notifier.subscribe(owner_id) as changed:
+        while True:
+            # сигнал, пришедший во время чтения, не потеряется: после
+            # чтения ожидание закончится сразу
+            changed.clear()
+            rows = await db.run_sync(read_changes, owner_id, cursor, limit)
+            # соединение возвращаем в пул, пока ждём
+            await db.rollback()
+            remaining = deadline - loop.time()
+            if rows or remaining <= 0:
+                return rows
+            try:
+                await asyncio.wait_for(
+                    changed.wait(), min(remaining, settings.CHANGES_RECHECK_SECONDS)
+                )
+            except asyncio.TimeoutError:
+                pass
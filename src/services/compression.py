@@ -0,0 +1,184 @@
+# src/services/compression.py
+
+import gzip
+import io
+import os
+import shutil
+import zlib
+from typing import Iterator
+
+from core.config import settings
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Уже сжатые форматы: повторно сжимать их бессмысленно
+PRECOMPRESSED_MIME_PREFIXES = ("image/", "video/", "audio/")
+PRECOMPRESSED_MIME_EXCEPTIONS = {
+    "image/svg+xml", "image/bmp", "image/x-ms-bmp", "image/tiff", "audio/wav", "audio/x-wav",
+}
+PRECOMPRESSED_MIME_TYPES = {
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+    "application/vnd.rar",
+    "application/zstd",
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+# Хорошо сжимаемые форматы: текст, логи, JSON, CSV...
+COMPRESSIBLE_MIME_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+    "application/x-javascript",
+    "application/x-yaml",
+    "application/yaml",
+    "application/sql",
+    "application/x-sh",
+    "application/csv",
+    "image/svg+xml",
+}
+
+# расширение ключа в хранилище для каждой кодировки
+ENCODING_SUFFIXES = {"gzip": "gz", "zstd": "zst"}
+
+
+def is_precompressed(mime_type: str | None) -> bool:
+    if not mime_type or mime_type in PRECOMPRESSED_MIME_EXCEPTIONS:
+        return False
+    return mime_type in PRECOMPRESSED_MIME_TYPES or mime_type.startswith(PRECOMPRESSED_MIME_PREFIXES)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("COMPRESSION_ALGORITHM=zstd requires the 'zstandard' package") from exc
+    return zstandard
+
+
+def _read_samples(path: str, size: int) -> bytes:
+    """
+    До трёх кусков по COMPRESSION_SAMPLE_SIZE / 3 — из начала, середины
+    и конца файла: заголовок не всегда похож на остальное содержимое.
+    """
+    piece = max(settings.COMPRESSION_SAMPLE_SIZE // 3, 1)
+    if size <= piece * 3:
+        offsets = [0]
+        piece = size
+    else:
+        offsets = [0, (size - piece) // 2, size - piece]
+    samples = []
+    with open(path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            samples.append(f.read(piece))
+    return b"".join(samples)
+
+
+def choose_encoding(path: str, size: int, mime_type: str | None) -> str | None:
+    """
+    Решает, сжимать ли файл при хранении: только текстовые и неизвестные
+    (application/octet-stream) типы не меньше COMPRESSION_MIN_SIZE, и только
+    если быстрое сжатие выборки экономит хотя бы COMPRESSION_MIN_SAVINGS.
+    Возвращает "gzip", "zstd" или None.
+    """
+    algorithm = settings.COMPRESSION_ALGORITHM
+    if algorithm == "none" or size < settings.COMPRESSION_MIN_SIZE:
+        return None
+    if algorithm not in ENCODING_SUFFIXES:
+        raise ValueError(f"Unknown COMPRESSION_ALGORITHM: {algorithm}")
+    mime_type = mime_type or "application/octet-stream"
+    if is_precompressed(mime_type):
+        return None
+    if not (
+        mime_type.startswith("text/")
+        or mime_type in COMPRESSIBLE_MIME_TYPES
+        or mime_type == "application/octet-stream"
+    ):
+        return None
+    sample = _read_samples(path, size)
+    if not sample:
+        return None
+    ratio = len(zlib.compress(sample, 1)) / len(sample)
+    if ratio > 1 - settings.COMPRESSION_MIN_SAVINGS:
+        return None
+    return algorithm
+
+
+def compress_file(src_path: str, dst_path: str, encoding: str) -> int:
+    """
+    Потоково сжимает src_path в dst_path. Возвращает размер результата.
+    """
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        if encoding == "gzip":
+            # mtime=0 и пустое имя (иначе в заголовок попадёт имя временного
+            # файла) — одинаковое содержимое даёт одинаковые байты
+            with gzip.GzipFile(filename="", fileobj=dst, mode="wb", compresslevel=6, mtime=0) as out:
+                shutil.copyfileobj(src, out, COPY_CHUNK_SIZE)
+        elif encoding == "zstd":
+            _zstd().ZstdCompressor(level=3).copy_stream(src, dst)
+        else:
+            raise ValueError(f"Unknown encoding: {encoding}")
+    return os.path.getsize(dst_path)
+
+
+class _IterReader(io.RawIOBase):
+    """
+    Файлоподобная обёртка над итератором байтов — чтобы распаковщики
+    читали сжатые данные из хранилища потоково.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        n = min(len(target), len(self._buffer))
+        target[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def iter_decompressed(
+    chunks: Iterator[bytes], encoding: str, start: int, end: int, chunk_size: int
+) -> Iterator[bytes]:
+    """
+    Распаковывает поток chunks и отдаёт байты исходного содержимого
+    [start, end] кусками не больше chunk_size: память ограничена
+    независимо от степени сжатия. Для Range-запросов начало
+    распаковывается и отбрасывается.
+    """
+    raw = io.BufferedReader(_IterReader(chunks), COPY_CHUNK_SIZE)
+    if encoding == "gzip":
+        reader = gzip.GzipFile(fileobj=raw, mode="rb")
+    elif encoding == "zstd":
+        reader = _zstd().ZstdDecompressor().stream_reader(raw)
+    else:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    with reader:
+        position = 0
+        while position <= end:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                break
+            chunk_end = position + len(chunk)
+            if chunk_end > start:
+                yield chunk[max(start - position, 0) : end - position + 1]
+            position = chunk_end
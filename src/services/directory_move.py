@@ -0,0 +1,164 @@
+# src/services/directory_move.py
+
+import os
+import posixpath
+
+from sqlalchemy import case, func, literal, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from crud.change import record_change
+from models.directory import Directory
+from models.directory_move import DirectoryMove
+from models.file import File
+from services.blob_store import legacy_path
+from utils.db import path_under
+from utils.errors import AppError, NotFoundError, ValidationError
+
+
+def _rebase(column, source: str, destination: str):
+    # destination + остаток пути после source
+    return literal(destination) + func.substr(column, len(source) + 1)
+
+
+def _path_in_use(db: Session, path: str) -> bool:
+    prefix = path + "/"
+    file_hit = db.query(File.id).filter(
+        (File.filename == path) | path_under(File.filename, prefix)
+    ).first()
+    if file_hit is not None:
+        return True
+    dir_hit = db.query(Directory.id).filter(
+        (Directory.path == path) | path_under(Directory.path, prefix)
+    ).first()
+    return dir_hit is not None
+
+
+def rewrite_directory_paths(
+    db: Session, owner_id: int, source: str, destination: str
+) -> tuple[int, int]:
+    """
+    Переписывает префикс source → destination у всех файлов и папок
+    поддерева двумя UPDATE, без загрузки строк в память. В журнал
+    изменений — одна запись о папке, а не по записи на файл. Коммит — за
+    вызывающим кодом. Возвращает (файлов, папок).
+    """
+    prefix = source + "/"
+    files = db.execute(
+        update(File)
+        .where(File.owner_id == owner_id, path_under(File.filename, prefix))
+        .values(
+            filename=_rebase(File.filename, source, destination),
+            parent=_rebase(File.parent, source, destination),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    directories = db.execute(
+        update(Directory)
+        .where(
+            Directory.owner_id == owner_id,
+            (Directory.path == source) | path_under(Directory.path, prefix),
+        )
+        .values(
+            parent=case(
+                (Directory.path == source, posixpath.dirname(destination)),
+                else_=_rebase(Directory.parent, source, destination),
+            ),
+            path=_rebase(Directory.path, source, destination),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if files.rowcount or directories.rowcount:
+        record_change(db, owner_id, "move", "directory", destination, old_path=source)
+    return files.rowcount, directories.rowcount
+
+
+def _rename_on_disk(source: str, destination: str) -> None:
+    target = legacy_path(destination)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.rename(legacy_path(source), target)
+
+
+def move_directory(
+    db: Session, owner_id: int, source: str, destination: str
+) -> tuple[int, int]:
+    """
+    Перемещает папку source (например "user_1/docs") вместе с содержимым
+    в destination. В БД — один набор UPDATE по префиксу в одной транзакции;
+    на диске — один os.rename, и только если в папке есть старые файлы
+    без checksum (данные остальных лежат в blob-хранилище по хешу).
+
+    Переименование на диске и коммит БД не атомарны вместе, поэтому перед
+    os.rename фиксируется запись журнала DirectoryMove; она удаляется в той
+    же транзакции, что переписывает пути, и после сбоя
+    recover_directory_moves доводит перемещение до конца.
+    Возвращает (файлов, папок) перемещено.
+    """
+    if destination == source or destination.startswith(source + "/"):
+        raise ValidationError("Cannot move a folder into itself")
+    source_exists = (
+        db.query(Directory.id)
+        .filter(Directory.path == source, Directory.owner_id == owner_id)
+        .first()
+        or db.query(File.id)
+        .filter(File.owner_id == owner_id, path_under(File.filename, source + "/"))
+        .first()
+    )
+    if not source_exists:
+        raise NotFoundError("Not found")
+    if _path_in_use(db, destination):
+        raise AppError("Destination already exists", status_code=409)
+
+    journal = None
+    if os.path.isdir(legacy_path(source)):
+        journal = DirectoryMove(owner_id=owner_id, source=source, destination=destination)
+        db.add(journal)
+        db.commit()
+        try:
+            _rename_on_disk(source, destination)
+        except OSError:
+            db.delete(journal)
+            db.commit()
+            raise AppError("Cannot move folder on disk", status_code=409)
+
+    try:
+        counts = rewrite_directory_paths(db, owner_id, source, destination)
+        if journal is not None:
+            db.delete(journal)
+        db.commit()
+    except IntegrityError:
+        # кто-то успел занять destination между проверкой и коммитом
+        db.rollback()
+        if journal is not None:
+            _rename_on_disk(destination, source)
+            db.delete(journal)
+            db.commit()
+        raise AppError("Destination already exists", status_code=409)
+    return counts
+
+
+def recover_directory_moves(db: Session) -> int:
+    """
+    Доводит до конца перемещения, прерванные сбоем (вызывается при старте).
+    Раз запись журнала на месте, пути в БД ещё старые: переименовываем
+    папку на диске, если это не успело произойти, и переписываем пути.
+    Если destination тем временем заняли — откатываем перемещение на диске.
+    Возвращает число обработанных записей.
+    """
+    moves = db.query(DirectoryMove).order_by(DirectoryMove.id).all()
+    for move in moves:
+        source_disk = legacy_path(move.source)
+        destination_disk = legacy_path(move.destination)
+        if os.path.isdir(source_disk) and not os.path.exists(destination_disk):
+            _rename_on_disk(move.source, move.destination)
+        try:
+            rewrite_directory_paths(db, move.owner_id, move.source, move.destination)
+            db.delete(move)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if os.path.isdir(destination_disk) and not os.path.exists(source_disk):
+                _rename_on_disk(move.destination, move.source)
+            db.delete(move)
+            db.commit()
+    return len(moves)
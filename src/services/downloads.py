@@ -0,0 +1,446 @@
+# src/services/downloads.py
+
+import io
+import os
+import posixpath
+import secrets
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Iterator
+from urllib.parse import quote
+
+from fastapi import Request, status
+from fastapi.responses import Response, StreamingResponse
+
+from core.config import settings
+from models.file import File
+from services.blob_store import (
+    StoredData,
+    blob_file_data,
+    iter_file_data,
+    iter_stored_data,
+    locate_file_data,
+)
+from services.compression import is_precompressed
+
+READ_CHUNK_SIZE = 64 * 1024
+# больше диапазонов в одном запросе не обслуживаем — отдаём файл целиком
+MAX_RANGES = 16
+
+# имена кодировок в Accept-Encoding для каждого сжатия при хранении
+ACCEPT_ENCODING_ALIASES = {"gzip": ("gzip", "x-gzip"), "zstd": ("zstd",)}
+
+
+def _etag(record: File, size: int, encoding: str | None = None) -> str:
+    """
+    Сильный ETag из сохранённых метаданных: одинаков на всех воркерах и
+    не зависит от mtime на диске. Для файлов в blob-хранилище — хеш содержимого;
+    сжатое представление (Content-Encoding) — другие байты, и ETag у него свой.
+    """
+    if record.checksum:
+        if encoding is not None:
+            return f'"{record.checksum}-{encoding}"'
+        return f'"{record.checksum}"'
+    uploaded = int(_last_modified(record).timestamp())
+    return f'"legacy-{record.id}-{size}-{uploaded}"'
+
+
+def _last_modified(record: File) -> datetime:
+    uploaded = record.uploaded_at or datetime.now(timezone.utc)
+    if uploaded.tzinfo is None:
+        uploaded = uploaded.replace(tzinfo=timezone.utc)
+    return uploaded.replace(microsecond=0)
+
+
+def _parse_http_date(value: str) -> datetime | None:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _etag_matches(header: str, etag: str, weak: bool) -> bool:
+    """
+    Сравнение по RFC 9110: If-None-Match — слабое, If-Range — сильное.
+    """
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag, weak=True)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and last_modified <= since
+    return False
+
+
+def _range_allowed(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return _etag_matches(if_range, etag, weak=False)
+    since = _parse_http_date(if_range)
+    return since is not None and since == last_modified
+
+
+def parse_range_header(header: str, size: int) -> list[tuple[int, int]] | None:
+    """
+    Разбирает "bytes=0-99,200-,-50" в список диапазонов [start, end]
+    (включительно), сливая пересекающиеся. None — заголовок некорректен
+    и должен игнорироваться; пустой список — ни один диапазон не попадает
+    в файл (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    ranges: list[tuple[int, int]] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        if not sep:
+            return None
+        try:
+            if first == "":
+                suffix = int(last)
+                # у пустого файла нет ни одного байта для суффикса
+                if suffix <= 0 or size == 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and end < start:
+                    return None
+                if start >= size:
+                    continue
+                end = min(end, size - 1)
+        except ValueError:
+            return None
+        ranges.append((start, end))
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    ranges.sort()
+    merged: list[tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def accepts_encoding(header: str | None, encoding: str) -> bool:
+    """
+    Разрешает ли Accept-Encoding клиента кодировку encoding ("gzip"/"zstd"):
+    явное упоминание или "*" с q > 0; "encoding;q=0" — запрет.
+    """
+    if not header:
+        return False
+    names = ACCEPT_ENCODING_ALIASES[encoding]
+    wildcard = None
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name in names:
+            return q > 0
+        if name == "*":
+            wildcard = q > 0
+    return bool(wildcard)
+
+
+def _content_disposition(filename: str) -> str:
+    name = os.path.basename(filename)
+    quoted = quote(name)
+    if quoted == name:
+        return f'attachment; filename="{name}"'
+    return f"attachment; filename*=utf-8''{quoted}"
+
+
+def _cache_control(public: bool, max_age: int | None = None) -> str:
+    # Публичные ссылки можно кешировать в CDN/прокси (но не дольше срока
+    # действия ссылки — max_age); приватные файлы — только в браузере
+    # владельца и с обязательной ревалидацией по ETag.
+    if public:
+        if max_age is None:
+            max_age = settings.PUBLIC_LINK_CACHE_MAX_AGE
+        return f"public, max-age={min(max_age, settings.PUBLIC_LINK_CACHE_MAX_AGE)}"
+    return "private, no-cache"
+
+
+def build_file_response(
+    request: Request,
+    record: File,
+    data: StoredData,
+    *,
+    public: bool = False,
+    cache_max_age: int | None = None,
+) -> Response:
+    """
+    Отдаёт файл из хранилища с поддержкой ETag / Last-Modified, условных
+    запросов (If-None-Match, If-Modified-Since → 304), Range (одиночный и
+    multipart/byteranges → 206) и If-Range. Данные читаются кусками
+    синхронным генератором — Starlette прокручивает его в пуле потоков.
+
+    Сжатые при хранении данные отдаются как есть с Content-Encoding, если
+    клиент это принимает и не просит диапазон; иначе распаковываются на лету.
+    """
+    size = data.size
+    passthrough = (
+        data.encoding is not None
+        and "range" not in request.headers
+        and accepts_encoding(request.headers.get("accept-encoding"), data.encoding)
+    )
+    etag = _etag(record, size, data.encoding if passthrough else None)
+    last_modified = _last_modified(record)
+    media_type = record.mime_type or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": _cache_control(public, cache_max_age),
+        "Accept-Ranges": "bytes",
+    }
+    if data.encoding is not None:
+        # ответ зависит от Accept-Encoding — кеши должны это учитывать
+        headers["Vary"] = "Accept-Encoding"
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    headers["Content-Disposition"] = _content_disposition(record.filename)
+    if passthrough:
+        headers["Content-Encoding"] = data.encoding
+        headers["Content-Length"] = str(data.stored_size)
+        return StreamingResponse(
+            iter_stored_data(data, 0, data.stored_size - 1),
+            media_type=media_type,
+            headers=headers,
+        )
+
+    range_header = request.headers.get("range")
+    ranges = None
+    if range_header is not None and _range_allowed(request, etag, last_modified):
+        ranges = parse_range_header(range_header, size)
+
+    if ranges is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            iter_file_data(data, 0, size - 1), media_type=media_type, headers=headers
+        )
+
+    if not ranges:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE, headers=headers
+        )
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            iter_file_data(data, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers=headers,
+        )
+
+    boundary = secrets.token_hex(16)
+    part_headers = [
+        (
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode("latin-1")
+        for start, end in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode("latin-1")
+    length = len(closing) + sum(
+        len(head) + (end - start + 1) + 2
+        for head, (start, end) in zip(part_headers, ranges)
+    )
+
+    def iter_parts() -> Iterator[bytes]:
+        for head, (start, end) in zip(part_headers, ranges):
+            yield head
+            yield from iter_file_data(data, start, end)
+            yield b"\r\n"
+        yield closing
+
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        iter_parts(),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers,
+    )
+
+
+def asset_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    return if_none_match is not None and _etag_matches(if_none_match, etag, weak=True)
+
+
+def build_asset_response(
+    content: bytes | None, media_type: str, etag: str, *, public: bool = False
+) -> Response:
+    """
+    Небольшой производный ресурс (превью) из памяти; content=None — 304
+    (см. asset_not_modified: ресурс не нужно даже готовить).
+    """
+    headers = {"ETag": etag, "Cache-Control": _cache_control(public)}
+    if content is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content, media_type=media_type, headers=headers)
+
+
+@dataclass
+class ZipEntry:
+    """
+    Элемент архива: файл (record — запись File или строка с полями
+    filename/checksum) или пустая папка (record = None). encoding и
+    stored_size — сжатие blob'а файла и его размер в хранилище.
+    """
+    arcname: str
+    record: object | None = None
+    size: int | None = None
+    modified: datetime | None = None
+    mime_type: str | None = None
+    encoding: str | None = None
+    stored_size: int | None = None
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Приёмник без seek для ZipFile: копит записанные байты,
+    пока генератор не заберёт их. ZipFile без seek пишет размеры в data
+    descriptor после данных, так что архив не нужно держать целиком.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self.buffered = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.buffered += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.buffered = 0
+        return data
+
+
+def _zip_date_time(modified: datetime | None) -> tuple:
+    if modified is None:
+        modified = datetime.now(timezone.utc)
+    # формат ZIP не хранит даты раньше 1980 года
+    return max(modified.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+
+
+def iter_zip(entries: Iterable[ZipEntry], compression: str = "auto") -> Iterator[bytes]:
+    """
+    Генерирует ZIP-архив по мере чтения файлов: в памяти — не больше
+    одного куска данных (плюс центральный каталог). Файлы больше 4 ГиБ
+    и архивы больше 65535 записей пишутся в формате ZIP64.
+    compression: "store" — без сжатия, "deflate" — всё сжимать,
+    "auto" — не тратить CPU на уже сжатые форматы (медиа, архивы).
+    Файлы, данных которых нет в хранилище, пропускаются.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", allowZip64=True) as zf:
+        for entry in entries:
+            if entry.record is None:
+                info = zipfile.ZipInfo(entry.arcname.rstrip("/") + "/", _zip_date_time(entry.modified))
+                info.external_attr = (0o40755 << 16) | 0x10
+                zf.writestr(info, b"")
+                continue
+            if entry.record.checksum and entry.size is not None:
+                # метаданные blob'а уже известны — не опрашиваем хранилище
+                data = blob_file_data(
+                    entry.record.checksum, entry.size, entry.encoding, entry.stored_size
+                )
+            else:
+                data = locate_file_data(entry.record, entry.encoding)
+                if data is None:
+                    continue
+            chunks = iter_file_data(data, 0, data.size - 1)
+            try:
+                first = next(chunks, b"")
+            except FileNotFoundError:
+                continue
+            info = zipfile.ZipInfo(entry.arcname, _zip_date_time(entry.modified))
+            info.external_attr = 0o644 << 16
+            store = compression == "store" or (
+                compression == "auto" and is_precompressed(entry.mime_type)
+            )
+            info.compress_type = zipfile.ZIP_STORED if store else zipfile.ZIP_DEFLATED
+            # заранее известный размер решает, нужен ли ZIP64 для записи
+            info.file_size = data.size
+            with zf.open(info, "w") as dest:
+                dest.write(first)
+                for chunk in chunks:
+                    dest.write(chunk)
+                    # мелкие файлы копим до READ_CHUNK_SIZE: каждый yield —
+                    # отдельный переход в пул потоков
+                    if sink.buffered >= READ_CHUNK_SIZE:
+                        yield sink.drain()
+            if sink.buffered >= READ_CHUNK_SIZE:
+                yield sink.drain()
+    yield sink.drain()
+
+
+def build_zip_response(
+    name: str,
+    entries: list[ZipEntry],
+    compression: str = "auto",
+    *,
+    public: bool = False,
+    cache_max_age: int | None = None,
+) -> StreamingResponse:
+    """
+    Потоковая отдача папки ZIP-архивом. Размер заранее неизвестен —
+    ответ идёт chunked, без временного архива на диске.
+    """
+    headers = {
+        "Content-Disposition": _content_disposition(posixpath.basename(name) + ".zip"),
+        "Cache-Control": _cache_control(public, cache_max_age),
+    }
+    return StreamingResponse(
+        iter_zip(entries, compression), media_type="application/zip", headers=headers
+    )
@@ -0,0 +1,213 @@
+# src/services/file_batch.py
+
+import os
+import posixpath
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.blob import get_stored_sizes, release_blob_refs
+from crud.change import record_changes
+from crud.public_link import revoke_public_links
+from crud.usage import bump_usage
+from models.directory import Directory
+from models.file import File
+from schemas.file import BatchItemResult, BatchOperation
+from services.blob_store import legacy_path
+from services.previews import discard_previews, preview_key
+from services.public_links import remember_revocations
+from utils.db import chunked
+from utils.errors import ValidationError
+from utils.paths import user_file_path
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _move_legacy_file(old_name: str, new_name: str) -> None:
+    """
+    Файлы без checksum лежат на диске под своим именем — их надо двигать.
+    """
+    target = legacy_path(new_name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.rename(legacy_path(old_name), target)
+
+
+def apply_batch(
+    db: Session, owner_id: int, operations: list[BatchOperation]
+) -> tuple[list[BatchItemResult], list[Callable[[], None]]]:
+    """
+    Применяет операции delete/move по порядку, как если бы они шли
+    отдельными запросами, но:
+      • все затронутые записи читаются одним запросом;
+      • изменения в БД — одна транзакция (удаление, переименование,
+        ссылки на blob'ы, агрегат пользователя);
+      • ошибка в одной операции не отменяет остальные.
+    Возвращает результаты по каждой операции и список действий с диском,
+    которые нужно выполнить после коммита (удаление старых файлов без
+    checksum; данные blob'ов без ссылок стирает сборщик).
+    """
+    results: list[BatchItemResult | None] = [None] * len(operations)
+    parsed: list[tuple[int, str, str | None]] = []
+    for index, operation in enumerate(operations):
+        try:
+            source = user_file_path(owner_id, operation.path)
+            destination = None
+            if operation.op == "move":
+                if not operation.destination:
+                    raise ValidationError("Destination is required")
+                destination = user_file_path(owner_id, operation.destination)
+        except ValidationError as exc:
+            results[index] = BatchItemResult(
+                op=operation.op, path=operation.path, status="error", detail=exc.detail
+            )
+            continue
+        parsed.append((index, source, destination))
+
+    names = {source for _, source, _ in parsed}
+    destinations = {destination for _, _, destination in parsed if destination}
+    rows: list[File] = []
+    for chunk in chunked(list(names | destinations)):
+        rows.extend(db.query(File).filter(File.filename.in_(chunk)))
+    # занятые имена — с любым владельцем: filename уникален во всей таблице
+    taken = {row.filename for row in rows}
+    current = {row.filename: row for row in rows if row.owner_id == owner_id}
+    # имена до пакета: журнал изменений описывает итог, а не каждый шаг
+    original = {row.id: row.filename for row in rows}
+    for chunk in chunked(list(destinations)):
+        taken.update(
+            path for (path,) in db.query(Directory.path).filter(Directory.path.in_(chunk))
+        )
+
+    deleted: dict[int, tuple[File, str]] = {}
+    moved: dict[int, str] = {}
+    # (старое, новое) имя файлов без checksum, уже перенесённых на диске
+    legacy_moves: list[tuple[str, str]] = []
+
+    def fail(index: int, detail: str) -> None:
+        operation = operations[index]
+        results[index] = BatchItemResult(
+            op=operation.op, path=operation.path, status="error", detail=detail
+        )
+
+    for index, source, destination in parsed:
+        record = current.get(source)
+        if record is None:
+            fail(index, "Not found")
+            continue
+        if destination is None:
+            deleted[record.id] = (record, source)
+            moved.pop(record.id, None)
+        else:
+            if destination in taken:
+                fail(index, "Destination already exists")
+                continue
+            if record.checksum is None:
+                try:
+                    _move_legacy_file(source, destination)
+                except OSError as exc:
+                    fail(index, f"Cannot move file: {exc.strerror}")
+                    continue
+                legacy_moves.append((source, destination))
+            current[destination] = record
+            taken.add(destination)
+            moved[record.id] = destination
+        del current[source]
+        taken.discard(source)
+        operation = operations[index]
+        results[index] = BatchItemResult(op=operation.op, path=operation.path, status="ok")
+
+    cleanup: list[Callable[[], None]] = []
+    try:
+        if deleted:
+            records = [record for record, _ in deleted.values()]
+            revoked = revoke_public_links(db, "f", records)
+            db.flush()
+            for ids in chunked(list(deleted)):
+                db.execute(
+                    delete(File)
+                    .where(File.id.in_(ids))
+                    .execution_options(synchronize_session=False)
+                )
+            refs = Counter(r.checksum for r in records if r.checksum is not None)
+            stored_sizes: dict[str, int] = {}
+            for shas in chunked(list(refs)):
+                stored_sizes.update(get_stored_sizes(db, shas))
+            bump_usage(
+                db,
+                owner_id,
+                -len(records),
+                -sum(r.size or 0 for r in records),
+                -sum(stored_sizes.get(r.checksum, r.size or 0) for r in records),
+            )
+            release_blob_refs(db, dict(refs))
+            for record, name in deleted.values():
+                if record.checksum is None:
+                    path = legacy_path(name)
+                    cleanup.append(lambda path=path: _remove_quietly(path))
+                    key = preview_key(record)
+                    cleanup.append(lambda key=key: discard_previews(key))
+        if moved:
+            # сначала уводим строки на временные имена, чтобы перестановки
+            # (a→b, b→a) не упирались в уникальность filename; обратная косая
+            # черта в нормализованных путях не встречается
+            db.execute(
+                update(File),
+                [{"id": file_id, "filename": f"\\batch\\{file_id}"} for file_id in moved],
+            )
+            db.execute(
+                update(File),
+                [
+                    {"id": file_id, "filename": name, "parent": posixpath.dirname(name)}
+                    for file_id, name in moved.items()
+                ],
+            )
+        record_changes(
+            db,
+            owner_id,
+            [{"op": "delete", "kind": "file", "path": original[file_id]} for file_id in deleted]
+            + [
+                {"op": "move", "kind": "file", "path": name, "old_path": original[file_id]}
+                for file_id, name in moved.items()
+                if name != original[file_id]
+            ],
+        )
+        db.commit()
+        if deleted:
+            remember_revocations(revoked)
+    except BaseException:
+        db.rollback()
+        for old_name, new_name in reversed(legacy_moves):
+            try:
+                _move_legacy_file(new_name, old_name)
+            except OSError:
+                pass
+        raise
+    finally:
+        db.expire_all()
+
+    return results, cleanup
+
+
+def run_cleanup(tasks: list[Callable[[], None]]) -> None:
+    """
+    Выполняет действия с диском параллельно: удаление тысяч файлов
+    упирается в задержки ФС, а не в процессор. Записи в БД уже удалены,
+    поэтому сбой здесь оставляет на диске лишь недостижимые данные.
+    """
+    if not tasks:
+        return
+    with ThreadPoolExecutor(max_workers=settings.BATCH_FS_WORKERS) as pool:
+        for future in [pool.submit(task) for task in tasks]:
+            try:
+                future.result()
+            except OSError:
+                pass
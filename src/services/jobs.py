@@ -0,0 +1,244 @@
+# src/services/jobs.py
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.job import (
+    claim_next_job,
+    finish_job,
+    heartbeat_jobs,
+    purge_finished_jobs,
+    release_job,
+    requeue_stale_jobs,
+)
+from models.job import Job
+from services.archive_import import run_unpack_job
+from utils.errors import AppError
+
+logger = logging.getLogger(__name__)
+
+# обработчики задач по Job.kind: (сессия БД, контекст) → результат для Job.result
+JOB_HANDLERS: dict[str, Callable[[Session, "JobContext"], dict | None]] = {
+    "unpack_archive": run_unpack_job,
+}
+
+
+class JobCancelled(Exception):
+    """
+    Пользователь отменил выполняющуюся задачу.
+    """
+
+
+class JobInterrupted(Exception):
+    """
+    Процесс останавливается — задача вернётся в очередь.
+    """
+
+
+class JobContext:
+    """
+    То, что обработчик видит о своей задаче. progress() только запоминает
+    значения в памяти (в БД их пишет heartbeat) и бросает JobCancelled /
+    JobInterrupted, если задачу пора прервать, — поэтому обработчики
+    вызывают его между шагами работы.
+    """
+
+    def __init__(self, job: Job, stop: threading.Event):
+        self.job_id = job.id
+        self.owner_id = job.owner_id
+        self.payload = dict(job.payload or {})
+        self.done = 0
+        self.total: int | None = None
+        self.cancel_requested = False
+        self._stop = stop
+
+    def progress(self, done: int, total: int | None = None) -> None:
+        self.done = done
+        if total is not None:
+            self.total = total
+        self.check()
+
+    def check(self) -> None:
+        if self.cancel_requested:
+            raise JobCancelled()
+        if self._stop.is_set():
+            raise JobInterrupted()
+
+
+class JobWorkerPool:
+    """
+    Потоки, выполняющие задачи из таблицы jobs, и поток heartbeat.
+
+    Каждый процесс приложения запускает свой пул; задачи между процессами
+    делит условный UPDATE в claim_next_job. Heartbeat одним запросом
+    продлевает жизнь всех задач процесса, сохраняет их прогресс и узнаёт
+    о запросах отмены; он же периодически возвращает в очередь задачи
+    упавших процессов и удаляет старые завершённые.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], workers: int):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._session_factory = session_factory
+        self._workers = workers
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._running: dict[int, JobContext] = {}
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for n in range(self._workers):
+            self._spawn(self._worker_loop, f"job-worker-{n}")
+        self._spawn(self._heartbeat_loop, "job-heartbeat")
+
+    def _spawn(self, target: Callable[[], None], name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout: float) -> None:
+        """
+        Просит задачи прерваться (они вернутся в очередь без траты попытки)
+        и ждёт потоки не дольше timeout секунд.
+        """
+        self._stop.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = self._run_next()
+            except Exception:
+                # БД недоступна и т.п. — попробуем на следующем круге
+                logger.exception("Job worker %s failed to run a job", self.worker_id)
+                ran = False
+            if not ran:
+                self._wakeup.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+
+    def _run_next(self) -> bool:
+        db = self._session_factory()
+        try:
+            job = claim_next_job(db, self.worker_id, settings.JOB_USER_CONCURRENCY)
+            if job is None:
+                return False
+            attempts = job.attempts
+            context = JobContext(job, self._stop)
+            with self._lock:
+                self._running[job.id] = context
+            try:
+                self._execute(db, job, context, attempts)
+            finally:
+                with self._lock:
+                    del self._running[context.job_id]
+            return True
+        finally:
+            db.close()
+
+    def _execute(self, db: Session, job: Job, context: JobContext, attempts: int) -> None:
+        handler = JOB_HANDLERS.get(job.kind)
+        try:
+            if handler is None:
+                raise AppError(f"Unknown job kind: {job.kind}")
+            result = handler(db, context)
+        except JobInterrupted:
+            db.rollback()
+            release_job(db, context.job_id, self.worker_id)
+        except JobCancelled:
+            db.rollback()
+            finish_job(
+                db,
+                context.job_id,
+                self.worker_id,
+                "cancelled",
+                progress=(context.done, context.total),
+            )
+        except AppError as exc:
+            # ошибка в данных (битый архив, файл удалён) — повтор не поможет
+            db.rollback()
+            finish_job(db, context.job_id, self.worker_id, "failed", error=exc.detail)
+        except Exception as exc:
+            db.rollback()
+            error = str(exc) or type(exc).__name__
+            if attempts < settings.JOB_MAX_ATTEMPTS:
+                delay = settings.JOB_RETRY_DELAY_SECONDS * 2 ** (attempts - 1)
+                finish_job(
+                    db, context.job_id, self.worker_id, "queued", error=error, retry_delay=delay
+                )
+            else:
+                finish_job(db, context.job_id, self.worker_id, "failed", error=error)
+        else:
+            finish_job(
+                db,
+                context.job_id,
+                self.worker_id,
+                "succeeded",
+                result=result,
+                progress=(context.done, context.total),
+            )
+
+    def _heartbeat_loop(self) -> None:
+        last_maintenance = 0.0
+        while not self._stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+            with self._lock:
+                snapshot = {
+                    job_id: (context.done, context.total)
+                    for job_id, context in self._running.items()
+                }
+            db = self._session_factory()
+            try:
+                for job_id in heartbeat_jobs(db, self.worker_id, snapshot):
+                    with self._lock:
+                        context = self._running.get(job_id)
+                    if context is not None:
+                        context.cancel_requested = True
+                if time.monotonic() - last_maintenance >= settings.JOB_MAINTENANCE_INTERVAL_SECONDS:
+                    last_maintenance = time.monotonic()
+                    if requeue_stale_jobs(db, settings.JOB_STALE_SECONDS, settings.JOB_MAX_ATTEMPTS):
+                        self.wake()
+                    purge_finished_jobs(db, settings.JOB_RETENTION_SECONDS)
+            except Exception:
+                logger.exception("Job heartbeat of worker %s failed", self.worker_id)
+            finally:
+                db.close()
+
+
+_pool: JobWorkerPool | None = None
+
+
+def start_job_workers(session_factory: Callable[[], Session]) -> None:
+    global _pool
+    if settings.JOB_WORKERS <= 0 or _pool is not None:
+        return
+    _pool = JobWorkerPool(session_factory, settings.JOB_WORKERS)
+    _pool.start()
+
+
+def stop_job_workers() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.stop(settings.JOB_SHUTDOWN_TIMEOUT_SECONDS)
+        _pool = None
+
+
+def wake_job_workers() -> None:
+    """
+    Новая задача в очереди — воркеры этого процесса берут её сразу,
+    не дожидаясь очередного опроса таблицы.
+    """
+    if _pool is not None:
+        _pool.wake()
@@ -0,0 +1,307 @@
+# src/services/metrics.py
+"""
+Метрики в формате Prometheus (GET /metrics).
+
+Запросы меряет ASGI-middleware: длительность (до отправки последнего байта
+тела, т.е. вместе с передачей файла), число одновременно выполняющихся,
+байты тела запроса и ответа по шаблону маршрута. Запросы к БД меряют
+события SQLAlchemy: длительность каждого запроса, число и суммарное время
+запросов в рамках одного HTTP-запроса (через contextvar — он доходит и до
+пула потоков, и до async-сессий), ожидание соединения из пула и занятость
+пулов (события пула и сессии, каждый процесс обновляет свои значения).
+Кеш токенов (auth.cache) считает попадания и промахи.
+
+Несколько воркеров: если задана переменная окружения
+PROMETHEUS_MULTIPROC_DIR (пустая папка, общая для воркеров), каждый
+процесс пишет значения в свои файлы, а /metrics суммирует их все —
+ответ одинаков, какой бы воркер ни обработал скрейп.
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from anyio.to_thread import current_default_thread_limiter
+from fastapi.responses import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency including streaming of the body",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by response status",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+REQUEST_BYTES = Counter(
+    "http_request_body_bytes_total",
+    "Bytes received in request bodies (uploads)",
+    ["route"],
+)
+RESPONSE_BYTES = Counter(
+    "http_response_body_bytes_total",
+    "Bytes sent in response bodies (downloads)",
+    ["route"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries made while handling one HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Total database time of one HTTP request",
+    ["route"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Database query latency",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10),
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time a session waited for a pooled connection (including opening a new one)",
+    ["pool"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections currently in use",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_open_connections",
+    "Database connections held open by the pool (in use or idle)",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTS = Counter(
+    "db_pool_connections_opened_total",
+    "New database connections opened by the pool",
+    ["pool"],
+)
+AUTH_CACHE_LOOKUPS = Counter(
+    "auth_cache_lookups_total",
+    "Token cache lookups by result (hit or miss)",
+    ["result"],
+)
+THREADPOOL_BUSY = Gauge(
+    "threadpool_busy_threads",
+    "Worker threads running sync endpoints and blocking I/O",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_WAITING = Gauge(
+    "threadpool_waiting_tasks",
+    "Tasks waiting for a free worker thread",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_SIZE = Gauge(
+    "threadpool_max_threads",
+    "Worker thread limit",
+    multiprocess_mode="livesum",
+)
+
+# первые слова SQL → метка operation (ограниченный набор значений)
+_OPERATIONS = {"SELECT": "select", "INSERT": "insert", "UPDATE": "update", "DELETE": "delete"}
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+# когда сессия начала выполнять запрос или flush: если для этого понадобится
+# соединение из пула, событие checkout посчитает, сколько его ждали
+_checkout_started: ContextVar[float | None] = ContextVar("checkout_started", default=None)
+
+
+def _route_template(scope) -> str:
+    # шаблон вроде "/files/download/{file_path:path}", а не сам путь —
+    # иначе у метрик было бы по ряду на каждый файл
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+def _sample_threadpool() -> None:
+    limiter = current_default_thread_limiter()
+    THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_WAITING.set(limiter.statistics().tasks_waiting)
+    THREADPOOL_SIZE.set(limiter.total_tokens)
+
+
+class MetricsMiddleware:
+    """
+    Чистое ASGI-middleware: не буферизует тела и не мешает потоковой
+    передаче, только считает сообщения receive/send.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        received = 0
+        sent = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal status_code, sent
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        _sample_threadpool()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            _sample_threadpool()
+            _request_stats.reset(token)
+            route = _route_template(scope)
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            if received:
+                REQUEST_BYTES.labels(route).inc(received)
+            if sent:
+                RESPONSE_BYTES.labels(route).inc(sent)
+            REQUEST_QUERIES.labels(route).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(route).observe(stats.db_seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # соединение уже было — отметка ожидания больше не нужна
+    _checkout_started.set(None)
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    operation = _OPERATIONS.get(statement.lstrip()[:6].upper(), "other")
+    DB_QUERY_LATENCY.labels(operation).observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(context):
+    # упавший запрос after_cursor_execute не вызывает — убираем его отметку
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine: Engine, pool_name: str) -> None:
+    """
+    Подключает счётчики запросов и пула соединений к движку (для async —
+    к engine.sync_engine); pool_name — метка пула в метриках.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+    pool = engine.pool
+    connects = DB_POOL_CONNECTS.labels(pool_name)
+    open_connections = DB_POOL_OPEN.labels(pool_name)
+    checked_out = DB_POOL_CHECKED_OUT.labels(pool_name)
+    waits = DB_POOL_CHECKOUT_WAIT.labels(pool_name)
+
+    def on_connect(dbapi_connection, record):
+        connects.inc()
+        open_connections.inc()
+
+    def on_checkout(dbapi_connection, record, proxy):
+        checked_out.inc()
+        started = _checkout_started.get()
+        if started is not None:
+            _checkout_started.set(None)
+            waits.observe(time.perf_counter() - started)
+
+    def on_detach(dbapi_connection, record):
+        # отсоединяют выданное соединение: checkin для него уже не будет
+        open_connections.dec()
+        checked_out.dec()
+
+    event.listen(pool, "connect", on_connect)
+    event.listen(pool, "close", lambda dbapi_connection, record: open_connections.dec())
+    event.listen(pool, "detach", on_detach)
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "checkin", lambda dbapi_connection, record: checked_out.dec())
+
+    if not event.contains(Session, "do_orm_execute", _mark_checkout_start):
+        event.listen(Session, "do_orm_execute", _mark_checkout_start)
+        event.listen(Session, "before_flush", _mark_checkout_start)
+
+
+def _mark_checkout_start(*args) -> None:
+    # у пула нет события «начали ждать соединение»: отмечаем момент, когда
+    # сессия начинает запрос или flush, — соединение берётся сразу после
+    _checkout_started.set(time.perf_counter())
+
+
+def _multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def metrics_response() -> Response:
+    if _multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def shutdown_metrics() -> None:
+    """
+    Остановившийся воркер: его live-gauge (запросы в работе, потоки)
+    больше не должны попадать в сумму.
+    """
+    if _multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,66 @@
+# src/services/preview_render.py
+"""
+Отрисовка превью. Функции выполняются в дочерних процессах пула
+(см. services.previews), поэтому модуль не импортирует ничего из
+приложения: ни настроек, ни БД, ни хранилища.
+"""
+
+import warnings
+
+PDF_MIME_TYPE = "application/pdf"
+JPEG_QUALITY = 82
+
+
+def _pil():
+    try:
+        from PIL import Image, ImageOps
+    except ImportError as exc:
+        raise RuntimeError("Previews require the 'Pillow' package") from exc
+    return Image, ImageOps
+
+
+def _open_pdf_page(src_path: str, max_side: int):
+    try:
+        import pypdfium2
+    except ImportError as exc:
+        raise RuntimeError("PDF previews require the 'pypdfium2' package") from exc
+    pdf = pypdfium2.PdfDocument(src_path)
+    try:
+        page = pdf[0]
+        width, height = page.get_size()
+        # рисуем страницу сразу в нужном масштабе, а не в полном размере
+        scale = max_side / max(width, height, 1)
+        return page.render(scale=scale).to_pil().copy()
+    finally:
+        pdf.close()
+
+
+def render_preview(
+    src_path: str, dst_path: str, max_side: int, mime_type: str, max_pixels: int
+) -> None:
+    """
+    Рисует JPEG-превью файла src_path, вписанное в квадрат max_side,
+    и записывает его в dst_path. Изображения больше max_pixels пикселей
+    не открываются (защита от «бомб» из крошечного PNG на гигапиксели).
+    """
+    Image, ImageOps = _pil()
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    warnings.simplefilter("error", Image.DecompressionBombWarning)
+
+    if mime_type == PDF_MIME_TYPE:
+        image = _open_pdf_page(src_path, max_side)
+    else:
+        image = Image.open(src_path)
+        # JPEG декодируется сразу в уменьшенном масштабе — в разы быстрее
+        image.draft("RGB", (max_side, max_side))
+    with image:
+        preview = ImageOps.exif_transpose(image)
+        preview.thumbnail((max_side, max_side), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if preview.mode in ("RGBA", "LA", "PA") or "transparency" in preview.info:
+            # у JPEG нет прозрачности — кладём на белый фон
+            rgba = preview.convert("RGBA")
+            preview = Image.new("RGB", rgba.size, (255, 255, 255))
+            preview.paste(rgba, mask=rgba.getchannel("A"))
+        elif preview.mode not in ("RGB", "L"):
+            preview = preview.convert("RGB")
+        preview.save(dst_path, "JPEG", quality=JPEG_QUALITY, optimize=True)
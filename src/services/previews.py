@@ -0,0 +1,263 @@
+# src/services/previews.py
+
+import asyncio
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi.concurrency import run_in_threadpool
+
+from core.config import settings
+from models.file import File
+from services.blob_store import StoredData, local_file_data
+from services.preview_render import PDF_MIME_TYPE, render_preview
+from utils.errors import AppError
+
+# длинная сторона превью для каждого пресета
+PREVIEW_SIZES = {"small": 128, "medium": 512, "large": 1280}
+PREVIEW_MEDIA_TYPE = "image/jpeg"
+# форматы, которые Pillow читает без дополнительных пакетов
+IMAGE_MIME_TYPES = {
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/webp",
+    "image/bmp",
+    "image/x-ms-bmp",
+    "image/tiff",
+}
+# после превышения бюджета кеш чистится с запасом, а не до самой границы
+EVICT_TO_RATIO = 0.9
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_in_flight: dict[str, asyncio.Future] = {}
+_pending = 0
+_cache_lock = threading.Lock()
+_cache_bytes: int | None = None
+
+
+def preview_cache_dir() -> str:
+    return os.path.join(settings.UPLOAD_ROOT, ".previews")
+
+
+def preview_key(record: File) -> str:
+    """
+    Ключ превью — содержимое файла: у blob'а это его SHA-256, у старых
+    файлов без checksum — хеш id, размера и времени загрузки.
+    """
+    if record.checksum:
+        return record.checksum
+    source = f"legacy:{record.id}:{record.size}:{record.uploaded_at}"
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def _cache_path(key: str, preset: str) -> str:
+    return os.path.join(preview_cache_dir(), key[:2], f"{key}-{preset}.jpg")
+
+
+def _scan_cache() -> list[os.DirEntry]:
+    entries = []
+    root = preview_cache_dir()
+    if not os.path.isdir(root):
+        return entries
+    for shard in os.scandir(root):
+        if shard.is_dir():
+            entries.extend(e for e in os.scandir(shard.path) if e.name.endswith(".jpg"))
+    return entries
+
+
+def _account(delta: int) -> None:
+    """
+    Учитывает изменение размера кеша и, если бюджет превышен, удаляет
+    давно не запрошенные превью (LRU по mtime: чтение из кеша его обновляет).
+    Счётчик — на процесс; при вытеснении он пересчитывается по диску,
+    так что расхождение между воркерами не накапливается.
+    """
+    global _cache_bytes
+    with _cache_lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(e.stat().st_size for e in _scan_cache())
+        else:
+            _cache_bytes += delta
+        if _cache_bytes <= settings.PREVIEW_CACHE_MAX_BYTES:
+            return
+        entries = []
+        for entry in _scan_cache():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = settings.PREVIEW_CACHE_MAX_BYTES * EVICT_TO_RATIO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        _cache_bytes = total
+
+
+def _read_cached(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return content
+
+
+def discard_previews(key: str) -> None:
+    """
+    Удаляет все превью содержимого key — вызывается, когда данные
+    удалены (blob собран сборщиком, старый файл удалён).
+    """
+    freed = 0
+    for preset in PREVIEW_SIZES:
+        path = _cache_path(key, preset)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        freed += size
+    if freed:
+        _account(-freed)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, а не fork: родитель многопоточный (пул Starlette, asyncio)
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PREVIEW_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_previews() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _check_supported(record: File, data: StoredData) -> None:
+    mime_type = record.mime_type
+    if mime_type == PDF_MIME_TYPE:
+        package = "pypdfium2"
+    elif mime_type in IMAGE_MIME_TYPES:
+        package = "PIL"
+    else:
+        raise AppError("Preview is not available for this file type", status_code=415)
+    if any(importlib.util.find_spec(name) is None for name in {"PIL", package}):
+        raise AppError("Previews are not enabled on this server", status_code=501)
+    if data.size > settings.PREVIEW_MAX_SOURCE_SIZE:
+        raise AppError("File is too large for a preview", status_code=415)
+
+
+def _new_preview_file(path: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    return tmp_path
+
+
+def _publish(tmp_path: str, path: str) -> bytes:
+    with open(tmp_path, "rb") as f:
+        content = f.read()
+    os.replace(tmp_path, path)
+    _account(len(content))
+    return content
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _generate(data: StoredData, mime_type: str, path: str, max_side: int) -> bytes:
+    global _pending
+    if _pending >= settings.PREVIEW_WORKERS + settings.PREVIEW_MAX_PENDING:
+        raise AppError("Too many previews in progress, try again later", status_code=503)
+    _pending += 1
+    try:
+        src_path, temporary = await run_in_threadpool(local_file_data, data)
+        try:
+            tmp_path = await run_in_threadpool(_new_preview_file, path)
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(
+                    _get_executor(),
+                    render_preview,
+                    src_path,
+                    tmp_path,
+                    max_side,
+                    mime_type,
+                    settings.PREVIEW_MAX_PIXELS,
+                )
+            except BrokenProcessPool:
+                # процесс пула упал (например, по памяти) — пересоздадим пул
+                shutdown_previews()
+                await run_in_threadpool(_remove_quietly, tmp_path)
+                raise AppError("Preview worker failed, try again later", status_code=503)
+            except Exception:
+                await run_in_threadpool(_remove_quietly, tmp_path)
+                raise AppError("Cannot generate a preview for this file", status_code=415)
+            return await run_in_threadpool(_publish, tmp_path, path)
+        finally:
+            if temporary:
+                await run_in_threadpool(_remove_quietly, src_path)
+    finally:
+        _pending -= 1
+
+
+def _forget(path: str, future: asyncio.Future) -> None:
+    _in_flight.pop(path, None)
+    if not future.cancelled():
+        # ошибку уже получили ожидающие запросы; если их не осталось —
+        # не даём asyncio ругаться на непрочитанное исключение
+        future.exception()
+
+
+async def get_preview(record: File, data: StoredData, preset: str) -> bytes:
+    """
+    JPEG-превью файла в размере preset. Готовые превью берутся из кеша
+    на диске (ключ — содержимое файла и пресет); новые рисуются в пуле
+    процессов, не занимая event loop и пул потоков. Одновременные запросы
+    одного превью ждут одну и ту же отрисовку.
+    """
+    key = preview_key(record)
+    path = _cache_path(key, preset)
+    content = await run_in_threadpool(_read_cached, path)
+    if content is not None:
+        return content
+    _check_supported(record, data)
+    future = _in_flight.get(path)
+    if future is None:
+        future = asyncio.ensure_future(
+            _generate(data, record.mime_type, path, PREVIEW_SIZES[preset])
+        )
+        _in_flight[path] = future
+        future.add_done_callback(lambda f: _forget(path, f))
+    # shield: отключившийся клиент не отменяет отрисовку для остальных
+    return await asyncio.shield(future)
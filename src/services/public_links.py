@@ -0,0 +1,220 @@
+# src/services/public_links.py
+"""
+Подписанные публичные ссылки.
+
+Токен — base64url(JSON) + "." + base64url(HMAC-SHA256), в JSON — всё,
+что нужно для отдачи файла: id, хеш содержимого, размер, тип, имя и срок
+действия. Поэтому скачивание по ссылке не читает БД: подпись и срок
+проверяются на месте, отзыв — по списку в памяти процесса, который
+периодически перечитывается из таблицы revoked_links. Счётчики скачиваний
+тоже копятся в памяти и сбрасываются в БД пачками.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.public_link import add_download_counts, load_revocations
+from models.directory import Directory
+from models.file import File
+from utils.errors import AppError, NotFoundError
+
+SIGNATURE_SIZE = 16
+
+_revocations: dict[tuple[str, int], datetime] | None = None
+_revocations_lock = threading.Lock()
+_downloads: Counter = Counter()
+_downloads_lock = threading.Lock()
+
+
+@dataclass
+class PublicLink:
+    """
+    Разобранная ссылка. Для файлов поля повторяют нужные для отдачи поля
+    File (build_file_response и locate_file_data принимают её вместо записи).
+    """
+    kind: str  # "f" — файл, "d" — папка
+    id: int
+    issued_at: datetime
+    expires_at: datetime
+    filename: str | None = None
+    checksum: str | None = None
+    size: int | None = None
+    mime_type: str | None = None
+    uploaded_at: datetime | None = None
+    encoding: str | None = None
+
+
+def _secret() -> bytes:
+    if settings.PUBLIC_LINK_SECRET:
+        return settings.PUBLIC_LINK_SECRET.encode()
+    # отдельный ключ, производный от SECRET_KEY: подпись ссылки нельзя
+    # выдать за подпись JWT и наоборот
+    return hmac.new(settings.SECRET_KEY.encode(), b"public-links", hashlib.sha256).digest()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _timestamp_ms(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def _from_ms(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+
+
+def _sign(payload: dict) -> str:
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    signature = hmac.new(_secret(), body.encode("ascii"), hashlib.sha256).digest()
+    return f"{body}.{_b64encode(signature[:SIGNATURE_SIZE])}"
+
+
+def issue_file_link(record: File, encoding: str | None, expires_at: datetime) -> str:
+    payload = {
+        "k": "f",
+        "i": record.id,
+        "a": _timestamp_ms(datetime.now(timezone.utc)),
+        "x": _timestamp_ms(expires_at),
+        "h": record.checksum,
+        "s": record.size,
+        "m": record.mime_type,
+        "u": _timestamp_ms(record.uploaded_at) if record.uploaded_at else None,
+        "e": encoding,
+        # файлам в blob-хранилище хватает имени для Content-Disposition;
+        # старые файлы без checksum лежат по полному пути
+        "n": record.filename if record.checksum is None else os.path.basename(record.filename),
+    }
+    return _sign(payload)
+
+
+def issue_directory_link(directory: Directory, expires_at: datetime) -> str:
+    payload = {
+        "k": "d",
+        "i": directory.id,
+        "a": _timestamp_ms(datetime.now(timezone.utc)),
+        "x": _timestamp_ms(expires_at),
+    }
+    return _sign(payload)
+
+
+def public_url(token: str) -> str:
+    return f"{settings.PUBLIC_BASE_URL.rstrip('/')}/files/public/{token}"
+
+
+def parse_public_link(token: str) -> PublicLink | None:
+    """
+    Проверяет подписанный токен без обращения к БД. None — это не
+    подписанная ссылка (старый UUID-токен, его ищут в БД); подделанная,
+    истёкшая или отозванная ссылка — AppError.
+    """
+    body, dot, signature = token.partition(".")
+    if not dot:
+        return None
+    expected = hmac.new(_secret(), body.encode("ascii", "replace"), hashlib.sha256).digest()
+    try:
+        valid = hmac.compare_digest(_b64decode(signature), expected[:SIGNATURE_SIZE])
+        payload = json.loads(_b64decode(body)) if valid else None
+    except (binascii.Error, ValueError):
+        valid = False
+    if not valid:
+        raise NotFoundError("Invalid token")
+
+    link = PublicLink(
+        kind=payload["k"],
+        id=payload["i"],
+        issued_at=_from_ms(payload["a"]),
+        expires_at=_from_ms(payload["x"]),
+    )
+    if link.expires_at <= datetime.now(timezone.utc):
+        raise AppError("Link has expired", status_code=410)
+    if _is_revoked(link):
+        raise AppError("Link has been revoked", status_code=410)
+    if link.kind == "f":
+        link.filename = payload["n"]
+        link.checksum = payload["h"]
+        link.size = payload["s"]
+        link.mime_type = payload["m"]
+        link.uploaded_at = _from_ms(payload["u"]) if payload["u"] is not None else None
+        link.encoding = payload["e"]
+    return link
+
+
+def _is_revoked(link: PublicLink) -> bool:
+    revocations = _revocations
+    if revocations is None:
+        # процесс без фоновой синхронизации (скрипты, тесты) — читаем один раз
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            refresh_revocations(db)
+        finally:
+            db.close()
+        revocations = _revocations
+    revoked_at = revocations.get((link.kind, link.id))
+    return revoked_at is not None and link.issued_at <= revoked_at
+
+
+def refresh_revocations(db: Session) -> None:
+    global _revocations
+    loaded = load_revocations(db)
+    with _revocations_lock:
+        _revocations = loaded
+
+
+def remember_revocations(revoked: list[tuple[str, int, datetime]]) -> None:
+    """
+    Отзыв, только что закоммиченный в этом процессе, действует сразу;
+    остальные процессы увидят его при следующей синхронизации.
+    """
+    global _revocations
+    if not revoked:
+        return
+    with _revocations_lock:
+        updated = dict(_revocations or {})
+        for kind, target_id, revoked_at in revoked:
+            updated[(kind, target_id)] = revoked_at
+        _revocations = updated
+
+
+def count_download(kind: str, target_id: int) -> None:
+    with _downloads_lock:
+        _downloads[(kind, target_id)] += 1
+
+
+def flush_download_counts(db: Session) -> int:
+    """
+    Сбрасывает накопленные счётчики в БД. При ошибке они возвращаются
+    в память и уйдут со следующей попыткой. Возвращает число объектов.
+    """
+    global _downloads
+    with _downloads_lock:
+        counts, _downloads = _downloads, Counter()
+    if not counts:
+        return 0
+    try:
+        add_download_counts(db, counts)
+    except BaseException:
+        db.rollback()
+        with _downloads_lock:
+            _downloads.update(counts)
+        raise
+    return len(counts)
@@ -0,0 +1,49 @@
+# src/services/quota.py
+"""
+Квоты на место. Занятое место берётся из агрегата user_usage (одна
+строка), поэтому проверка стоит один запрос при любом числе файлов.
+
+Проверок две: до приёма данных (quota_remaining — сколько ещё можно
+принять, по нему загрузка обрывается на лету) и при коммите записи File
+(enforce_quota — после изменения агрегата в той же транзакции, это
+ловит параллельные загрузки одного пользователя).
+"""
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.usage import get_quota_usage
+from utils.errors import QuotaExceededError
+
+
+def effective_quota(quota_bytes: int | None) -> int | None:
+    """
+    Квота пользователя с учётом значения по умолчанию; None — без ограничения.
+    """
+    if quota_bytes is None:
+        quota_bytes = settings.USER_QUOTA_BYTES
+    return quota_bytes or None
+
+
+def quota_remaining(db: Session, owner_id: int) -> int | None:
+    """
+    Сколько байт пользователь ещё может загрузить; None — без ограничения.
+    """
+    quota_bytes, used = get_quota_usage(db, owner_id)
+    quota = effective_quota(quota_bytes)
+    if quota is None:
+        return None
+    return max(quota - used, 0)
+
+
+def enforce_quota(db: Session, owner_id: int) -> None:
+    """
+    Вызывается после bump_usage, до коммита: UPDATE агрегата уже держит
+    блокировку строки, так что параллельная транзакция увидит итог этой.
+    При превышении откатывает транзакцию и бросает QuotaExceededError.
+    """
+    quota_bytes, used = get_quota_usage(db, owner_id)
+    quota = effective_quota(quota_bytes)
+    if quota is not None and used > quota:
+        db.rollback()
+        raise QuotaExceededError()
@@ -0,0 +1,253 @@
+# src/services/rate_limit.py
+"""
+Ограничение скорости по алгоритму token bucket.
+
+Корзина наполняется со скоростью rate единиц в секунду до capacity.
+Запрос забирает одну единицу, а если корзина пуста, получает 429 с
+Retry-After. Передача данных забирает байты и может уйти в долг: поток
+не обрывается, а засыпает, пока долг не погасится. Так все скачивания
+(или загрузки) пользователя вместе идут не быстрее заданной скорости.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator
+
+from fastapi.responses import Response, StreamingResponse
+
+from core.config import settings
+from utils.errors import TooManyRequestsError
+from utils.redis_clients import redis_clients
+
+# байты копятся локально и списываются из корзины порциями —
+# не обращаемся к бэкенду (Redis) на каждый кусок ответа
+THROTTLE_QUANTUM = 256 * 1024
+
+
+class InMemoryBuckets:
+    """
+    Корзины в памяти процесса: у каждого воркера свои лимиты. atake —
+    то же, что take: списание под локом не блокирует event loop.
+    """
+
+    def __init__(self, max_buckets: int):
+        self.max_buckets = max_buckets
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: float, amount: float, debt: bool) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                self._buckets.move_to_end(key)
+            if tokens < amount and not debt:
+                return (amount - tokens) / rate
+            tokens -= amount
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_buckets:
+                # забытая корзина просто начнёт заново — полной
+                self._buckets.popitem(last=False)
+        return max(-tokens, 0) / rate
+
+    async def atake(self, key: str, rate: float, capacity: float, amount: float, debt: bool) -> float:
+        return self.take(key, rate, capacity, amount, debt)
+
+
+# KEYS[1] — корзина; ARGV: rate, capacity, amount, debt (0/1).
+# Время — часы Redis, общие для всех воркеров. Число возвращается
+# строкой: целые Lua-числа Redis отбросил бы вместе с дробной частью.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = capacity
+if state[1] then
+    tokens = math.min(capacity, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+end
+if tokens < amount and ARGV[4] == "0" then
+    return tostring((amount - tokens) / rate)
+end
+tokens = tokens - amount
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return tostring(math.max(-tokens, 0) / rate)
+"""
+
+
+class RedisBuckets:
+    """
+    Корзины в Redis: лимит общий для всех воркеров и серверов.
+    Проверка и списание — один атомарный Lua-скрипт; из event loop —
+    atake через асинхронный клиент.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        self._redis, self._aredis = redis_clients(url, "RATE_LIMIT_BACKEND")
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+        self._atake = self._aredis.register_script(_TAKE_SCRIPT)
+        self._prefix = prefix
+
+    def take(self, key: str, rate: float, capacity: float, amount: float, debt: bool) -> float:
+        wait = self._take(
+            keys=[self._prefix + key], args=[rate, capacity, amount, 1 if debt else 0]
+        )
+        return float(wait)
+
+    async def atake(self, key: str, rate: float, capacity: float, amount: float, debt: bool) -> float:
+        wait = await self._atake(
+            keys=[self._prefix + key], args=[rate, capacity, amount, 1 if debt else 0]
+        )
+        return float(wait)
+
+
+class ByteThrottle:
+    """
+    Ограничитель одного потока данных: await throttle(n) после каждого
+    куска из n байт; при исчерпанной корзине засыпает в event loop,
+    не занимая поток из пула.
+    """
+
+    def __init__(self, limiter: "RateLimiter", key: str, rate: float, capacity: float):
+        self._limiter = limiter
+        self._key = key
+        self._rate = rate
+        self._capacity = capacity
+        self._quantum = min(THROTTLE_QUANTUM, capacity)
+        self._pending = 0
+
+    async def __call__(self, size: int) -> None:
+        self._pending += size
+        if self._pending < self._quantum:
+            return
+        amount, self._pending = self._pending, 0
+        wait = await self._limiter.atake(self._key, self._rate, self._capacity, amount, debt=True)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Лимиты поверх бэкенда корзин. Ошибки бэкенда (Redis недоступен)
+    лимиты отключают, а не ломают запросы. Синхронные методы — для кода
+    в пуле потоков, a-методы — для event loop.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.rejected = 0
+
+    def take(self, key: str, rate: float, capacity: float, amount: float, debt: bool) -> float:
+        if self.backend is None or rate <= 0:
+            return 0.0
+        try:
+            return self.backend.take(key, rate, max(capacity, 1), amount, debt)
+        except Exception:
+            return 0.0
+
+    async def atake(self, key: str, rate: float, capacity: float, amount: float, debt: bool) -> float:
+        if self.backend is None or rate <= 0:
+            return 0.0
+        try:
+            return await self.backend.atake(key, rate, max(capacity, 1), amount, debt)
+        except Exception:
+            return 0.0
+
+    def check_request(self, subject: str) -> None:
+        """
+        Списывает один запрос subject'а; корзина пуста — 429.
+        """
+        key, rate, burst = _request_bucket(subject)
+        self._reject_if_waiting(self.take(key, rate, burst, 1, debt=False))
+
+    async def acheck_request(self, subject: str) -> None:
+        key, rate, burst = _request_bucket(subject)
+        self._reject_if_waiting(await self.atake(key, rate, burst, 1, debt=False))
+
+    def _reject_if_waiting(self, wait: float) -> None:
+        if wait > 0:
+            self.rejected += 1
+            raise TooManyRequestsError("Rate limit exceeded", retry_after=wait)
+
+    def download_throttle(self, subject: str) -> ByteThrottle | None:
+        if _is_public(subject):
+            rate = settings.RATE_LIMIT_PUBLIC_DOWNLOAD_BYTES_PER_SECOND
+        else:
+            rate = settings.RATE_LIMIT_DOWNLOAD_BYTES_PER_SECOND
+        return self._throttle(f"{subject}:down", rate)
+
+    def upload_throttle(self, subject: str) -> ByteThrottle | None:
+        return self._throttle(f"{subject}:up", settings.RATE_LIMIT_UPLOAD_BYTES_PER_SECOND)
+
+    def _throttle(self, key: str, rate: float) -> ByteThrottle | None:
+        if self.backend is None or rate <= 0:
+            return None
+        return ByteThrottle(self, key, rate, settings.RATE_LIMIT_BYTES_BURST)
+
+
+def user_subject(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def link_subject(token: str) -> str:
+    # сам токен (в нём подпись) в ключи Redis не кладём
+    return "link:" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+
+def _is_public(subject: str) -> bool:
+    return subject.startswith("link:")
+
+
+def _request_bucket(subject: str) -> tuple[str, float, int]:
+    if _is_public(subject):
+        return (
+            f"{subject}:req",
+            settings.RATE_LIMIT_PUBLIC_REQUESTS_PER_SECOND,
+            settings.RATE_LIMIT_PUBLIC_REQUEST_BURST,
+        )
+    return (
+        f"{subject}:req",
+        settings.RATE_LIMIT_REQUESTS_PER_SECOND,
+        settings.RATE_LIMIT_REQUEST_BURST,
+    )
+
+
+async def _throttled(chunks: AsyncIterator, throttle: ByteThrottle) -> AsyncIterator:
+    async for chunk in chunks:
+        yield chunk
+        await throttle(len(chunk))
+
+
+def throttle_response(response: Response, throttle: ByteThrottle | None) -> Response:
+    """
+    Ограничивает скорость отдачи потокового ответа; остальные (304, 416)
+    возвращаются как есть.
+    """
+    if throttle is not None and isinstance(response, StreamingResponse):
+        response.body_iterator = _throttled(response.body_iterator, throttle)
+    return response
+
+
+def build_rate_limiter() -> RateLimiter:
+    backend_name = settings.RATE_LIMIT_BACKEND
+    if backend_name == "memory":
+        backend = InMemoryBuckets(settings.RATE_LIMIT_MAX_BUCKETS)
+    elif backend_name == "redis":
+        backend = RedisBuckets(settings.REDIS_URL)
+    elif backend_name == "none":
+        backend = None
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend_name}")
+    return RateLimiter(backend)
+
+
+rate_limiter = build_rate_limiter()
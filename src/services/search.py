@@ -0,0 +1,232 @@
+# src/services/search.py
+"""
+Поиск файлов и папок пользователя по пути.
+
+Режимы (регистр не важен):
+  • substring — q встречается где угодно в пути ("report" → "docs/Q3-report.pdf");
+  • prefix — имя файла или папки начинается с q;
+  • glob — шаблон с "*" и "?" (не переходят через "/") и "**" (любое число
+    папок). Шаблон без "/" сравнивается с именем ("*.pdf"), со "/" — с
+    путём от корня ("docs/**/*.pdf").
+
+БД отбирает кандидатов по индексу (см. crud.search), а точное совпадение
+проверяется здесь. За один запрос проверяется не больше
+SEARCH_MAX_SCANNED_ROWS кандидатов: если их больше, страница может
+оказаться неполной, но next_cursor продолжит с места остановки.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.directory import DIRECTORY_SORT_COLUMNS
+from crud.file import FILE_SORT_COLUMNS
+from crud.search import FileFilters, PathPattern, search_directories, search_files
+from utils.errors import ValidationError
+from utils.pagination import decode_cursor, encode_cursor
+
+# кандидатов за одно обращение к БД: больше страницы, потому что часть
+# отсеется точной проверкой
+SCAN_BATCH = 500
+# меньше трёх символов триграммный индекс не использует
+MIN_FRAGMENT = 3
+
+
+@dataclass
+class SearchQuery:
+    pattern: PathPattern
+    # точная проверка пути относительно папки пользователя
+    regex: re.Pattern
+
+
+@dataclass
+class SearchResult:
+    directories: list[str] = field(default_factory=list)
+    files: list = field(default_factory=list)  # строки (id, filename, size, …)
+    next_cursor: str | None = None
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _literal_fragments(text: str) -> list[str]:
+    return [text] if len(text) >= MIN_FRAGMENT else []
+
+
+def _glob_fragments(glob: str) -> list[str]:
+    return [part for part in re.split(r"[*?]+", glob) if len(part) >= MIN_FRAGMENT]
+
+
+def _glob_to_regex(glob: str) -> str:
+    out = []
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif glob[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(glob[i]))
+            i += 1
+    return "".join(out)
+
+
+def _glob_to_like(glob: str) -> str:
+    # LIKE не умеет «кроме /» — шаблон шире, лишнее отсеет regex;
+    # "**/" может не совпасть ни с одной папкой, поэтому без "/"
+    like = _like_escape(glob).replace("**/", "*")
+    return re.sub(r"\*+", "%", like).replace("?", "_")
+
+
+def compile_query(mode: str, q: str) -> SearchQuery:
+    """
+    Шаблон для БД и точная проверка. В БД хранятся полные пути
+    ("user_1/docs/a.txt"), поэтому перед именем всегда есть "/".
+    """
+    if not q or "\x00" in q:
+        raise ValidationError("Invalid search query")
+    if mode == "substring":
+        pattern = PathPattern(like=f"%{_like_escape(q)}%", fragments=_literal_fragments(q))
+        regex = re.escape(q)
+    elif mode == "prefix":
+        if "/" in q:
+            raise ValidationError("Prefix search matches names and cannot contain '/'")
+        pattern = PathPattern(
+            like=f"%/{_like_escape(q)}%", fragments=_literal_fragments(f"/{q}")
+        )
+        regex = rf"(?:^|/){re.escape(q)}[^/]*$"
+    elif mode == "glob":
+        glob = q.strip("/")
+        if not glob:
+            raise ValidationError("Invalid search query")
+        # путь от корня (со "/") или имя на любой глубине (без)
+        anchor = "^" if "/" in glob else "(?:^|/)"
+        pattern = PathPattern(
+            like=f"%/{_glob_to_like(glob)}", fragments=_glob_fragments(f"/{glob}")
+        )
+        regex = f"{anchor}{_glob_to_regex(glob)}$"
+    else:
+        raise ValidationError(f"Unknown search mode: {mode}")
+    return SearchQuery(pattern=pattern, regex=re.compile(regex, re.IGNORECASE))
+
+
+def _position(sort: str, state: dict) -> tuple | None:
+    if "v" not in state:
+        return None
+    value = state["v"]
+    if sort == "uploaded_at" and value is not None:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid cursor")
+    return value, state.get("i", 0)
+
+
+def _scan(fetch, key, matches, after: tuple | None, limit: int, budget: int):
+    """
+    Читает кандидатов пачками и отбирает до limit совпадений. Возвращает
+    (совпадения, позиция для следующей страницы или None, если кандидатов
+    больше нет, сколько кандидатов просмотрено).
+    """
+    hits = []
+    scanned = 0
+    while True:
+        size = min(max(limit + 1, SCAN_BATCH), budget - scanned)
+        if size <= 0:
+            # бюджет кончился — продолжим с последнего просмотренного
+            return hits, after, scanned
+        rows = fetch(after, size)
+        for row in rows:
+            scanned += 1
+            if matches(row):
+                if len(hits) == limit:
+                    return hits, key(hits[-1]), scanned
+                hits.append(row)
+            after = key(row)
+        if len(rows) < size:
+            return hits, None, scanned
+
+
+def search(
+    db: Session,
+    owner_id: int,
+    scope: str,
+    query: SearchQuery,
+    filters: FileFilters,
+    kind: str = "all",
+    sort: str = "name",
+    descending: bool = False,
+    cursor: str | None = None,
+    limit: int = 100,
+) -> SearchResult:
+    """
+    Одна страница результатов: сначала папки, затем файлы — как в листинге
+    папки. Фильтры по размеру и типу есть только у файлов: с ними папки
+    не ищутся; фильтр по дате применяется к дате создания папки.
+    """
+    root = len(f"user_{owner_id}/")
+    with_directories = kind in ("all", "directory") and (
+        filters.min_size is None and filters.max_size is None and not filters.mime_type
+    )
+    with_files = kind in ("all", "file")
+
+    state = decode_cursor(cursor) if cursor else {"k": "d" if with_directories else "f"}
+    if state.get("k") not in ("d", "f"):
+        raise ValidationError("Invalid cursor")
+    after = _position(sort, state)
+    budget = settings.SEARCH_MAX_SCANNED_ROWS
+    result = SearchResult()
+
+    if state["k"] == "d" and with_directories:
+        dir_column = DIRECTORY_SORT_COLUMNS[sort].key
+        hits, stop, scanned = _scan(
+            lambda start, size: search_directories(
+                db, owner_id, scope, query.pattern,
+                filters.uploaded_after, filters.uploaded_before,
+                sort, descending, start, size,
+            ),
+            lambda row: (getattr(row, dir_column), row.id),
+            lambda row: query.regex.search(row.path[root:]),
+            after, limit, budget,
+        )
+        budget -= scanned
+        result.directories = [d.path[root:] for d in hits]
+        if stop is not None:
+            result.next_cursor = encode_cursor({"k": "d", "v": stop[0], "i": stop[1]})
+            return result
+        after = None
+    elif state["k"] == "d":
+        after = None
+
+    remaining = limit - len(result.directories)
+    if not with_files:
+        return result
+    if remaining == 0 or budget <= 0:
+        result.next_cursor = encode_cursor({"k": "f"})
+        return result
+
+    file_column = FILE_SORT_COLUMNS[sort].key
+    hits, stop, _ = _scan(
+        lambda start, size: search_files(
+            db, owner_id, scope, query.pattern, filters, sort, descending, start, size
+        ),
+        lambda row: (getattr(row, file_column), row.id),
+        lambda row: query.regex.search(row.filename[root:]),
+        after, remaining, budget,
+    )
+    result.files = hits
+    if stop is not None:
+        result.next_cursor = encode_cursor({"k": "f", "v": stop[0], "i": stop[1]})
+    return result
@@ -0,0 +1,39 @@
+# src/services/storage/__init__.py
+
+import os
+
+from core.config import settings
+from services.storage.base import StorageBackend
+from services.storage.local import LocalStorage
+from services.storage.s3 import S3Storage
+
+
+def build_storage() -> StorageBackend:
+    backend_name = settings.STORAGE_BACKEND
+    if backend_name == "local":
+        return LocalStorage(os.path.join(settings.UPLOAD_ROOT, "blobs"))
+    staging_dir = os.path.join(settings.UPLOAD_ROOT, ".staging")
+    if backend_name == "s3":
+        options = {
+            "endpoint_url": settings.S3_ENDPOINT_URL,
+            "region_name": settings.S3_REGION,
+            "aws_access_key_id": settings.S3_ACCESS_KEY_ID,
+            "aws_secret_access_key": settings.S3_SECRET_ACCESS_KEY,
+        }
+        return S3Storage(
+            settings.S3_BUCKET,
+            staging_dir,
+            prefix=settings.S3_PREFIX,
+            part_size=settings.S3_PART_SIZE,
+            **{name: value for name, value in options.items() if value},
+        )
+    if backend_name == "memory":
+        from services.storage.memory_s3 import InMemoryS3Client
+
+        return S3Storage("memory", staging_dir, client=InMemoryS3Client())
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend_name}")
+
+
+storage = build_storage()
+
+__all__ = ["StorageBackend", "LocalStorage", "S3Storage", "build_storage", "storage"]
@@ -0,0 +1,50 @@
+# src/services/storage/base.py
+
+from typing import Iterator
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class StorageBackend:
+    """
+    Хранилище содержимого файлов по ключу (SHA-256 для blob'ов).
+
+    Данные сначала пишутся во временный файл в staging_dir (локальный
+    диск), затем put_file публикует его под ключом. Все методы
+    блокирующие — из async-кода вызываются через пул потоков.
+    """
+
+    # локальная папка для временных файлов загрузок
+    staging_dir: str
+
+    def put_file(self, key: str, src_path: str) -> None:
+        """
+        Публикует локальный файл src_path под ключом key. После успеха
+        src_path больше не существует; при ошибке остаётся на месте.
+        """
+        raise NotImplementedError
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        """
+        Байты [start, end] (включительно) кусками. Если объекта нет,
+        генератор бросает FileNotFoundError при первом чтении.
+        """
+        raise NotImplementedError
+
+    def size(self, key: str) -> int | None:
+        """
+        Размер объекта или None, если его нет.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """
+        Удаляет объект; отсутствие объекта — не ошибка.
+        """
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> str | None:
+        """
+        Путь на локальном диске, если бэкенд его даёт (иначе None).
+        """
+        return None
@@ -0,0 +1,94 @@
+# src/services/storage/memory_s3.py
+
+import io
+import threading
+import uuid
+
+
+class StubClientError(Exception):
+    """
+    Ошибка в формате botocore.exceptions.ClientError (поле response).
+    """
+
+    def __init__(self, code: str, operation: str):
+        super().__init__(f"{operation}: {code}")
+        self.response = {"Error": {"Code": code}}
+
+
+class InMemoryS3Client:
+    """
+    Минимальная заглушка boto3 S3 client в памяти процесса: ровно те вызовы,
+    которыми пользуется S3Storage, с проверками как у настоящего S3
+    (Range, порядок и размер частей multipart upload). Для разработки
+    и тестов без сети: STORAGE_BACKEND=memory.
+    """
+
+    def __init__(self, min_part_size: int = 5 * 1024 * 1024):
+        self.min_part_size = min_part_size
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> dict:
+        with self._lock:
+            self.objects[(Bucket, Key)] = bytes(Body)
+        return {}
+
+    def _get(self, bucket: str, key: str, operation: str) -> bytes:
+        with self._lock:
+            data = self.objects.get((bucket, key))
+        if data is None:
+            raise StubClientError("NoSuchKey" if operation == "GetObject" else "404", operation)
+        return data
+
+    def get_object(self, Bucket: str, Key: str, Range: str | None = None) -> dict:
+        data = self._get(Bucket, Key, "GetObject")
+        if Range is not None:
+            first, _, last = Range.removeprefix("bytes=").partition("-")
+            start = int(first)
+            end = min(int(last), len(data) - 1) if last else len(data) - 1
+            if start >= len(data):
+                raise StubClientError("InvalidRange", "GetObject")
+            data = data[start : end + 1]
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        return {"ContentLength": len(self._get(Bucket, Key, "HeadObject"))}
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        with self._lock:
+            self.objects.pop((Bucket, Key), None)
+        return {}
+
+    def create_multipart_upload(self, Bucket: str, Key: str) -> dict:
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        with self._lock:
+            if UploadId not in self.uploads:
+                raise StubClientError("NoSuchUpload", "UploadPart")
+            self.uploads[UploadId][PartNumber] = bytes(Body)
+        return {"ETag": f'"{UploadId}-{PartNumber}"'}
+
+    def complete_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict
+    ) -> dict:
+        with self._lock:
+            parts = self.uploads.pop(UploadId, None)
+            if parts is None:
+                raise StubClientError("NoSuchUpload", "CompleteMultipartUpload")
+            numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+            if numbers != sorted(numbers) or set(numbers) != set(parts):
+                raise StubClientError("InvalidPartOrder", "CompleteMultipartUpload")
+            if any(len(parts[n]) < self.min_part_size for n in numbers[:-1]):
+                raise StubClientError("EntityTooSmall", "CompleteMultipartUpload")
+            self.objects[(Bucket, Key)] = b"".join(parts[n] for n in numbers)
+        return {}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        with self._lock:
+            self.uploads.pop(UploadId, None)
+        return {}
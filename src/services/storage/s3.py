@@ -0,0 +1,115 @@
+# src/services/storage/s3.py
+
+import os
+from typing import Iterator
+
+from services.storage.base import READ_CHUNK_SIZE, StorageBackend
+
+# S3 не принимает части multipart upload меньше 5 МиБ (кроме последней)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def _is_missing(exc: Exception) -> bool:
+    code = getattr(exc, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-совместимое хранилище (AWS S3, MinIO, Ceph RGW...). Файлы больше
+    part_size загружаются multipart upload'ом: в памяти — одна часть.
+    client — объект с интерфейсом boto3 S3 client; если не передан,
+    создаётся через boto3 (импортируется лениво).
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        staging_dir: str,
+        prefix: str = "",
+        part_size: int = 8 * 1024 * 1024,
+        client=None,
+        **client_options,
+    ):
+        if client is None:
+            try:
+                import boto3
+            except ImportError as exc:
+                raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package") from exc
+            client = boto3.client("s3", **client_options)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.staging_dir = staging_dir
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def put_file(self, key: str, src_path: str) -> None:
+        size = os.path.getsize(src_path)
+        with open(src_path, "rb") as f:
+            if size <= self.part_size:
+                self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=f.read())
+            else:
+                self._multipart_upload(key, f)
+        os.remove(src_path)
+
+    def _multipart_upload(self, key: str, f) -> None:
+        upload = self.client.create_multipart_upload(Bucket=self.bucket, Key=self._key(key))
+        upload_id = upload["UploadId"]
+        parts = []
+        try:
+            number = 1
+            while data := f.read(self.part_size):
+                result = self.client.upload_part(
+                    Bucket=self.bucket,
+                    Key=self._key(key),
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    Body=data,
+                )
+                parts.append({"ETag": result["ETag"], "PartNumber": number})
+                number += 1
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self._key(key),
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self._key(key), UploadId=upload_id
+            )
+            raise
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        if end < start:
+            return
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket, Key=self._key(key), Range=f"bytes={start}-{end}"
+            )
+        except Exception as exc:
+            if _is_missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+        body = response["Body"]
+        try:
+            while chunk := body.read(READ_CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    def size(self, key: str) -> int | None:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as exc:
+            if _is_missing(exc):
+                return None
+            raise
+        return response["ContentLength"]
+
+    def delete(self, key: str) -> None:
+        # DeleteObject в S3 идемпотентен: отсутствие объекта — не ошибка
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
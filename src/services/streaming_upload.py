@@ -0,0 +1,219 @@
+# src/services/streaming_upload.py
+
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from services.blob_store import compress_for_storage, new_staging_file, store_blob_file
+from utils.errors import QuotaExceededError, ValidationError
+
+
+@dataclass
+class ReceivedUpload:
+    """
+    Результат приёма файла: данные уже лежат во временном файле,
+    остаётся только опубликовать их в хранилище под хешем.
+    """
+    filename: str
+    tmp_path: str
+    size: int
+    sha256: str
+    # Content-Type части, если клиент прислал что-то осмысленное
+    content_type: str | None = None
+    # сжатие при хранении (после compress_upload) и размер в хранилище
+    encoding: str | None = None
+    stored_size: int | None = None
+
+
+class _TempFileWriter:
+    """
+    Пишет данные во временный файл хранилища и по пути считает
+    SHA-256 и размер. Все методы блокирующие — вызываются
+    только из пула потоков.
+    """
+
+    def __init__(self):
+        self.tmp_path: str | None = None
+        self._file = None
+        self._hasher = hashlib.sha256()
+        self.size = 0
+
+    def open(self) -> None:
+        fd, self.tmp_path = new_staging_file()
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, pieces: list[bytes]) -> None:
+        for piece in pieces:
+            self._file.write(piece)
+            self._hasher.update(piece)
+            self.size += len(piece)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        self.close()
+        if self.tmp_path is not None:
+            try:
+                os.remove(self.tmp_path)
+            except FileNotFoundError:
+                pass
+
+    @property
+    def sha256(self) -> str:
+        return self._hasher.hexdigest()
+
+
+async def receive_multipart_file(
+    request: Request,
+    check_filename: Callable[[str], object],
+    field_name: str = "file",
+    throttle: Callable[[int], Awaitable[None]] | None = None,
+    max_size: int | None = None,
+) -> ReceivedUpload:
+    """
+    Потоково разбирает multipart/form-data тело запроса и за один проход
+    пишет содержимое поля field_name во временный файл.
+
+    check_filename(filename) вызывается, как только имя файла известно из
+    заголовков части, — до приёма данных; он может отклонить имя исключением.
+    Временный файл создаётся в staging-папке хранилища (для local —
+    на той же файловой системе, и публикация — атомарный os.replace).
+    Вся работа с диском выполняется в пуле
+    потоков, event loop не блокируется. throttle(n) ограничивает скорость
+    приёма: пока он ждёт, тело не читается и клиент упирается в TCP-окно.
+    Как только файл перерастает max_size (остаток квоты), приём обрывается
+    с QuotaExceededError, а временный файл сразу удаляется.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise ValidationError("Expected multipart/form-data body")
+
+    headers: dict[bytes, bytes] = {}
+    header_field = bytearray()
+    header_value = bytearray()
+    state = {"in_target": False, "done": False, "filename": None, "content_type": None}
+    pending: list[bytes] = []
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        state["in_target"] = (
+            not state["done"] and name == field_name and filename is not None
+        )
+        if state["in_target"]:
+            state["filename"] = filename.decode("utf-8", "replace")
+            part_type, _ = parse_options_header(headers.get(b"content-type", b""))
+            if part_type and part_type != b"application/octet-stream":
+                state["content_type"] = part_type.decode("latin-1")
+
+    def on_part_data(data, start, end):
+        if state["in_target"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end():
+        if state["in_target"]:
+            state["in_target"] = False
+            state["done"] = True
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+
+    writer: _TempFileWriter | None = None
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except FormParserError:
+                raise ValidationError("Malformed multipart body")
+            if state["filename"] is not None and writer is None:
+                check_filename(state["filename"])
+                writer = _TempFileWriter()
+                await run_in_threadpool(writer.open)
+            if pending and writer is not None:
+                pieces = pending[:]
+                pending.clear()
+                if max_size is not None and writer.size + sum(map(len, pieces)) > max_size:
+                    raise QuotaExceededError()
+                await run_in_threadpool(writer.write, pieces)
+            if throttle is not None:
+                await throttle(len(chunk))
+        parser.finalize()
+        if writer is None or not state["done"]:
+            raise ValidationError(f"Missing file field '{field_name}'")
+        await run_in_threadpool(writer.close)
+    except BaseException:
+        if writer is not None:
+            await run_in_threadpool(writer.discard)
+        raise
+
+    return ReceivedUpload(
+        filename=state["filename"],
+        tmp_path=writer.tmp_path,
+        size=writer.size,
+        sha256=writer.sha256,
+        content_type=state["content_type"],
+    )
+
+
+def compress_upload(upload: ReceivedUpload, mime_type: str | None) -> None:
+    """
+    Сжимает принятый файл для хранения, если он того стоит (текст, логи,
+    JSON, CSV...). Блокирующая — вызывается из пула потоков.
+    """
+    upload.tmp_path, upload.encoding, upload.stored_size = compress_for_storage(
+        upload.tmp_path, upload.size, mime_type
+    )
+
+
+def commit_upload(upload: ReceivedUpload, blob_encoding: str | None = None) -> None:
+    """
+    Публикует принятый файл в хранилище под его хешем. blob_encoding —
+    сжатие из записи Blob: если blob с этим содержимым уже был сохранён
+    иначе, его данные остаются, а наш временный файл удаляется.
+    """
+    if blob_encoding != upload.encoding:
+        discard_upload(upload)
+        return
+    store_blob_file(upload.tmp_path, upload.sha256, upload.encoding)
+
+
+def discard_upload(upload: ReceivedUpload) -> None:
+    try:
+        os.remove(upload.tmp_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,99 @@
+# src/services/upload_sessions.py
+
+import os
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.upload_session import pop_expired_sessions
+
+# Частичные данные незавершённых сессий. Лежат внутри UPLOAD_ROOT,
+# чтобы для local-хранилища финальный os.replace был атомарным (та же файловая система).
+SESSIONS_ROOT = os.path.join(settings.UPLOAD_ROOT, ".sessions")
+
+
+def part_path(session_id: str) -> str:
+    return os.path.join(SESSIONS_ROOT, f"{session_id}.part")
+
+
+def create_part_file(session_id: str, total_size: int) -> None:
+    """
+    Создаёт файл-заготовку нужного размера: чанки пишутся в него
+    по своим смещениям и могут приходить в любом порядке и параллельно.
+    """
+    os.makedirs(SESSIONS_ROOT, exist_ok=True)
+    with open(part_path(session_id), "wb") as f:
+        f.truncate(total_size)
+
+
+class ChunkWriter:
+    """
+    Пишет тело чанка в файл-заготовку сессии с его смещения по мере
+    приёма, не собирая чанк в памяти. Недописанный чанк не засчитывается
+    (record_chunk не вызывается) и при повторной отправке перезаписывается.
+    Все методы блокирующие — вызываются только из пула потоков.
+    """
+
+    def __init__(self, session_id: str, offset: int):
+        self._session_id = session_id
+        self._offset = offset
+        self._fd: int | None = None
+
+    def open(self) -> None:
+        # нет файла — сессия уже удалена (FileNotFoundError)
+        self._fd = os.open(part_path(self._session_id), os.O_WRONLY)
+
+    def write(self, pieces: list[bytes]) -> None:
+        for piece in pieces:
+            view = memoryview(piece)
+            while view:
+                written = os.pwrite(self._fd, view, self._offset)
+                view = view[written:]
+                self._offset += written
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def remove_part_file(session_id: str) -> None:
+    try:
+        os.remove(part_path(session_id))
+    except FileNotFoundError:
+        pass
+
+
+def chunk_bounds(number: int, chunk_size: int, total_size: int) -> tuple[int, int]:
+    """
+    Байтовый диапазон [start, end) чанка number.
+    """
+    start = number * chunk_size
+    return start, min(start + chunk_size, total_size)
+
+
+def received_ranges(
+    numbers: list[int], chunk_size: int, total_size: int
+) -> list[tuple[int, int]]:
+    """
+    Склеивает отсортированные номера принятых чанков в непрерывные
+    байтовые диапазоны [start, end).
+    """
+    ranges: list[tuple[int, int]] = []
+    for n in numbers:
+        start, end = chunk_bounds(n, chunk_size, total_size)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def purge_expired_sessions(db: Session) -> int:
+    """
+    Удаляет просроченные сессии вместе с их частичными данными.
+    Возвращает количество удалённых сессий.
+    """
+    expired = pop_expired_sessions(db)
+    for session_id in expired:
+        remove_part_file(session_id)
+    return len(expired)
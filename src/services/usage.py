@@ -0,0 +1,80 @@
+# src/services/usage.py
+"""
+Сверка агрегатов использования с диском.
+
+Запуск (из корня репозитория):
+
+    PYTHONPATH=src python -m services.usage
+
+Перечитывает реальные размеры файлов (blob'ов и старых файлов без checksum),
+исправляет сохранённые размеры (у сжатых blob'ов — размер в хранилище), заполняет parent у старых записей
+и пересобирает user_usage с нуля.
+"""
+
+import posixpath
+from sqlalchemy.orm import Session
+
+from crud.usage import rebuild_usage
+from models.blob import Blob
+from models.directory import Directory
+from models.file import File
+from services.blob_store import blob_key, locate_file_data
+from services.storage import storage
+
+
+def reconcile_usage(db: Session, batch_size: int = 1000) -> tuple[int, int]:
+    """
+    Обновляет Blob.size (у сжатых — Blob.stored_size) по хранилищу,
+    File.size — по blob'у или, для старых файлов, по диску; заполняет
+    недостающие parent и пересчитывает агрегаты. Отсутствующие данные
+    считаются нулевого размера.
+    Возвращает (исправлено_записей, пользователей_в_агрегате).
+    """
+    fixed = 0
+    for blob in db.query(Blob).yield_per(batch_size):
+        stored_size = storage.size(blob_key(blob.sha256, blob.encoding)) or 0
+        if blob.encoding is None and blob.size != stored_size:
+            blob.size = stored_size
+            fixed += 1
+        elif blob.encoding is not None and blob.stored_size != stored_size:
+            # исходный размер сжатого blob'а без распаковки не проверить
+            blob.stored_size = stored_size
+            fixed += 1
+    db.commit()
+
+    rows = db.query(File, Blob.size).outerjoin(Blob, Blob.sha256 == File.checksum)
+    for f, blob_size in rows.yield_per(batch_size):
+        if f.checksum is not None:
+            size = blob_size or 0
+        else:
+            data = locate_file_data(f)
+            size = data.size if data is not None else 0
+        if f.size != size or f.parent is None:
+            f.size = size
+            f.parent = posixpath.dirname(f.filename)
+            fixed += 1
+    db.commit()
+
+    for d in db.query(Directory).filter(Directory.parent.is_(None)).yield_per(batch_size):
+        d.parent = posixpath.dirname(d.path)
+        fixed += 1
+    db.commit()
+
+    return fixed, rebuild_usage(db)
+
+
+def main() -> None:
+    from database import SessionLocal
+    # регистрируем модели, на которые ссылаются relationship()
+    from models import user  # noqa: F401
+
+    db = SessionLocal()
+    try:
+        fixed, users = reconcile_usage(db)
+    finally:
+        db.close()
+    print(f"Fixed records: {fixed}, usage rows rebuilt: {users}")
+
+
+if __name__ == "__main__":
+    main()
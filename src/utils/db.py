@@ -0,0 +1,38 @@
+# src/utils/db.py
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, table):
+    """
+    INSERT с поддержкой ON CONFLICT для текущей СУБД (PostgreSQL в проде,
+    SQLite локально) — нужен для атомарных upsert-счётчиков.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported for {dialect}")
+    return insert(table)
+
+
+def chunked(items: list, size: int = 500):
+    """
+    Делит список на куски — для запросов вида IN (...), чтобы не упираться
+    в лимит параметров SQLite.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def path_under(column, prefix: str):
+    """
+    Условие «column начинается с prefix». LIKE сужает выборку, substr
+    делает сравнение точным (в SQLite LIKE не различает регистр).
+    """
+    return column.startswith(prefix, autoescape=True) & (
+        func.substr(column, 1, len(prefix)) == prefix
+    )
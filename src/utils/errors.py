@@ -1,13 +1,18 @@
 # src/utils/errors.py
 
+import math
+
+
 class AppError(Exception):
     """
     Base class for all domain errors.
-    Carries an HTTP status code and a detail message.
+    Carries an HTTP status code, a detail message and optional
+    response headers.
     """
-    def __init__(self, detail: str, status_code: int = 400):
+    def __init__(self, detail: str, status_code: int = 400, headers: dict | None = None):
         self.detail = detail
         self.status_code = status_code
+        self.headers = headers
 
 
 class NotFoundError(AppError):
@@ -23,3 +28,16 @@ class AccessDeniedError(AppError):
 class ValidationError(AppError):
     def __init__(self, detail: str = "Validation error"):
         super().__init__(detail, status_code=422)
+
+
+class QuotaExceededError(AppError):
+    def __init__(self, detail: str = "Storage quota exceeded"):
+        super().__init__(detail, status_code=413)
+
+
+class TooManyRequestsError(AppError):
+    def __init__(self, detail: str = "Too many requests", retry_after: float | None = None):
+        headers = None
+        if retry_after is not None:
+            headers = {"Retry-After": str(max(math.ceil(retry_after), 1))}
+        super().__init__(detail, status_code=429, headers=headers)
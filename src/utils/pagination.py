@@ -0,0 +1,70 @@
+# src/utils/pagination.py
+
+import base64
+import binascii
+import json
+
+from sqlalchemy import and_, or_
+
+from utils.errors import ValidationError
+
+
+def encode_cursor(data: dict) -> str:
+    """
+    Упаковывает позицию keyset-пагинации в непрозрачную строку для клиента.
+    """
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, ValueError, UnicodeError):
+        raise ValidationError("Invalid cursor")
+    if not isinstance(data, dict):
+        raise ValidationError("Invalid cursor")
+    return data
+
+
+def _nullable(sort_column) -> bool:
+    return getattr(sort_column, "nullable", False)
+
+
+def keyset_after(sort_column, id_column, value, last_id: int, descending: bool = False):
+    """
+    Условие «строка идёт после (value, last_id)» для сортировки
+    ORDER BY sort_column, id_column — стабильно даже при одинаковых значениях.
+    NULL в nullable-колонке идёт после всех значений (при убывании — перед
+    ними), как задаёт keyset_order: строки с NULL не теряются между страницами.
+    """
+    if not _nullable(sort_column):
+        if descending:
+            return or_(sort_column < value, and_(sort_column == value, id_column < last_id))
+        return or_(sort_column > value, and_(sort_column == value, id_column > last_id))
+    if value is None:
+        if descending:
+            return or_(sort_column.is_not(None), id_column < last_id)
+        return and_(sort_column.is_(None), id_column > last_id)
+    if descending:
+        return or_(sort_column < value, and_(sort_column == value, id_column < last_id))
+    return or_(
+        sort_column > value,
+        sort_column.is_(None),
+        and_(sort_column == value, id_column > last_id),
+    )
+
+
+def keyset_order(sort_column, id_column, descending: bool = False) -> tuple:
+    # NULLS LAST / FIRST — порядок PostgreSQL по умолчанию (индекс подходит
+    # как есть); SQLite без них ставил бы NULL в начало
+    if descending:
+        order = sort_column.desc()
+        if _nullable(sort_column):
+            order = order.nulls_first()
+        return order, id_column.desc()
+    order = sort_column.asc()
+    if _nullable(sort_column):
+        order = order.nulls_last()
+    return order, id_column.asc()
@@ -0,0 +1,27 @@
+# src/utils/paths.py
+
+import posixpath
+
+from utils.errors import ValidationError
+
+
+def normalize_relative_path(path: str) -> str:
+    """
+    Приводит путь внутри папки пользователя к каноничному виду
+    ("docs//a.txt" → "docs/a.txt") и отклоняет попытки выйти за её пределы
+    (абсолютные пути, "..", пустые имена).
+    """
+    cleaned = path.replace("\\", "/").strip()
+    if not cleaned or cleaned.startswith("/"):
+        raise ValidationError("Invalid path")
+    normalized = posixpath.normpath(cleaned)
+    if normalized in (".", "") or normalized == ".." or normalized.startswith("../"):
+        raise ValidationError("Invalid path")
+    return normalized
+
+
+def user_file_path(owner_id: int, path: str) -> str:
+    """
+    Полный относительный путь файла в хранилище: "user_{owner_id}/<path>".
+    """
+    return f"user_{owner_id}/{normalize_relative_path(path)}"
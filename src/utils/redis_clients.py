@@ -0,0 +1,22 @@
+# src/utils/redis_clients.py
+
+from core.config import settings
+
+
+def redis_clients(url: str, setting: str):
+    """
+    Синхронный и асинхронный клиенты Redis с таймаутами: из event loop
+    ходим только асинхронным, синхронный — для кода в пуле потоков.
+    Зависший Redis задерживает запрос не дольше REDIS_SOCKET_TIMEOUT_SECONDS.
+    setting — имя настройки, выбравшей Redis (для сообщения об ошибке).
+    """
+    try:
+        import redis
+        import redis.asyncio
+    except ImportError as exc:
+        raise RuntimeError(f"{setting}=redis requires the 'redis' package") from exc
+    options = {
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+    }
+    return redis.Redis.from_url(url, **options), redis.asyncio.Redis.from_url(url, **options)
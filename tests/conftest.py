@@ -0,0 +1,55 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# настройки читаются при импорте модулей приложения — задаём их до импорта
+_TMP = tempfile.mkdtemp(prefix="file-storage-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("UPLOAD_ROOT", os.path.join(_TMP, "uploads"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import models.blob  # noqa: E402,F401
+import models.change  # noqa: E402,F401
+import models.directory  # noqa: E402,F401
+import models.directory_move  # noqa: E402,F401
+import models.file  # noqa: E402,F401
+import models.job  # noqa: E402,F401
+import models.revoked_link  # noqa: E402,F401
+import models.upload_session  # noqa: E402,F401
+import models.usage  # noqa: E402,F401
+from database import Base  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    Сессия на отдельной SQLite-базе для каждого теста.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path}/db.sqlite")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def make_user(db):
+    def make(email: str = "user@example.com") -> User:
+        user = User(email=email, hashed_password="x")
+        db.add(user)
+        db.commit()
+        return user
+
+    return make
@@ -0,0 +1,105 @@
+# tests/test_blob_refs.py
+
+from datetime import datetime, timedelta, timezone
+
+from crud.blob import (
+    add_blob_ref,
+    add_blob_refs,
+    add_existing_blob_ref,
+    delete_orphaned_blob,
+    get_blob,
+    list_orphaned_blobs,
+    release_blob_ref,
+    release_blob_refs,
+)
+
+SHA = "a" * 64
+OTHER = "b" * 64
+
+
+def _blob(db, sha256=SHA):
+    db.expire_all()
+    return get_blob(db, sha256)
+
+
+def _later():
+    return datetime.now(timezone.utc) + timedelta(minutes=1)
+
+
+def test_refcount_goes_up_and_down(db):
+    add_blob_ref(db, SHA, 10, "gzip", 4)
+    add_blob_ref(db, SHA, 10)
+    db.commit()
+    blob = _blob(db)
+    assert (blob.refcount, blob.encoding, blob.stored_size) == (2, "gzip", 4)
+
+    release_blob_ref(db, SHA)
+    db.commit()
+    blob = _blob(db)
+    assert blob.refcount == 1 and blob.orphaned_at is None
+
+    release_blob_ref(db, SHA)
+    db.commit()
+    blob = _blob(db)
+    assert blob.refcount == 0 and blob.orphaned_at is not None
+
+
+def test_orphan_is_not_reused_by_hash(db):
+    add_blob_ref(db, SHA, 10)
+    db.commit()
+    assert add_existing_blob_ref(db, SHA) is not None
+    release_blob_refs(db, {SHA: 2})
+    db.commit()
+    # данные blob'а без ссылок может в этот момент стирать сборщик
+    assert add_existing_blob_ref(db, SHA) is None
+    assert _blob(db).refcount == 0
+
+
+def test_new_reference_revives_orphan(db):
+    add_blob_ref(db, SHA, 10, "gzip", 4)
+    release_blob_ref(db, SHA)
+    db.commit()
+    add_blob_ref(db, SHA, 10, None, None)
+    db.commit()
+    blob = _blob(db)
+    assert blob.refcount == 1 and blob.orphaned_at is None
+    # описание данных — от новой загрузки: старые могли быть уже стёрты
+    assert blob.encoding is None and blob.stored_size is None
+    assert list_orphaned_blobs(db, _later()) == []
+
+
+def test_referenced_blob_keeps_its_encoding(db):
+    add_blob_ref(db, SHA, 10, "gzip", 4)
+    add_blob_ref(db, SHA, 10, None, None)
+    db.commit()
+    assert _blob(db).encoding == "gzip"
+
+
+def test_batch_refs(db):
+    add_blob_refs(db, {SHA: (10, 3), OTHER: (20, 1)})
+    add_blob_refs(db, {SHA: (10, 1)})
+    db.commit()
+    assert _blob(db, SHA).refcount == 4
+    release_blob_refs(db, {SHA: 2, OTHER: 1})
+    db.commit()
+    assert _blob(db, SHA).refcount == 2 and _blob(db, SHA).orphaned_at is None
+    assert _blob(db, OTHER).refcount == 0 and _blob(db, OTHER).orphaned_at is not None
+
+
+def test_orphans_are_collected_only_after_grace_period(db):
+    add_blob_refs(db, {SHA: (10, 1), OTHER: (20, 1)})
+    release_blob_refs(db, {SHA: 1, OTHER: 1})
+    db.commit()
+    past = datetime.now(timezone.utc) - timedelta(minutes=1)
+    assert list_orphaned_blobs(db, past) == []
+    assert not delete_orphaned_blob(db, SHA, past)
+    assert sorted(list_orphaned_blobs(db, _later())) == [SHA, OTHER]
+
+    # ссылка появилась между выборкой и удалением — запись остаётся
+    add_blob_ref(db, OTHER, 20)
+    db.commit()
+    assert delete_orphaned_blob(db, SHA, _later())
+    assert not delete_orphaned_blob(db, OTHER, _later())
+    db.commit()
+    assert _blob(db, SHA) is None
+    assert _blob(db, OTHER).refcount == 1
@@ -0,0 +1,84 @@
+# tests/test_compression.py
+
+import importlib.util
+import os
+
+import pytest
+
+from core.config import settings
+from services.compression import choose_encoding, compress_file, iter_decompressed
+
+CODECS = [
+    "gzip",
+    pytest.param(
+        "zstd",
+        marks=pytest.mark.skipif(
+            importlib.util.find_spec("zstandard") is None, reason="zstandard is not installed"
+        ),
+    ),
+]
+
+
+def _chunks(path: str, size: int = 1000):
+    with open(path, "rb") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+@pytest.mark.parametrize("encoding", CODECS)
+@pytest.mark.parametrize("start, end", [(0, 99_999), (0, 0), (12_345, 54_321), (99_000, 99_999)])
+def test_round_trip_with_ranges(tmp_path, encoding, start, end):
+    data = b"".join(b"line %d of a log file\n" % n for n in range(10_000))[:100_000]
+    src = tmp_path / "src"
+    src.write_bytes(data)
+    dst = str(tmp_path / "dst")
+    stored_size = compress_file(str(src), dst, encoding)
+    assert stored_size == os.path.getsize(dst) < len(data)
+    pieces = list(iter_decompressed(_chunks(dst), encoding, start, end, chunk_size=4096))
+    assert all(len(piece) <= 4096 for piece in pieces)
+    assert b"".join(pieces) == data[start : end + 1]
+
+
+def test_gzip_output_is_deterministic(tmp_path):
+    src = tmp_path / "src"
+    src.write_bytes(b"abc" * 10_000)
+    compress_file(str(src), str(tmp_path / "a"), "gzip")
+    compress_file(str(src), str(tmp_path / "b"), "gzip")
+    assert (tmp_path / "a").read_bytes() == (tmp_path / "b").read_bytes()
+
+
+def test_unknown_encoding(tmp_path):
+    src = tmp_path / "src"
+    src.write_bytes(b"x")
+    with pytest.raises(ValueError):
+        compress_file(str(src), str(tmp_path / "dst"), "lz4")
+    with pytest.raises(ValueError):
+        list(iter_decompressed(iter([b"x"]), "lz4", 0, 0, 10))
+
+
+@pytest.mark.parametrize(
+    "mime_type, data, expected",
+    [
+        ("text/plain", b"hello world " * 1000, "gzip"),
+        ("application/octet-stream", b"\x00" * 10_000, "gzip"),
+        ("image/png", b"\x00" * 10_000, None),
+        ("application/zip", b"\x00" * 10_000, None),
+        ("text/plain", b"short", None),
+        ("text/plain", None, None),
+    ],
+)
+def test_choose_encoding(tmp_path, monkeypatch, mime_type, data, expected):
+    monkeypatch.setattr(settings, "COMPRESSION_ALGORITHM", "gzip")
+    if data is None:
+        # несжимаемое содержимое
+        data = os.urandom(10_000)
+    path = tmp_path / "f"
+    path.write_bytes(data)
+    assert choose_encoding(str(path), len(data), mime_type) == expected
+
+
+def test_compression_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_ALGORITHM", "none")
+    path = tmp_path / "f"
+    path.write_bytes(b"a" * 10_000)
+    assert choose_encoding(str(path), 10_000, "text/plain") is None
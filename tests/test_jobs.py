@@ -0,0 +1,92 @@
+# tests/test_jobs.py
+
+from datetime import datetime, timedelta, timezone
+
+from crud.job import (
+    claim_next_job,
+    create_job,
+    finish_job,
+    get_job,
+    release_job,
+    requeue_stale_jobs,
+)
+from models.job import Job
+
+
+def _jobs(db, owner_id, count):
+    return [create_job(db, owner_id, "test", {"n": n}).id for n in range(count)]
+
+
+def test_claims_oldest_job_first(db, make_user):
+    user = make_user()
+    first, second = _jobs(db, user.id, 2)
+    job = claim_next_job(db, "w1", per_user_limit=2)
+    assert job.id == first
+    assert (job.status, job.worker_id, job.attempts) == ("running", "w1", 1)
+    assert claim_next_job(db, "w2", per_user_limit=2).id == second
+    assert claim_next_job(db, "w1", per_user_limit=2) is None
+
+
+def test_per_user_limit(db, make_user):
+    alice, bob = make_user("alice@example.com"), make_user("bob@example.com")
+    a1, a2 = _jobs(db, alice.id, 2)
+    (b1,) = _jobs(db, bob.id, 1)
+    assert claim_next_job(db, "w", per_user_limit=1).id == a1
+    # вторая задача alice ждёт, пока выполняется первая
+    assert claim_next_job(db, "w", per_user_limit=1).id == b1
+    assert claim_next_job(db, "w", per_user_limit=1) is None
+    assert finish_job(db, a1, "w", "succeeded", result={"ok": True})
+    assert claim_next_job(db, "w", per_user_limit=1).id == a2
+
+
+def test_claimed_job_is_not_claimed_twice(db, make_user):
+    user = make_user()
+    (job_id,) = _jobs(db, user.id, 1)
+    assert claim_next_job(db, "w1", per_user_limit=5).id == job_id
+    assert claim_next_job(db, "w2", per_user_limit=5) is None
+    assert get_job(db, job_id).worker_id == "w1"
+
+
+def test_delayed_job_waits_for_run_after(db, make_user):
+    user = make_user()
+    (job_id,) = _jobs(db, user.id, 1)
+    claim_next_job(db, "w", per_user_limit=1)
+    assert finish_job(db, job_id, "w", "queued", error="boom", retry_delay=3600)
+    assert claim_next_job(db, "w", per_user_limit=1) is None
+
+
+def test_only_owning_worker_can_finish(db, make_user):
+    user = make_user()
+    (job_id,) = _jobs(db, user.id, 1)
+    claim_next_job(db, "w1", per_user_limit=1)
+    assert not finish_job(db, job_id, "w2", "succeeded")
+    assert finish_job(db, job_id, "w1", "failed", error="boom")
+    db.expire_all()
+    job = get_job(db, job_id)
+    assert (job.status, job.error, job.worker_id) == ("failed", "boom", None)
+
+
+def test_released_job_keeps_its_attempts(db, make_user):
+    user = make_user()
+    (job_id,) = _jobs(db, user.id, 1)
+    claim_next_job(db, "w1", per_user_limit=1)
+    release_job(db, job_id, "w1")
+    job = claim_next_job(db, "w2", per_user_limit=1)
+    assert (job.id, job.attempts) == (job_id, 1)
+
+
+def test_stale_jobs_are_requeued_or_failed(db, make_user):
+    user = make_user()
+    retry_id, fail_id = _jobs(db, user.id, 2)
+    claim_next_job(db, "dead", per_user_limit=2)
+    claim_next_job(db, "dead", per_user_limit=2)
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.query(Job).update({Job.heartbeat_at: long_ago})
+    db.query(Job).filter(Job.id == fail_id).update({Job.attempts: 3})
+    db.commit()
+
+    assert requeue_stale_jobs(db, stale_seconds=60, max_attempts=3) == 2
+    db.expire_all()
+    assert get_job(db, retry_id).status == "queued"
+    assert get_job(db, fail_id).status == "failed"
+    assert claim_next_job(db, "alive", per_user_limit=1).id == retry_id
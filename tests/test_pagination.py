@@ -0,0 +1,34 @@
+# tests/test_pagination.py
+
+import pytest
+
+from crud.file import list_child_files
+from models.file import File
+
+
+def _pages(db, owner_id, sort, descending, limit):
+    seen, after = [], None
+    while True:
+        page = list_child_files(db, owner_id, "user_1", sort, descending, after, limit)
+        seen.extend(f.id for f in page)
+        if len(page) < limit:
+            return seen
+        after = (getattr(page[-1], sort), page[-1].id)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_size_pages_keep_files_without_size(db, make_user, descending, limit):
+    user = make_user()
+    sizes = [5, None, 3, None, 5, 1, None]
+    files = [
+        File(filename=f"user_1/f{n}", parent="user_1", owner_id=user.id, size=size)
+        for n, size in enumerate(sizes)
+    ]
+    db.add_all(files)
+    db.commit()
+
+    # размер неизвестен (NULL) — после всех известных, при убывании — перед ними
+    key = lambda f: (f.size is None, f.size or 0, f.id)  # noqa: E731
+    expected = [f.id for f in sorted(files, key=key, reverse=descending)]
+    assert _pages(db, user.id, "size", descending, limit) == expected
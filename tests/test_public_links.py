@@ -0,0 +1,114 @@
+# tests/test_public_links.py
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from crud.public_link import load_revocations, revoke_public_links
+from models.file import File
+from services import public_links
+from services.public_links import (
+    issue_directory_link,
+    issue_file_link,
+    parse_public_link,
+    remember_revocations,
+)
+from utils.errors import AppError, NotFoundError
+
+
+@pytest.fixture(autouse=True)
+def no_revocations(monkeypatch):
+    # пустой список отзыва процесса — без чтения из БД приложения
+    monkeypatch.setattr(public_links, "_revocations", {})
+
+
+def _record(**fields):
+    values = {
+        "id": 7,
+        "filename": "user_1/docs/report.txt",
+        "checksum": "c" * 64,
+        "size": 123,
+        "mime_type": "text/plain",
+        "uploaded_at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    }
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def _in(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def test_file_link_round_trip():
+    link = parse_public_link(issue_file_link(_record(), "gzip", _in(60)))
+    assert (link.kind, link.id) == ("f", 7)
+    assert link.filename == "report.txt"
+    assert (link.checksum, link.size, link.mime_type, link.encoding) == ("c" * 64, 123, "text/plain", "gzip")
+    assert link.uploaded_at == datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def test_legacy_file_link_keeps_full_path():
+    link = parse_public_link(issue_file_link(_record(checksum=None), None, _in(60)))
+    assert link.filename == "user_1/docs/report.txt"
+
+
+def test_directory_link_round_trip():
+    link = parse_public_link(issue_directory_link(SimpleNamespace(id=3), _in(60)))
+    assert (link.kind, link.id, link.filename) == ("d", 3, None)
+
+
+def test_uuid_token_is_not_a_signed_link():
+    assert parse_public_link("0b6a4c1e-4b8e-4f8e-9a43-2f1d2c3b4a5d") is None
+
+
+@pytest.mark.parametrize("tamper", ["body", "signature", "garbage"])
+def test_tampered_link_is_rejected(tamper):
+    body, _, signature = issue_file_link(_record(), None, _in(60)).partition(".")
+    if tamper == "body":
+        forged = issue_file_link(_record(id=8), None, _in(60)).partition(".")[0]
+        token = f"{forged}.{signature}"
+    elif tamper == "signature":
+        token = f"{body}.{signature[::-1]}"
+    else:
+        token = "not base64!.???"
+    with pytest.raises(NotFoundError):
+        parse_public_link(token)
+
+
+def test_expired_link():
+    token = issue_file_link(_record(), None, _in(-1))
+    with pytest.raises(AppError) as exc:
+        parse_public_link(token)
+    assert exc.value.status_code == 410
+
+
+def test_revocation_applies_to_links_issued_before_it():
+    token = issue_file_link(_record(), None, _in(60))
+    other = issue_file_link(_record(id=8), None, _in(60))
+    remember_revocations([("f", 7, _in(0))])
+    with pytest.raises(AppError) as exc:
+        parse_public_link(token)
+    assert exc.value.status_code == 410
+    assert parse_public_link(other).id == 8
+
+
+def test_link_issued_after_revocation_is_valid():
+    remember_revocations([("f", 7, _in(-60))])
+    assert parse_public_link(issue_file_link(_record(), None, _in(60))).id == 7
+
+
+def test_revoke_public_links_records_only_live_links(db, make_user):
+    user = make_user()
+    live = File(filename="user_1/a", owner_id=user.id, public_token="t1",
+                public_link_expires_at=_in(3600))
+    expired = File(filename="user_1/b", owner_id=user.id, public_link_expires_at=_in(-3600))
+    never = File(filename="user_1/c", owner_id=user.id)
+    db.add_all([live, expired, never])
+    db.commit()
+
+    revoked = revoke_public_links(db, "f", [live, expired, never])
+    db.commit()
+    assert [(kind, target_id) for kind, target_id, _ in revoked] == [("f", live.id)]
+    assert live.public_token is None and live.public_link_expires_at is None
+    assert set(load_revocations(db)) == {("f", live.id)}
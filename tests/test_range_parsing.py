@@ -0,0 +1,47 @@
+# tests/test_range_parsing.py
+
+import pytest
+
+from services.downloads import MAX_RANGES, parse_range_header
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", [(0, 99)]),
+        ("bytes=100-", [(100, 999)]),
+        ("bytes=-50", [(950, 999)]),
+        ("bytes=-5000", [(0, 999)]),
+        ("bytes=900-5000", [(900, 999)]),
+        ("BYTES = 0-0", [(0, 0)]),
+        ("bytes=0-99, 200-299", [(0, 99), (200, 299)]),
+        # пересекающиеся и соседние диапазоны сливаются
+        ("bytes=0-99,50-149,150-199", [(0, 199)]),
+        ("bytes=500-599,0-9", [(0, 9), (500, 599)]),
+    ],
+)
+def test_satisfiable_ranges(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    assert parse_range_header(header, 1000) == []
+
+
+@pytest.mark.parametrize("header", ["bytes=0-", "bytes=0-0", "bytes=-1", "bytes=-100"])
+def test_empty_file_has_no_satisfiable_ranges(header):
+    assert parse_range_header(header, 0) == []
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["items=0-1", "bytes=", "bytes=5", "bytes=10-5", "bytes=a-b", "bytes=-x"],
+)
+def test_malformed_header_is_ignored(header):
+    assert parse_range_header(header, 1000) is None
+
+
+def test_too_many_ranges_are_ignored():
+    header = "bytes=" + ",".join(f"{n * 2}-{n * 2}" for n in range(MAX_RANGES + 1))
+    assert parse_range_header(header, 10_000) is None
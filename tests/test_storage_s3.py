@@ -0,0 +1,85 @@
+# tests/test_storage_s3.py
+
+import os
+
+import pytest
+
+from services.storage.memory_s3 import InMemoryS3Client, StubClientError
+from services.storage.s3 import MIN_PART_SIZE, S3Storage
+
+
+@pytest.fixture
+def client():
+    # маленькие части, чтобы multipart upload проверялся на килобайтах
+    return InMemoryS3Client(min_part_size=1024)
+
+
+@pytest.fixture
+def storage(client, tmp_path):
+    store = S3Storage("bucket", str(tmp_path), prefix="blobs/", client=client)
+    store.part_size = 1024
+    return store
+
+
+def _staged(tmp_path, data: bytes) -> str:
+    path = tmp_path / "upload.tmp"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_small_file_is_a_single_put(storage, client, tmp_path):
+    path = _staged(tmp_path, b"hello")
+    storage.put_file("k", path)
+    assert client.objects[("bucket", "blobs/k")] == b"hello"
+    assert not client.uploads
+    assert not os.path.exists(path)
+
+
+def test_large_file_uses_multipart_upload(storage, client, tmp_path):
+    data = os.urandom(1024 * 3 + 100)
+    calls = []
+    upload_part = client.upload_part
+
+    def counting_upload_part(**kwargs):
+        calls.append((kwargs["PartNumber"], len(kwargs["Body"])))
+        return upload_part(**kwargs)
+
+    client.upload_part = counting_upload_part
+    storage.put_file("big", _staged(tmp_path, data))
+    assert calls == [(1, 1024), (2, 1024), (3, 1024), (4, 100)]
+    assert client.objects[("bucket", "blobs/big")] == data
+    assert not client.uploads
+
+
+def test_failed_multipart_upload_is_aborted(storage, client, tmp_path):
+    def failing_complete(**kwargs):
+        raise StubClientError("InternalError", "CompleteMultipartUpload")
+
+    client.complete_multipart_upload = failing_complete
+    path = _staged(tmp_path, os.urandom(1024 * 2 + 1))
+    with pytest.raises(StubClientError):
+        storage.put_file("big", path)
+    assert not client.uploads
+    assert ("bucket", "blobs/big") not in client.objects
+    # при ошибке файл остаётся — загрузку можно повторить
+    assert os.path.exists(path)
+
+
+def test_part_size_is_never_below_s3_minimum(client, tmp_path):
+    store = S3Storage("bucket", str(tmp_path), part_size=1, client=client)
+    assert store.part_size == MIN_PART_SIZE
+
+
+def test_iter_range_size_and_delete(storage, tmp_path):
+    data = bytes(range(256)) * 4
+    storage.put_file("k", _staged(tmp_path, data))
+    assert b"".join(storage.iter_range("k", 10, 19)) == data[10:20]
+    assert b"".join(storage.iter_range("k", 1000, 5000)) == data[1000:]
+    assert b"".join(storage.iter_range("k", 5, 4)) == b""
+    assert storage.size("k") == len(data)
+
+    storage.delete("k")
+    storage.delete("k")
+    assert storage.size("k") is None
+    with pytest.raises(FileNotFoundError):
+        b"".join(storage.iter_range("k", 0, 1))